@@ -0,0 +1 @@
+#基准测试：合成数据生成与各处理阶段的耗时/内存基准
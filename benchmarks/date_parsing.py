@@ -0,0 +1,75 @@
+#日期解析并行基准模块
+#比较文本日期列在串行、线程池和进程池（共享内存）中解析的耗时；进程池的耗时包含进程启动。
+#进程池默认不启用（parallel.PROCESS_MIN_ROWS 为 None），本基准临时启用以便比较。
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from data_assistant.datetimes import detect_datetime
+from data_assistant import parallel
+from data_assistant.parallel import ColumnExecutor
+
+
+def make_frame(rows, cols, seed=0):
+    """cols 个 '%Y-%m-%d %H:%M:%S' 格式的文本日期列"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2020-01-01T00:00:00')
+    data = {}
+    for i in range(cols):
+        seconds = rng.integers(0, 365 * 24 * 3600, rows)
+        values = (start + seconds.astype('timedelta64[s]')).astype(str)
+        data[f'date_{i}'] = np.char.replace(values, 'T', ' ').astype(object)
+    return pd.DataFrame(data)
+
+
+def time_parse(df, specs, jobs, processes, repeat):
+    """返回 repeat 次解析（每次新建执行器）耗时的最小值；processes 为 False 时不使用进程池"""
+    threshold = parallel.PROCESS_MIN_ROWS
+    parallel.PROCESS_MIN_ROWS = 0 if processes else None
+    try:
+        durations = []
+        for _ in range(repeat):
+            executor = ColumnExecutor(jobs)
+            start = time.perf_counter()
+            results = executor.parse_datetimes(df, specs)
+            durations.append(time.perf_counter() - start)
+            executor.close()
+            errors = [col for col, result in results.items() if isinstance(result, Exception)]
+            if errors:
+                raise RuntimeError(f"解析失败: {errors}")
+        return min(durations)
+    finally:
+        parallel.PROCESS_MIN_ROWS = threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据处理小助手 - 日期解析并行基准')
+    parser.add_argument('--rows', type=int, default=250000, help='每列行数')
+    parser.add_argument('--cols', type=int, default=2, help='文本日期列数')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='并行数')
+    parser.add_argument('--repeat', type=int, default=3, help='运行次数（取最小值）')
+    parser.add_argument('--output', type=str, default=None, help='结果 JSON 文件')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols)
+    specs = {col: detect_datetime(df[col], col) for col in df.columns}
+    results = {
+        'cpu_count': os.cpu_count(),
+        'serial': time_parse(df, specs, 1, False, args.repeat),
+        'threads': time_parse(df, specs, args.jobs, False, args.repeat),
+        'processes': time_parse(df, specs, args.jobs, True, args.repeat)
+    }
+    for name in ('serial', 'threads', 'processes'):
+        results[name] = round(results[name], 3)
+        print(f"{name:<12}{results[name]:>8.3f} 秒")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存至: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
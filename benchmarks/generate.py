@@ -0,0 +1,114 @@
+#合成数据生成模块
+#按行数、列数、列类型比例、缺失率、异常值率、重复率、分类基数和日期列数生成可复现的测试数据。
+import argparse
+import numpy as np
+import pandas as pd
+
+DEFAULT_PARAMS = {
+    'rows': 100000,
+    'cols': 10,
+    'numeric_ratio': 0.6,        #数值列占比
+    'categorical_ratio': 0.3,    #分类列占比，其余为布尔列（不含日期列）
+    'date_cols': 1,
+    'missing_rate': 0.05,
+    'outlier_rate': 0.01,
+    'duplicate_rate': 0.02,
+    'cardinality': 50,           #每个分类列的取值个数
+    'seed': 0
+}
+
+
+def generate_dataset(**params):
+    """
+    生成合成数据。列名为 num_i / cat_i / flag_i / date_i（日期列写为 ISO 格式文本，清洗阶段按取值内容识别为日期列）。
+    数值列服从正态分布，按 outlier_rate 混入偏离 6-12 个标准差的异常值；分类列取值服从 Zipf 分布；
+    每列按 missing_rate 置为缺失；最后按 duplicate_rate 复制已有行并打乱顺序。
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    rng = np.random.default_rng(params['seed'])
+    rows = params['rows']
+    duplicate_count = int(rows * params['duplicate_rate'])
+    base_rows = rows - duplicate_count
+
+    n_numeric = int(round(params['cols'] * params['numeric_ratio']))
+    n_categorical = min(int(round(params['cols'] * params['categorical_ratio'])), params['cols'] - n_numeric)
+    n_bool = params['cols'] - n_numeric - n_categorical
+
+    data = {}
+    for i in range(n_numeric):
+        loc, scale = rng.uniform(-100, 100), rng.uniform(1, 50)
+        values = rng.normal(loc, scale, base_rows)
+        outliers = rng.random(base_rows) < params['outlier_rate']
+        signs = rng.choice([-1.0, 1.0], outliers.sum())
+        values[outliers] = loc + signs * scale * rng.uniform(6, 12, outliers.sum())
+        data[f'num_{i}'] = values
+
+    cardinality = max(params['cardinality'], 1)
+    weights = 1.0 / np.arange(1, cardinality + 1)
+    weights /= weights.sum()
+    for i in range(n_categorical):
+        labels = np.array([f'c{i}_{k}' for k in range(cardinality)], dtype=object)
+        data[f'cat_{i}'] = labels[rng.choice(cardinality, base_rows, p=weights)]
+
+    for i in range(n_bool):
+        data[f'flag_{i}'] = rng.random(base_rows) < 0.5
+
+    start = np.datetime64('2020-01-01T00:00:00')
+    for i in range(params['date_cols']):
+        seconds = rng.integers(0, 365 * 24 * 3600, base_rows)
+        data[f'date_{i}'] = start + seconds.astype('timedelta64[s]')
+
+    df = pd.DataFrame(data)
+    if params['missing_rate'] > 0:
+        for col in df.columns:
+            mask = rng.random(base_rows) < params['missing_rate']
+            if df[col].dtype == bool:
+                df[col] = df[col].astype(object)
+            df.loc[mask, col] = None
+
+    if duplicate_count:
+        duplicates = df.iloc[rng.integers(0, base_rows, duplicate_count)]
+        df = pd.concat([df, duplicates], ignore_index=True)
+        df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    return df
+
+
+def write_dataset(path, **params):
+    """生成数据并写入 CSV 或 Excel 文件"""
+    df = generate_dataset(**params)
+    if path.lower().endswith(('.xlsx', '.xls')):
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def add_params_arguments(parser):
+    """把生成参数添加为命令行选项（默认值为 None 表示沿用场景或 DEFAULT_PARAMS 中的值）"""
+    parser.add_argument('--rows', type=int, default=None, help='行数（含重复行）')
+    parser.add_argument('--cols', type=int, default=None, help='列数（不含日期列）')
+    parser.add_argument('--numeric-ratio', type=float, default=None, help='数值列占比')
+    parser.add_argument('--categorical-ratio', type=float, default=None, help='分类列占比，其余为布尔列')
+    parser.add_argument('--date-cols', type=int, default=None, help='日期列个数')
+    parser.add_argument('--missing-rate', type=float, default=None, help='缺失值比例')
+    parser.add_argument('--outlier-rate', type=float, default=None, help='数值列异常值比例')
+    parser.add_argument('--duplicate-rate', type=float, default=None, help='重复行比例')
+    parser.add_argument('--cardinality', type=int, default=None, help='分类列取值个数')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+
+
+def params_from_args(args):
+    return {key: getattr(args, key) for key in DEFAULT_PARAMS if getattr(args, key, None) is not None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成测试数据')
+    parser.add_argument('output', type=str, help='输出文件路径（.csv 或 .xlsx）')
+    add_params_arguments(parser)
+    args = parser.parse_args()
+    write_dataset(args.output, **params_from_args(args))
+    print(f"已生成: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#基准测试运行模块
+#在合成数据上依次运行 加载 → 清洗 → 分析 → 可视化 → 报告，记录各阶段耗时与峰值内存，
+#结果写入 JSON，并可与保存的基准比较：任一阶段变慢或内存增长超过阈值时以非零状态退出。
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+from data_assistant.loader import DataLoader, copy_on_write
+from data_assistant.cleaner import DataCleaner
+from data_assistant.analyzer import DataAnalyzer
+from data_assistant.visualizer import DataVisualizer
+from data_assistant.reporter import ReportGenerator
+from .generate import write_dataset, add_params_arguments, params_from_args
+
+STAGES = ['loader', 'cleaner', 'analyzer', 'visualizer', 'reporter']
+SCENARIOS = {
+    'small': {'rows': 10000, 'cols': 10},
+    'medium': {'rows': 200000, 'cols': 20},
+    'wide': {'rows': 20000, 'cols': 100, 'date_cols': 2},
+    'high_cardinality': {'rows': 200000, 'cols': 10, 'categorical_ratio': 0.6, 'numeric_ratio': 0.3,
+                         'cardinality': 50000}
+}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# 默认回归阈值：比基准慢（或内存多）20% 以上视为回归
+DEFAULT_THRESHOLD = 0.2
+# 基准耗时低于该值（秒）的阶段波动太大，不参与耗时比较
+MIN_COMPARE_SECONDS = 0.05
+# 基准峰值内存低于该值（MB）的阶段不参与内存比较
+MIN_COMPARE_MB = 1.0
+
+
+def run_stages(file_path, output_dir, trace_memory=False):
+    """
+    运行一次完整流程，返回 {阶段名: {'seconds': 耗时, 'peak_mb': tracemalloc 峰值}}。
+    trace_memory 为 False 时不启用 tracemalloc（其开销会影响耗时），peak_mb 为 None。
+    """
+    results = {}
+    context = {}
+
+    def measure(stage, func):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            tracemalloc.stop()
+        results[stage] = {'seconds': seconds, 'peak_mb': peak}
+
+    def load():
+        loader = DataLoader(file_path)
+        if not loader.load_data():
+            raise RuntimeError(f"加载失败: {loader.issues}")
+        context['loader'] = loader
+
+    def clean():
+        cleaner = DataCleaner(context['loader'].release())
+        context['df'] = cleaner.clean_data()
+        context['cleaner'] = cleaner
+
+    def analyze():
+        analyzer = DataAnalyzer(context['df'], profile=context['cleaner'].profile)
+        analyzer.analyze_data()
+        context['analyzer'] = analyzer
+
+    def visualize():
+        visualizer = DataVisualizer(context['df'], profile=context['cleaner'].profile, jobs=1)
+        visualizer.create_visualizations()
+        context['visualizer'] = visualizer
+
+    def report():
+        report_data = {
+            'file_info': context['loader'].file_info,
+            'cleaning': context['cleaner'].cleaning,
+            'analysis': context['analyzer'].analysis,
+            'visualizations': context['visualizer'].visualizations,
+            'issues': []
+        }
+        ReportGenerator(output_dir).generate_report(report_data, 'benchmark_report.html')
+
+    with copy_on_write():
+        for stage, func in zip(STAGES, [load, clean, analyze, visualize, report]):
+            measure(stage, func)
+    return results
+
+
+def run_scenario(name, params, repeat, work_dir):
+    """耗时取 repeat 次运行中的最小值；峰值内存在额外一次启用 tracemalloc 的运行中测量"""
+    file_path = os.path.join(work_dir, f"{name}.csv")
+    write_dataset(file_path, **params)
+    output_dir = os.path.join(work_dir, 'reports')
+
+    runs = [run_stages(file_path, output_dir) for _ in range(repeat)]
+    memory = run_stages(file_path, output_dir, trace_memory=True)
+
+    stages = {}
+    for stage in STAGES:
+        stages[stage] = {
+            'seconds': round(min(run[stage]['seconds'] for run in runs), 4),
+            'peak_mb': round(memory[stage]['peak_mb'], 2)
+        }
+    return {
+        'params': params,
+        'file_mb': round(os.path.getsize(file_path) / 1024 ** 2, 2),
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 4)
+    }
+
+
+def environment_info():
+    return {
+        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基准比较，返回回归列表 [(场景, 阶段, 指标, 基准值, 当前值)]。
+    只比较两边都存在的场景与阶段，基准值过小的项不参与比较。
+    """
+    regressions = []
+    for name, result in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None or base['params'] != result['params']:
+            continue
+        for stage, current in result['stages'].items():
+            if stage not in base['stages']:
+                continue
+            expected = base['stages'][stage]
+            if expected['seconds'] >= MIN_COMPARE_SECONDS and current['seconds'] > expected['seconds'] * (1 + threshold):
+                regressions.append((name, stage, 'seconds', expected['seconds'], current['seconds']))
+            if (expected.get('peak_mb') or 0) >= MIN_COMPARE_MB and current['peak_mb'] > expected['peak_mb'] * (1 + threshold):
+                regressions.append((name, stage, 'peak_mb', expected['peak_mb'], current['peak_mb']))
+    return regressions
+
+
+def print_results(results):
+    for name, result in results['scenarios'].items():
+        print(f"\n场景 {name}: {result['params']['rows']} 行 × {result['params']['cols']} 列, "
+              f"文件 {result['file_mb']} MB, 总耗时 {result['total_seconds']} 秒")
+        for stage, stats in result['stages'].items():
+            print(f"  {stage:<12}{stats['seconds']:>10.4f} 秒{stats['peak_mb']:>12.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据处理小助手 - 基准测试')
+    parser.add_argument('--scenario', nargs='+', choices=list(SCENARIOS), default=['small'],
+                        help='运行的预设场景；生成参数选项会覆盖场景中的对应值')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景重复运行次数（耗时取最小值）')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='结果 JSON 文件')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE, help='基准 JSON 文件')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基准')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='回归阈值（相对基准增长比例），默认 0.2')
+    add_params_arguments(parser)
+    args = parser.parse_args()
+
+    overrides = params_from_args(args)
+    work_dir = tempfile.mkdtemp(prefix='da_bench_')
+    try:
+        results = {'environment': environment_info(), 'scenarios': {}}
+        for name in args.scenario:
+            params = {**SCENARIOS[name], **overrides}
+            print(f"运行场景 {name}: {params}")
+            results['scenarios'][name] = run_scenario(name, params, max(args.repeat, 1), work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存至: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基准已保存至: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("未找到基准文件，跳过比较（使用 --save-baseline 保存基准）")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 项性能回归（阈值 {args.threshold:.0%}）:")
+        for name, stage, metric, expected, current in regressions:
+            print(f"  {name}/{stage} {metric}: 基准 {expected} → 当前 {current} (+{current / expected - 1:.0%})")
+        return 1
+    print(f"\n✅ 未发现超过 {args.threshold:.0%} 的性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#启动耗时基准模块
+#在新的解释器进程中测量命令行启动耗时与各入口模块的导入耗时（冷启动，取多次运行的中位数）。
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from .generate import write_dataset
+
+# (名称, python 参数)；{data} 和 {output} 运行时替换为测试文件与输出目录
+COMMANDS = [
+    ('import data_assistant', ['-c', 'import data_assistant']),
+    ('import data_assistant.pipeline', ['-c', 'import data_assistant.pipeline']),
+    ('import data_assistant.visualizer', ['-c', 'import data_assistant.visualizer']),
+    ('--help', ['-m', 'data_assistant.main', '--help']),
+    ('--stats-only 小文件', ['-m', 'data_assistant.main', '{data}', '-o', '{output}', '--stats-only']),
+    ('完整流程 小文件', ['-m', 'data_assistant.main', '{data}', '-o', '{output}'])
+]
+
+
+def time_command(args, repeat):
+    """返回 repeat 次运行耗时（秒）的中位数"""
+    env = dict(os.environ, MPLBACKEND='Agg')
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据处理小助手 - 启动耗时基准')
+    parser.add_argument('--repeat', type=int, default=5, help='每条命令运行次数（取中位数）')
+    parser.add_argument('--rows', type=int, default=1000, help='小文件的行数')
+    parser.add_argument('--output', type=str, default=None, help='结果 JSON 文件')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='da_startup_') as work_dir:
+        data_path = write_dataset(os.path.join(work_dir, 'small.csv'), rows=args.rows)
+        output_dir = os.path.join(work_dir, 'reports')
+
+        results = {}
+        for name, command in COMMANDS:
+            command = [part.format(data=data_path, output=output_dir) for part in command]
+            results[name] = round(time_command(command, args.repeat), 3)
+            print(f"{name:<36}{results[name]:>8.3f} 秒")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存至: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,287 @@
-#数据分析模块
-import numpy as np
-
-class DataAnalyzer:
-    def __init__(self, df):
-        self.df = df
-        self.analysis = {}
-        self.issues = []
-
-    def analyze_data(self):
-        if self.df is None or self.df.empty:
-            self.issues.append("分析失败: 数据未加载或为空")
-            return
-
-        try:
-            # 1. 基本统计信息
-            self.analysis['summary'] = self.df.describe(include='all').round(2).to_dict()
-
-            # 2. 相关性分析
-            numeric_cols = self.df.select_dtypes(include=np.number).columns
-            if len(numeric_cols) > 1:
-                self.analysis['correlation'] = self.df[numeric_cols].corr().round(2).to_dict()
-
-            # 3. 分类变量分析
-            categorical_cols = self.df.select_dtypes(exclude=[np.number, 'datetime']).columns
-            categorical_report = {}
-
-            for col in categorical_cols:
-                value_counts = self.df[col].value_counts().head(10)
-                categorical_report[col] = {
-                    'unique_count': self.df[col].nunique(),
-                    'top_values': value_counts.to_dict()
-                }
-
-            if categorical_report:
-                self.analysis['categorical'] = categorical_report
-
-            # 4. 时间序列分析 (如果有日期列)
-            datetime_cols = self.df.select_dtypes(include='datetime').columns
-            time_report = {}
-
-            for col in datetime_cols:
-                time_report[col] = {
-                    'min_date': str(self.df[col].min()),
-                    'max_date': str(self.df[col].max()),
-                    'duration': str(self.df[col].max() - self.df[col].min())
-                }
-
-            if time_report:
-                self.analysis['time_series'] = time_report
-
-            print("数据分析完成")
-
-        except Exception as e:
-            self.issues.append(f"分析过程中出错: {str(e)}")
-            print(f"分析错误: {str(e)}")
\ No newline at end of file
+#数据分析模块
+import numpy as np
+import pandas as pd
+from .streaming import ColumnSpill
+from .sketches import CategoryCounter, CoMoments, StatsEngine
+from .profile import DataProfile
+from .timeseries import TimeRollup, rollup_table
+from .correlation import Correlation
+
+# describe 对各类列输出的统计项（顺序与 pandas 一致）
+NUMERIC_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+DATETIME_STATS = ['count', 'mean', 'min', '25%', '50%', '75%', 'max']
+CATEGORICAL_STATS = ['count', 'unique', 'top', 'freq']
+# 近似模式下对内存中的 DataFrame 按此行数分批更新草图
+SKETCH_BATCH_ROWS = 1000000
+# 报告中每个日期列的汇总表：最多展示的周期数和数值列数
+TIME_TABLE_MAX_PERIODS = 24
+TIME_TABLE_MAX_COLUMNS = 4
+
+class DataAnalyzer:
+    def __init__(self, df=None, mode='exact', profile=None, corr_method='pearson'):
+        self.df = df
+        self.profile = profile or DataProfile(df)     #与清洗、可视化阶段共享的列统计缓存
+        self.mode = mode        #'exact' 精确统计；'approx' 使用可合并草图近似统计，内存占用与行数无关
+        self.analysis = {}
+        self.issues = []
+        self.engine = None      #近似模式下的 StatsEngine，可序列化后与其他分区的结果合并
+        self.rollups = {}       #{日期列: TimeRollup}，各数值列的 日/周/月 汇总，供时间序列图表复用
+        self.corr_method = corr_method    #'pearson' 或 'spearman'（流式与近似模式只支持 pearson）
+        self.correlation = None           #Correlation，供相关性热力图复用
+
+    def analyze_data(self):
+        if self.df is None or self.df.empty:
+            self.issues.append("分析失败: 数据未加载或为空")
+            return
+
+        if self.mode == 'approx':
+            batches = (self.df.iloc[start:start + SKETCH_BATCH_ROWS]
+                       for start in range(0, len(self.df), SKETCH_BATCH_ROWS))
+            self.analyze_chunks(batches)
+            return
+
+        try:
+            profile = self.profile
+            numeric_cols = profile.numeric_cols
+            categorical_cols = profile.categorical_cols
+            datetime_cols = profile.datetime_cols
+
+            # 1. 基本统计信息：与 describe(include='all') 相同的统计量，复用清洗阶段已缓存的分位数与计数
+            non_null = profile.non_null_counts()
+            quantiles = profile.quantiles(numeric_cols)
+            numeric_stats = profile.numeric_stats(numeric_cols)
+            datetime_stats = profile.datetime_stats(datetime_cols)
+            # 分类列的计数按列并行预先完成（基本统计与分类变量分析共用）
+            profile.category_counters(categorical_cols)
+            summary = {}
+            for col in self.df.columns:
+                if col in numeric_stats:
+                    stats = {'count': float(non_null[col]), **numeric_stats[col]}
+                    stats['25%'], stats['50%'], stats['75%'] = quantiles[col]
+                elif col in datetime_stats:
+                    stats = {'count': int(non_null[col]), **datetime_stats[col]}
+                else:
+                    counter = profile.category_counts(col)
+                    value_counts = counter.value_counts
+                    stats = {'count': int(non_null[col]), 'unique': counter.distinct}
+                    if len(value_counts):
+                        stats['top'], stats['freq'] = value_counts.index[0], value_counts.iloc[0]
+                summary[col] = self._describe_series(stats, col, numeric_stats, datetime_stats)
+
+            # 2. 相关性分析
+            correlation = profile.corr(self.corr_method) if len(numeric_cols) > 1 else None
+
+            # 3. 分类变量分析
+            categorical = {}
+            for col in categorical_cols:
+                counter = profile.category_counts(col)
+                categorical[col] = (counter.distinct, counter.value_counts.head(10), counter.approx)
+
+            # 4. 时间序列分析 (如果有日期列)
+            time_ranges = {col: (datetime_stats[col]['min'], datetime_stats[col]['max']) for col in datetime_cols}
+            self.rollups = profile.time_rollups()
+
+            self._store_results(list(self.df.columns), summary, correlation, categorical, time_ranges)
+            print("数据分析完成")
+
+        except Exception as e:
+            self.issues.append(f"分析过程中出错: {str(e)}")
+            print(f"分析错误: {str(e)}")
+
+    def analyze_chunks(self, chunks, engine=None):
+        """
+        流式分析：单遍扫描数据块，输出与 analyze_data 相同结构的 analysis。
+        精确模式下分位数由暂存到磁盘的数值列逐列计算；近似模式下全部统计量来自 StatsEngine 草图。
+        :param chunks: 可迭代的 DataFrame 块（如 DataCleaner.clean_chunks 的返回值）
+        :param engine: 近似模式下已有的 StatsEngine（如增量分析时上一次保存的状态），新数据块在其基础上累计
+        """
+        if self.mode == 'approx':
+            self._analyze_sketches(chunks, engine)
+        else:
+            self._analyze_spilled(chunks)
+
+    def _analyze_spilled(self, chunks):
+        spill = ColumnSpill()
+        try:
+            columns = None
+            numeric_cols = categorical_cols = datetime_cols = None
+            counters = {}
+            non_null = None
+            date_min = {}
+            date_max = {}
+            comoments = None
+            rollups = {}
+
+            for chunk in chunks:
+                if columns is None:
+                    columns = list(chunk.columns)
+                    numeric_cols = list(chunk.select_dtypes(include=np.number).columns)
+                    categorical_cols = list(chunk.select_dtypes(exclude=[np.number, 'datetime']).columns)
+                    datetime_cols = list(chunk.select_dtypes(include='datetime').columns)
+                    non_null = pd.Series(0, index=columns)
+                    counters = {col: CategoryCounter() for col in categorical_cols}
+                    comoments = CoMoments(len(numeric_cols))
+                    if numeric_cols:
+                        rollups = {col: TimeRollup(col, numeric_cols) for col in datetime_cols}
+
+                non_null += chunk.notnull().sum()
+                for col in numeric_cols:
+                    spill.append(col, chunk[col].dropna().to_numpy(dtype=np.float64))
+                for col in categorical_cols:
+                    counters[col].update(chunk[col])
+                for col in datetime_cols:
+                    values = chunk[col].dropna()
+                    spill.append(col, values.to_numpy(dtype='datetime64[ns]').view(np.int64), dtype=np.int64)
+                    if len(values):
+                        date_min[col] = min(date_min.get(col, values.min()), values.min())
+                        date_max[col] = max(date_max.get(col, values.max()), values.max())
+                if len(numeric_cols) > 1 or rollups:
+                    numeric = chunk[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+                    if len(numeric_cols) > 1:
+                        comoments.update(numeric)
+                    for col, rollup in rollups.items():
+                        rollup.update(chunk[col].to_numpy(dtype='datetime64[ns]'), numeric)
+
+            if columns is None:
+                self.issues.append("分析失败: 数据未加载或为空")
+                return
+
+            summary = {}
+            for col in columns:
+                stats = {'count': float(non_null[col])}
+                if col in numeric_cols:
+                    count, mean, std, low, high = spill.moments(col)
+                    if count:
+                        q1, q2, q3 = spill.quantiles(col, [0.25, 0.5, 0.75])
+                        stats.update({'mean': mean, 'std': std, 'min': low,
+                                      '25%': q1, '50%': q2, '75%': q3, 'max': high})
+                elif col in datetime_cols:
+                    count, mean = spill.moments(col)[:2]
+                    if count:
+                        q1, q2, q3 = spill.quantiles(col, [0.25, 0.5, 0.75])
+                        stats.update({
+                            'mean': pd.Timestamp(int(mean)),
+                            'min': date_min[col], '25%': pd.Timestamp(int(q1)), '50%': pd.Timestamp(int(q2)),
+                            '75%': pd.Timestamp(int(q3)), 'max': date_max[col]
+                        })
+                elif col in counters and counters[col].distinct:
+                    top = counters[col].value_counts
+                    stats.update({'unique': counters[col].distinct, 'top': top.index[0], 'freq': int(top.iloc[0])})
+                summary[col] = self._describe_series(stats, col, numeric_cols, datetime_cols)
+
+            correlation = None
+            if len(numeric_cols) > 1 and comoments.count > 1:
+                correlation = Correlation(numeric_cols, comoments.corr(), self._streaming_corr_method())
+
+            categorical = {}
+            for col in categorical_cols:
+                counter = counters[col]
+                categorical[col] = (counter.distinct, counter.value_counts.head(10), counter.approx)
+
+            time_ranges = {col: (date_min.get(col, pd.NaT), date_max.get(col, pd.NaT)) for col in datetime_cols}
+            self.rollups = rollups
+            self._store_results(columns, summary, correlation, categorical, time_ranges)
+            print("数据分析完成")
+
+        except Exception as e:
+            self.issues.append(f"分析过程中出错: {str(e)}")
+            print(f"分析错误: {str(e)}")
+
+        finally:
+            spill.cleanup()
+
+    def _analyze_sketches(self, chunks, engine=None):
+        try:
+            engine = engine or StatsEngine()
+            for chunk in chunks:
+                engine.update(chunk)
+            self.engine = engine
+
+            if engine.columns is None:
+                self.issues.append("分析失败: 数据未加载或为空")
+                return
+
+            summary = {col: self._describe_series(engine.summary_stats(col), col, engine.numeric_cols,
+                                                  engine.datetime_cols)
+                       for col in engine.columns}
+            categorical = {col: (*engine.categorical_stats(col), True) for col in engine.categorical_cols}
+            time_ranges = {col: engine.time_range(col) for col in engine.datetime_cols}
+            self.rollups = engine.rollups
+            correlation = engine.correlation()
+            if correlation is not None:
+                correlation = Correlation(correlation.columns, correlation.to_numpy(), self._streaming_corr_method())
+            self._store_results(engine.columns, summary, correlation, categorical, time_ranges)
+
+            bounds = engine.error_bounds()
+            self.analysis['accuracy'] = {
+                'mode': 'approx',
+                'confidence': 0.99,
+                'quantile_rank_error': round(float(bounds['quantile_rank_error']), 4),
+                'distinct_relative_error': round(float(bounds['distinct_relative_error']), 4),
+                'top_values_max_error': bounds['top_values_max_error']
+            }
+            print("数据分析完成（近似统计）")
+
+        except Exception as e:
+            self.issues.append(f"分析过程中出错: {str(e)}")
+            print(f"分析错误: {str(e)}")
+
+    def _streaming_corr_method(self):
+        """Spearman 需要整列的秩，数据块上累计的协矩只能得到 Pearson 相关"""
+        if self.corr_method != 'pearson':
+            self.issues.append("流式/近似统计模式只支持 Pearson 相关系数，已使用 Pearson")
+        return 'pearson'
+
+    @staticmethod
+    def _describe_series(stats, col, numeric_cols, datetime_cols):
+        """按列类型把统计量补齐为 describe 的统计项，缺失项为 NaN"""
+        if col in numeric_cols:
+            return pd.Series(stats, index=NUMERIC_STATS, dtype='float64')
+        if col in datetime_cols:
+            return pd.Series(stats, index=DATETIME_STATS, dtype=object)
+        return pd.Series(stats, index=CATEGORICAL_STATS, dtype=object)
+
+    def _store_results(self, columns, summary, correlation, categorical, time_ranges):
+        """
+        把各模式计算得到的中间结果整理成 analysis 结构。
+        :param summary: {列名: _describe_series 的结果}
+        :param correlation: Correlation，数值列少于 2 个时为 None
+        """
+        # 1. 基本统计信息：行顺序与 describe(include='all') 相同（按各列统计项个数从少到多依次合并）
+        index = []
+        for stats in sorted(summary.values(), key=len):
+            index.extend(name for name in stats.index if name not in index)
+        summary_df = pd.DataFrame(summary, index=index, columns=columns)
+        self.analysis['summary'] = summary_df.round(2).to_dict()
+
+        # 2. 相关性分析：只保存最强的变量对，完整矩阵留在 self.correlation 中供热力图使用
+        self.correlation = correlation
+        if correlation is not None:
+            self.analysis['correlation'] = correlation.summary()
+
+        # 3. 分类变量分析
+        categorical_report = {}
+        for col, (unique_count, top_values, approx) in categorical.items():
+            categorical_report[col] = {
+                'unique_count': unique_count,
+                'top_values': top_values.astype('int64').to_dict(),
+                'approx': approx       #高基数列（或近似模式）的唯一值个数与高频值来自草图
+            }
+
+        if categorical_report:
+            self.analysis['categorical'] = categorical_report
+
+        # 4. 时间序列分析：时间范围和各数值列按 日/周/月 的汇总
+        time_report = {}
+        for col, (min_date, max_date) in time_ranges.items():
+            time_report[col] = {
+                'min_date': str(min_date),
+                'max_date': str(max_date),
+                'duration': str(max_date - min_date)
+            }
+            rollup = self.rollups.get(col)
+            if rollup is not None and len(rollup.days):
+                time_report[col]['rollup'] = rollup_table(rollup, TIME_TABLE_MAX_PERIODS, TIME_TABLE_MAX_COLUMNS)
+
+        if time_report:
+            self.analysis['time_series'] = time_report
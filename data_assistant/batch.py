@@ -0,0 +1,140 @@
+#批处理模块
+import os
+import glob
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .loader import SUPPORTED_EXTENSIONS
+from .pipeline import run_pipeline
+from .reporter import ReportGenerator
+from .utils import set_chinese_font
+
+GLOB_CHARS = ('*', '?', '[')
+
+
+def is_batch(inputs):
+    """多个输入、目录或通配符时使用批处理模式；已存在的文件即使名称中含通配符（如 data[1].csv）也按单个文件处理"""
+    if len(inputs) > 1:
+        return True
+    path = inputs[0]
+    if os.path.isfile(path):
+        return False
+    return os.path.isdir(path) or any(char in path for char in GLOB_CHARS)
+
+
+def expand_inputs(inputs):
+    """把文件、目录（递归）和通配符展开为去重后的数据文件列表"""
+    files = []
+    for path in inputs:
+        if os.path.isfile(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        elif any(char in path for char in GLOB_CHARS):
+            files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            files.append(path)
+
+    result = []
+    seen = set()
+    for path in files:
+        key = os.path.abspath(path)
+        if key in seen or not os.path.isfile(path):
+            continue
+        if os.path.splitext(path)[1].lower() in SUPPORTED_EXTENSIONS:
+            seen.add(key)
+            result.append(path)
+    return result
+
+
+def schedule(files):
+    """大文件优先：最耗时的任务先开始，避免批处理末尾只剩一个大文件在运行"""
+    return sorted(files, key=os.path.getsize, reverse=True)
+
+
+def report_name_for(file_path):
+    """批处理中各报告同时生成，按文件名加路径哈希命名，避免同名文件或同一秒内生成的报告互相覆盖"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    digest = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8'), digest_size=4).hexdigest()
+    return f"{stem}_{digest}.html"
+
+
+def _init_worker():
+    """工作进程初始化：进程在整个批处理中复用，绘图库导入和字体设置只进行一次"""
+    import matplotlib
+    matplotlib.use('Agg')
+    set_chinese_font()
+
+
+def process_file(file_path, output_dir, options):
+    """在工作进程中处理单个文件，返回索引中的一条记录；出错时记录错误而不中断整个批处理"""
+    start = time.perf_counter()
+    entry = {
+        'file': file_path,
+        'size_mb': round(os.path.getsize(file_path) / 1024 / 1024, 2),
+        'status': 'failed',
+        'report': None
+    }
+    try:
+        report_path, report_data = run_pipeline(file_path, output_dir, options, report_name_for(file_path))
+        if report_path:
+            entry.update({
+                'status': 'ok',
+                'report': os.path.relpath(report_path, output_dir),
+                'original_shape': list(report_data['file_info'].get('original_shape', ())),
+                'final_shape': list(report_data['cleaning'].get('final_shape', ())),
+                'charts': len(report_data['visualizations']),
+                'issues': report_data['issues']
+            })
+        else:
+            entry['error'] = "数据加载失败"
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def run_batch(inputs, output_dir, options, jobs=None):
+    """
+    批处理：在进程池中并行处理多个文件，并生成汇总所有报告的索引页（index.html / index.json）。
+    :param options: 命令行参数，原样传给 run_pipeline
+    :param jobs: 工作进程数，默认为CPU核数
+    :return: 索引页路径
+    """
+    files = schedule(expand_inputs(inputs))
+    if not files:
+        print("未找到可处理的数据文件 (CSV 或 Excel)")
+        return None
+
+    # 文件之间已经并行，未指定时每个文件内部不再启动绘图进程池，也不再按列并行
+    options = argparse.Namespace(**vars(options))
+    if options.chart_jobs is None:
+        options.chart_jobs = 1
+    if options.column_jobs is None:
+        options.column_jobs = 1
+
+    jobs = max(min(jobs or os.cpu_count() or 1, len(files)), 1)
+    print(f"批处理: {len(files)} 个文件, {jobs} 个进程")
+
+    start = time.perf_counter()
+    entries = []
+    initializer = None if options.no_charts else _init_worker
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as executor:
+        # 按文件大小从大到小提交，进程池按提交顺序取任务
+        futures = {executor.submit(process_file, path, output_dir, options): path for path in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            entries.append(entry)
+            mark = '✓' if entry['status'] == 'ok' else '✗'
+            print(f"[{done}/{len(files)}] {mark} {entry['file']} ({entry['seconds']} 秒)")
+
+    # 索引按输入顺序（大文件在前）排列，与完成顺序无关
+    order = {path: i for i, path in enumerate(files)}
+    entries.sort(key=lambda entry: order[entry['file']])
+
+    failed = sum(entry['status'] != 'ok' for entry in entries)
+    index_path = ReportGenerator(output_dir).generate_index(entries, round(time.perf_counter() - start, 3))
+    print(f"\n✅ 批处理完成: 成功 {len(entries) - failed} 个, 失败 {failed} 个。索引已保存至: {index_path}")
+    return index_path
@@ -0,0 +1,109 @@
+#解析结果缓存模块
+import os
+import hashlib
+import importlib.util
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'data_assistant')
+DEFAULT_CACHE_SIZE_MB = 2048
+DEFAULT_STATE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'state')
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(file_path, options=None):
+    """
+    由路径、大小、修改时间、文件内容哈希和解析选项生成缓存键。
+    内容哈希（blake2b）按块读取，远快于文本解析。
+    """
+    stat = os.stat(file_path)
+    content = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            content.update(block)
+
+    key = hashlib.blake2b(digest_size=16)
+    for part in (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, content.hexdigest(),
+                 sorted((options or {}).items())):
+        key.update(repr(part).encode('utf-8'))
+    return key.hexdigest()
+
+
+class DataCache:
+    """
+    以 Arrow IPC (Feather v2) 文件缓存解析后的 DataFrame。
+    读取时通过内存映射打开，不复制文件内容；总大小超过上限时按最近使用时间（文件 mtime）淘汰。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 ** 2
+        self.issues = []
+
+    @property
+    def available(self):
+        return HAS_PYARROW
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+
+    def load(self, key):
+        """命中时返回 DataFrame，否则返回 None"""
+        path = self._path(key)
+        if not self.available or not os.path.exists(path):
+            return None
+
+        import pyarrow as pa
+
+        try:
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            # 更新 mtime 作为最近使用时间
+            os.utime(path)
+            return table.to_pandas(split_blocks=True)
+        except Exception as e:
+            self.issues.append(f"读取缓存失败，将重新解析: {str(e)}")
+            return None
+
+    def store(self, key, df):
+        if not self.available:
+            self.issues.append("未安装 pyarrow，无法写入解析缓存")
+            return False
+
+        import pyarrow as pa
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.issues.append(f"写入解析缓存失败: {str(e)}")
+            return False
+
+        self.evict(keep=path)
+        return True
+
+    def evict(self, keep=None):
+        """按最近使用时间从旧到新删除缓存文件，直到总大小不超过上限"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.arrow'):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
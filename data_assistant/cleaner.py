@@ -1,130 +1,573 @@
-#数据清洗模块
-import pandas as pd
-import numpy as np
-from .utils import standardize_column_names
-
-class DataCleaner:
-    def __init__(self, df):
-        self.df = df                                        #存储传入的 DataFrame，这是需要清洗的数据
-        self.cleaning = {'steps': [], 'rows_removed': 0}    #一个字典，用于记录清洗过程中的信息，包括执行的步骤（steps）和移除的行数（rows_removed）
-        self.issues = []                                    #一个列表，用于记录清洗过程中遇到的问题
-
-    def clean_data(self):
-        """
-        这是执行数据清洗的主要方法。
-        :return:
-        """
-        #首先检查传入的 DataFrame 是否为空或未加载，如果是，则将问题记录到 issues 列表中，并返回原始的 DataFrame，因为没有数据可以清洗
-        if self.df is None or self.df.empty:
-            self.issues.append("清洗失败: 数据未加载或为空")
-            return self.df
-        #记录原始 DataFrame 的行数，这将在后续步骤中用于计算移除的行数
-        original_count = len(self.df)
-
-        try:
-            # 1. 处理列名
-            self.df.columns = standardize_column_names(self.df)
-            self.cleaning['steps'].append("标准化列名")#将 "标准化列名" 这一步骤记录到 cleaning 字典的 steps 列表中
-
-            # 2. 删除完全空值的行
-            self.df.dropna(how='all', inplace=True)
-            '''
-            使用 dropna 方法删除 DataFrame 中完全为空值的行（即所有列都是空值的行），
-            how='all' 参数表示只有当一行的所有列都是空值时才删除该行，
-            inplace=True 表示直接在原 DataFrame 上进行修改。
-            '''
-            self.cleaning['steps'].append("删除完全空值的行")
-            # 3. 删除重复行
-            duplicates = self.df.duplicated().sum()
-            '''
-            duplicated() 方法返回一个布尔 Series，表示每行是否重复，
-            sum() 方法计算重复行的数量。
-            '''
-            if duplicates > 0:
-                self.df.drop_duplicates(inplace=True)
-                self.cleaning['steps'].append(f"删除 {duplicates} 个重复行")
-
-            # 4. 处理缺失值
-            missing_report = {}#初始化一个空字典 missing_report 用于记录缺失值处理信息。
-            for col in self.df.columns:
-                missing_count = self.df[col].isnull().sum()
-                if missing_count > 0:
-                    # 数值列用中位数填充
-                    if pd.api.types.is_numeric_dtype(self.df[col]):
-                        '''
-                        如果该列是数值类型（使用 pd.api.types.is_numeric_dtype 检查），
-                        则计算该列的中位数（median_val），并使用中位数填充缺失值（fillna 方法）
-                        '''
-                        median_val = self.df[col].median()
-                        self.df[col].fillna(median_val, inplace=True)
-                        missing_report[col] = f"填充中位数: {median_val:.2f} ({missing_count} 个缺失值)"
-                    # 分类列用众数填充
-                    else:
-                        '''
-                        如果该列不是数值类型（即分类列），则计算该列的众数（mode_val），并使用众数填充缺失值
-                        '''
-                        mode_val = self.df[col].mode()[0]
-                        self.df[col].fillna(mode_val, inplace=True)
-                        missing_report[col] = f"填充众数: '{mode_val}' ({missing_count} 个缺失值)"
-            '''
-            如果 missing_report 字典不为空（即存在缺失值并已处理），
-            则将 "处理缺失值" 这一步骤记录到 steps 列表中，
-            并将 missing_report 字典添加到 cleaning 字典中，以便后续查看缺失值处理的详细信息
-            '''
-            if missing_report:
-                self.cleaning['steps'].append("处理缺失值")
-                self.cleaning['missing_report'] = missing_report
-
-            # 5. 处理异常值 (使用IQR方法)
-            numeric_cols = self.df.select_dtypes(include=np.number).columns
-            #获取 DataFrame 中所有数值类型的列（numeric_cols），使用 select_dtypes 方法并指定 include=np.number 参数来选择数值列
-            outlier_report = {}#初始化一个空字典 outlier_report 用于记录异常值处理信息
-
-            for col in numeric_cols:
-                q1 = self.df[col].quantile(0.25)
-                q3 = self.df[col].quantile(0.75)
-                iqr = q3 - q1
-                '''
-                根据 IQR 方法计算异常值的下界（lower_bound）和上界（upper_bound），
-                公式分别为 q1 - 1.5 * iqr 和 q3 + 1.5 * iqr
-                '''
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-
-                outliers = self.df[(self.df[col] < lower_bound) | (self.df[col] > upper_bound)]
-
-                if not outliers.empty:
-                    # 用边界值替换异常值
-                    self.df[col] = np.where(self.df[col] < lower_bound, lower_bound,
-                                            np.where(self.df[col] > upper_bound, upper_bound, self.df[col]))
-                    # 将该列的异常值处理信息（包括上下界和异常值数量）记录到 outlier_report 字典中
-                    outlier_report[col] = {
-                        'lower_bound': lower_bound,
-                        'upper_bound': upper_bound,
-                        'outliers_count': len(outliers)
-                    }
-
-            if outlier_report:
-                self.cleaning['steps'].append("处理异常值")
-                self.cleaning['outlier_report'] = outlier_report
-
-            # 6. 数据类型转换
-            for col in self.df.columns:
-                # 尝试转换为日期类型
-                if 'date' in col or 'time' in col:
-                    try:
-                        self.df[col] = pd.to_datetime(self.df[col], errors='coerce')
-                        self.cleaning['steps'].append(f"转换 '{col}' 列为日期类型")
-                    except:
-                        pass
-
-            # 记录清洗结果
-            self.cleaning['rows_removed'] = original_count - len(self.df)
-            self.cleaning['final_shape'] = self.df.shape
-            print(f"数据清洗完成。移除 {self.cleaning['rows_removed']} 行。当前形状: {self.df.shape}")
-
-        except Exception as e:
-            self.issues.append(f"清洗过程中出错: {str(e)}")
-            print(f"清洗错误: {str(e)}")
-
-        return self.df
\ No newline at end of file
+#数据清洗模块
+import pandas as pd
+import numpy as np
+from .utils import standardize_column_names, standardize_name
+from .profile import DataProfile
+from .profiling import Profiler
+from .datetimes import detect_datetime, parse_datetime, describe_spec, ambiguity_issue
+from .streaming import (ChunkStore, ColumnSpill, ReservoirSampler, RowHashSet, PartitionedRowHashSet, SAMPLE_SIZE,
+                        duplicated_mask, row_hashes)
+from .sketches import CategoryCounter
+
+
+def assign_where(df, col, rows, value):
+    """
+    把 df[col] 中 rows（行位置数组）处的值原地改为 value：在 Copy-on-Write 下该列没有其他引用时不复制数据。
+    列数据只读时（内存映射读取的解析缓存）改为生成新的列。
+    """
+    if len(rows) == 0:
+        return
+    try:
+        df.iloc[rows, df.columns.get_loc(col)] = value
+    except ValueError:
+        mask = np.zeros(len(df), dtype=bool)
+        mask[rows] = True
+        df[col] = df[col].mask(mask, value)
+
+
+class DataCleaner:
+    def __init__(self, df=None, profile=None, profiler=None, dedup_keys=None, external_dedup=False, column_jobs=None):
+        self.df = df                                        #存储传入的 DataFrame，这是需要清洗的数据
+        self.profile = profile or DataProfile(df, jobs=column_jobs) #与分析、可视化阶段共享的列统计缓存，修改数据后在此标记失效
+        self.executor = self.profile.executor               #按列并行执行逐列计算（ColumnExecutor），写回数据始终在当前线程按列顺序进行
+        self.profiler = profiler or Profiler()              #记录每个清洗步骤的耗时与内存
+        self.cleaning = {'steps': [], 'rows_removed': 0}    #一个字典，用于记录清洗过程中的信息，包括执行的步骤（steps）和移除的行数（rows_removed）
+        self.issues = []                                    #一个列表，用于记录清洗过程中遇到的问题
+        self.sample_df = None                               #流式模式下清洗后数据的抽样，供可视化使用
+        self.state = None                                   #增量模式下保存的清洗状态（列类型、填充值、异常值边界、累计计数等）
+        self.dedup_keys = dedup_keys                        #去重依据的键列（原始或标准化后的列名），为 None 时按整行去重
+        self.external_dedup = external_dedup                #流式模式下把行哈希分桶写入磁盘去重，内存与行数无关
+        self._keys = None                                   #解析后的键列（标准化列名）
+        self.date_specs = {}                                #按内容识别出的日期列及其解析规格（格式或时间戳单位），各块复用
+
+    def clean_data(self):
+        """
+        这是执行数据清洗的主要方法。
+        :return:
+        """
+        #首先检查传入的 DataFrame 是否为空或未加载，如果是，则将问题记录到 issues 列表中，并返回原始的 DataFrame，因为没有数据可以清洗
+        if self.df is None or self.df.empty:
+            self.issues.append("清洗失败: 数据未加载或为空")
+            return self.df
+        #记录原始 DataFrame 的行数，这将在后续步骤中用于计算移除的行数
+        original_count = len(self.df)
+        laps = self.profiler.laps('cleaning')
+
+        try:
+            # 1. 处理列名
+            self.df.columns = standardize_column_names(self.df)
+            self.cleaning['steps'].append("标准化列名")#将 "标准化列名" 这一步骤记录到 cleaning 字典的 steps 列表中
+            laps.mark("标准化列名")
+
+            # 2. 删除完全空值的行
+            # 逐列累积“整行为空”的掩码（不生成整表的布尔矩阵），确定没有空行后提前结束；
+            # 每组列的缺失掩码并行计算，同时存在的掩码不超过并行数列
+            empty = np.ones(len(self.df), dtype=bool)
+            for group in self.executor.groups(self.df.columns):
+                for mask in self.executor.map(lambda col: self.df[col].isna().to_numpy(), group):
+                    empty &= mask
+                if not empty.any():
+                    break
+            self.cleaning['steps'].append("删除完全空值的行")
+            laps.mark("删除完全空值的行")
+            # 3. 删除重复行
+            self._keys = self._resolve_keys(self.df.columns)
+            duplicate_mask = self._duplicate_mask(empty)
+            '''
+            每行只计算一次64位哈希（向量化），得到的布尔掩码表示每行是否与之前的某个非空行重复，
+            同一个掩码既用于计数，也用于删除重复行；空行和重复行合并后只取一次行，没有要删除的行时不复制数据。
+            '''
+            duplicates = int(duplicate_mask.sum())
+            if duplicates > 0:
+                self.cleaning['steps'].append(self._duplicates_step(duplicates))
+            if duplicates > 0 or empty.any():
+                self.df = self.df.take(np.flatnonzero(~(empty | duplicate_mask)))
+
+            # 以上步骤改变了行与列名，之前的统计全部失效
+            self.profile.update(self.df)
+            laps.mark("删除重复行")
+
+            # 4. 识别并转换日期列
+            # 按内容（样本值能否按某个格式或时间戳单位解析）识别，在缺失值和异常值处理之前转换，日期列不会被当作数值截断；
+            # 识别与解析按列并行，解析结果按列顺序写回
+            detected = self.executor.map(lambda col: detect_datetime(self.df[col], col), self.df.columns)
+            specs = {col: spec for col, spec in zip(self.df.columns, detected)
+                     if spec is not None and (spec.get('format') or spec.get('unit'))}
+            converted = []
+            for col, parsed in self.executor.parse_datetimes(self.df, specs).items():
+                if isinstance(parsed, Exception):
+                    self.issues.append(f"列 '{col}' 转换为日期类型失败: {str(parsed)}")
+                    continue
+                self.df[col] = parsed
+                self.date_specs[col] = specs[col]
+                converted.append(col)
+                self.cleaning['steps'].append(f"转换 '{col}' 列为日期类型（{describe_spec(specs[col])}）")
+                if specs[col].get('ambiguous'):
+                    self.issues.append(ambiguity_issue(col, specs[col]))
+            if converted:
+                self.profile.update(self.df, columns=converted)
+            laps.mark("识别并转换日期列")
+
+            # 5. 处理缺失值
+            # 一次性统计所有列的缺失数，并按列类型并行计算中位数（数值列）和众数（分类列）
+            missing_counts = self.profile.missing_counts()
+            missing_cols = missing_counts.index[missing_counts > 0]
+            is_numeric = {col: pd.api.types.is_numeric_dtype(self.df[col]) for col in missing_cols}
+            numeric_missing = [col for col in missing_cols if is_numeric[col]]
+            other_missing = [col for col in missing_cols if not is_numeric[col]]
+            medians = dict(zip(numeric_missing, self.executor.map(lambda col: self.df[col].median(), numeric_missing)))
+            # 众数来自共享的计数结果（category 列为整数编码的 bincount），分析和可视化阶段复用
+            modes = {col: counter.mode() for col, counter in self.profile.category_counters(other_missing).items()}
+
+            missing_report = {}#初始化一个空字典 missing_report 用于记录缺失值处理信息。
+            fill_values = {}
+            for col in missing_cols:
+                missing_count = missing_counts[col]
+                if is_numeric[col]:
+                    # 数值列用中位数填充
+                    fill_values[col] = medians[col]
+                    missing_report[col] = f"填充中位数: {medians[col]:.2f} ({missing_count} 个缺失值)"
+                else:
+                    # 分类列用众数填充
+                    fill_values[col] = modes[col]
+                    missing_report[col] = f"填充众数: '{modes[col]}' ({missing_count} 个缺失值)"
+            if fill_values:
+                # 按缺失值位置原地写入填充值，只修改缺失的位置，不生成新的列；各组列的缺失位置并行计算
+                fill_cols = [col for col, value in fill_values.items() if not pd.isna(value)]
+                for group in self.executor.groups(fill_cols):
+                    positions = self.executor.map(lambda col: np.flatnonzero(self.df[col].isna().to_numpy()), group)
+                    for col, rows in zip(group, positions):
+                        value = fill_values[col]
+                        if is_numeric[col] and pd.api.types.is_float_dtype(self.df[col]):
+                            value = self.df[col].dtype.type(value)   # 保持列类型（如 float32）
+                        assign_where(self.df, col, rows, value)
+                # 填充只改变众数的计数，直接更新已有的计数结果，分析阶段不必重新计数
+                for col in other_missing:
+                    if not pd.isna(modes[col]):
+                        self.profile.category_counts(col).add(modes[col], int(missing_counts[col]))
+                self.profile.update(self.df, columns=list(fill_values), keep=('category_counts',))
+            '''
+            如果 missing_report 字典不为空（即存在缺失值并已处理），
+            则将 "处理缺失值" 这一步骤记录到 steps 列表中，
+            并将 missing_report 字典添加到 cleaning 字典中，以便后续查看缺失值处理的详细信息
+            '''
+            if missing_report:
+                self.cleaning['steps'].append("处理缺失值")
+                self.cleaning['missing_report'] = missing_report
+            laps.mark("处理缺失值")
+
+            # 6. 处理异常值 (使用IQR方法)
+            numeric_cols = self.profile.numeric_cols
+            #获取 DataFrame 中所有数值类型的列（numeric_cols），由共享的 profile 缓存 select_dtypes 的结果
+            outlier_report = {}#初始化一个空字典 outlier_report 用于记录异常值处理信息
+
+            if len(numeric_cols) > 0:
+                # 一次计算所有数值列的四分位数（连同中位数缓存在 profile 中，未截断的列在分析阶段直接复用）
+                quartiles = self.profile.quantiles(numeric_cols)
+                iqr = quartiles.loc[0.75] - quartiles.loc[0.25]
+                '''
+                根据 IQR 方法计算异常值的下界（lower_bound）和上界（upper_bound），
+                公式分别为 q1 - 1.5 * iqr 和 q3 + 1.5 * iqr
+                '''
+                lower_bounds = quartiles.loc[0.25] - 1.5 * iqr
+                upper_bounds = quartiles.loc[0.75] + 1.5 * iqr
+                # 逐列比较边界：同一对位置数组既用于计数，也用于把超出边界的值原地替换为边界值；
+                # 各组列的比较并行进行，替换在当前线程按列顺序进行
+                # （不保留列的 Series 引用，否则 Copy-on-Write 会在原地修改前复制该列）
+                def locate(col):
+                    below = self.df[col].lt(lower_bounds[col]).to_numpy(dtype=bool, na_value=False)
+                    above = self.df[col].gt(upper_bounds[col]).to_numpy(dtype=bool, na_value=False)
+                    return np.flatnonzero(below), np.flatnonzero(above)
+
+                for group in self.executor.groups(numeric_cols):
+                    for col, (below, above) in zip(group, self.executor.map(locate, group)):
+                        outliers_count = len(below) + len(above)
+                        if outliers_count > 0:
+                            # 将该列的异常值处理信息（包括上下界和异常值数量）记录到 outlier_report 字典中
+                            outlier_report[col] = {
+                                'lower_bound': lower_bounds[col],
+                                'upper_bound': upper_bounds[col],
+                                'outliers_count': outliers_count
+                            }
+                            self._clip_column(col, below, above, lower_bounds[col], upper_bounds[col])
+                self.profile.update(self.df, columns=list(outlier_report))
+
+            if outlier_report:
+                self.cleaning['steps'].append("处理异常值")
+                self.cleaning['outlier_report'] = outlier_report
+            laps.mark("处理异常值")
+
+            # 记录清洗结果
+            self.cleaning['rows_removed'] = original_count - len(self.df)
+            self.cleaning['final_shape'] = self.df.shape
+            print(f"数据清洗完成。移除 {self.cleaning['rows_removed']} 行。当前形状: {self.df.shape}")
+
+        except Exception as e:
+            self.issues.append(f"清洗过程中出错: {str(e)}")
+            print(f"清洗错误: {str(e)}")
+
+        finally:
+            laps.close()
+
+        return self.df
+
+    def clean_chunks(self, chunks, sample_size=SAMPLE_SIZE, keep_state=False):
+        """
+        流式清洗：对数据块做两遍处理，清洗结果与 clean_data 一致，内存占用与文件大小无关。
+        第一遍：标准化列名、删除空行与重复行、按首个非空块识别的格式转换日期列，
+        累计缺失值计数、数值列取值（暂存磁盘）和分类列计数；
+        第二遍：用全局中位数/众数填充、按全局IQR边界截断。
+        峰值内存约为一个数据块；分位数在暂存文件上按块外存选择，不读回整列。
+        :param chunks: DataFrame 块的迭代器（如 DataLoader.chunks）
+        :param keep_state: 为 True 时把清洗状态保存到 self.state，供之后的 clean_increment 使用
+        :return: 暂存清洗后数据块的 ChunkStore，用完需调用 cleanup()
+        """
+        raw_store = ChunkStore()
+        spill = ColumnSpill()
+        cleaned_store = ChunkStore()
+        sampler = ReservoirSampler(sample_size)
+        # 增量状态需要在后续运行中继续查询已出现的行，因此只在不保存状态时使用外部去重
+        seen = PartitionedRowHashSet() if self.external_dedup and not keep_state else RowHashSet()
+        laps = self.profiler.laps('cleaning')
+
+        try:
+            # 第一遍：结构性清洗 + 统计量累计
+            kinds = {}
+            columns = None
+            missing = None
+            counters = {}
+            original_count = 0
+            non_empty_count = 0
+
+            def conformed_chunks():
+                nonlocal columns, kinds, missing, original_count, non_empty_count
+                for chunk in chunks:
+                    original_count += len(chunk)
+                    chunk.columns = standardize_column_names(chunk)
+                    if columns is None:
+                        columns = list(chunk.columns)
+                        kinds = dict.fromkeys(columns)
+                        missing = pd.Series(0, index=columns)
+                        self._keys = self._resolve_keys(columns)
+
+                    chunk = chunk.dropna(how='all')
+                    non_empty_count += len(chunk)
+                    yield self._conform_chunk(chunk, kinds)
+
+            for chunk in self._deduplicate_chunks(conformed_chunks(), seen):
+                missing += chunk.isnull().sum()
+                for col in columns:
+                    if kinds[col] == 'numeric':
+                        spill.append(col, chunk[col].dropna().to_numpy())
+                    elif kinds[col] in ('other', 'datetime'):
+                        counters.setdefault(col, CategoryCounter()).update(chunk[col])
+                raw_store.append(chunk)
+
+            laps.mark("第一遍: 解析、去重与统计")
+            if columns is None:
+                self.issues.append("清洗失败: 数据未加载或为空")
+                return cleaned_store
+            # 全为空值的列与内存模式一样按 float64 数值列处理
+            kinds = {col: kind or 'numeric' for col, kind in kinds.items()}
+
+            self.cleaning['steps'].append("标准化列名")
+            self.cleaning['steps'].append("删除完全空值的行")
+            duplicates = non_empty_count - len(seen)
+            if duplicates > 0:
+                self.cleaning['steps'].append(self._duplicates_step(duplicates))
+            self.cleaning['steps'].extend(self._date_steps())
+
+            # 由全局统计量确定填充值与异常值边界
+            missing_report = {}
+            fill_values = {}
+            for col in columns:
+                missing_count = int(missing[col])
+                if missing_count > 0:
+                    if kinds[col] == 'numeric':
+                        median_val = spill.median(col)
+                        fill_values[col] = median_val
+                        missing_report[col] = f"填充中位数: {median_val:.2f} ({missing_count} 个缺失值)"
+                    elif kinds[col] in ('other', 'datetime'):
+                        mode_val = counters[col].mode() if col in counters else np.nan
+                        fill_values[col] = mode_val
+                        missing_report[col] = f"填充众数: '{mode_val}' ({missing_count} 个缺失值)"
+            if missing_report:
+                self.cleaning['steps'].append("处理缺失值")
+                self.cleaning['missing_report'] = missing_report
+            laps.mark("计算填充值")
+
+            # 增量模式需要每列的填充值和边界（不只是本次有缺失值或异常值的列）
+            state_fill_values = dict(fill_values)
+            bounds = {}
+            outlier_counts = {}
+            outlier_report = {}
+            for col in columns:
+                if kinds[col] != 'numeric':
+                    if keep_state and col not in state_fill_values and col in counters and counters[col].distinct:
+                        state_fill_values[col] = counters[col].mode()
+                    continue
+                if keep_state and col not in state_fill_values and spill.count(col):
+                    state_fill_values[col] = spill.median(col)
+                # 填充值按个数计入分位数和异常值计数，不展开为数组
+                fill = (fill_values[col], int(missing[col])) if col in fill_values else None
+                if spill.count(col) + (fill[1] if fill else 0) == 0:
+                    continue
+                q1, q3 = spill.quantiles(col, [0.25, 0.75], fill)
+                iqr = q3 - q1
+                lower_bound = q1 - 1.5 * iqr
+                upper_bound = q3 + 1.5 * iqr
+                outliers_count = spill.count_outside(col, lower_bound, upper_bound)
+                if fill and (fill[0] < lower_bound or fill[0] > upper_bound):
+                    outliers_count += fill[1]
+                bounds[col] = (lower_bound, upper_bound)
+                outlier_counts[col] = outliers_count
+                if outliers_count > 0:
+                    outlier_report[col] = {
+                        'lower_bound': lower_bound,
+                        'upper_bound': upper_bound,
+                        'outliers_count': outliers_count
+                    }
+            spill.cleanup()
+
+            if outlier_report:
+                self.cleaning['steps'].append("处理异常值")
+                self.cleaning['outlier_report'] = outlier_report
+            laps.mark("计算异常值边界")
+
+            # 第二遍：应用填充与截断
+            final_count = 0
+            for chunk in raw_store:
+                if fill_values:
+                    chunk = chunk.fillna(fill_values)
+                chunk = self._clip_outliers(chunk, outlier_report)
+                final_count += len(chunk)
+                sampler.update(chunk)
+                cleaned_store.append(chunk)
+
+            laps.mark("第二遍: 填充与截断")
+            self.sample_df = sampler.sample
+            self.cleaning['rows_removed'] = original_count - final_count
+            self.cleaning['final_shape'] = (final_count, len(columns))
+            print(f"数据清洗完成。移除 {self.cleaning['rows_removed']} 行。当前形状: {self.cleaning['final_shape']}")
+
+            if keep_state:
+                self.state = {
+                    'columns': columns,
+                    'kinds': kinds,
+                    'date_specs': self.date_specs,
+                    'fill_values': state_fill_values,
+                    'bounds': bounds,
+                    'original_count': original_count,
+                    'non_empty_count': non_empty_count,
+                    'final_count': final_count,
+                    'missing': missing,
+                    'outlier_counts': pd.Series(outlier_counts, index=list(bounds), dtype='int64'),
+                    'seen': seen,
+                    'dedup_keys': self._keys,
+                    'sampler': sampler
+                }
+
+        except Exception as e:
+            self.issues.append(f"清洗过程中出错: {str(e)}")
+            print(f"清洗错误: {str(e)}")
+
+        finally:
+            laps.close()
+            raw_store.cleanup()
+            spill.cleanup()
+            if isinstance(seen, PartitionedRowHashSet):
+                seen.cleanup()
+
+        return cleaned_store
+
+    def clean_increment(self, chunks, state):
+        """
+        增量清洗：只处理新追加的数据块。沿用 state 中的列类型、填充值和异常值边界，
+        与此前所有行一起去重（state 中的行哈希），并更新累计计数；cleaning 按累计结果生成。
+        :param chunks: 新增部分的 DataFrame 块（列名已与 state['columns'] 一致）
+        :param state: clean_chunks(keep_state=True) 或上一次 clean_increment 得到的 self.state
+        :return: 暂存清洗后新增数据块的 ChunkStore，用完需调用 cleanup()
+        """
+        cleaned_store = ChunkStore()
+        try:
+            kinds = state['kinds']
+            self._keys = state.get('dedup_keys')
+            self.date_specs = state['date_specs']
+            fill_values = {col: value for col, value in state['fill_values'].items() if pd.notna(value)}
+            bound_cols = list(state['bounds'])
+            lower = pd.Series({col: bound[0] for col, bound in state['bounds'].items()}, dtype='float64')
+            upper = pd.Series({col: bound[1] for col, bound in state['bounds'].items()}, dtype='float64')
+
+            for chunk in chunks:
+                state['original_count'] += len(chunk)
+                chunk = chunk.dropna(how='all')
+                if chunk.empty:
+                    continue
+                state['non_empty_count'] += len(chunk)
+                chunk = self._conform_chunk(chunk, kinds)
+                chunk = chunk[state['seen'].first_occurrence_mask(self._key_frame(chunk))]
+
+                state['missing'] += chunk.isnull().sum()
+                chunk = chunk.fillna(fill_values)
+                if bound_cols:
+                    state['outlier_counts'] += self._count_outliers(chunk[bound_cols], lower, upper)
+                clipped = state['outlier_counts'][state['outlier_counts'] > 0].index
+                chunk = self._clip_outliers(chunk, {col: {'lower_bound': lower[col], 'upper_bound': upper[col]}
+                                                    for col in clipped})
+
+                state['final_count'] += len(chunk)
+                state['sampler'].update(chunk)
+                cleaned_store.append(chunk)
+
+            self._report_from_state(state)
+            self.sample_df = state['sampler'].sample
+            self.state = state
+            print(f"增量清洗完成。移除 {self.cleaning['rows_removed']} 行。当前形状: {self.cleaning['final_shape']}")
+
+        except Exception as e:
+            self.issues.append(f"清洗过程中出错: {str(e)}")
+            print(f"清洗错误: {str(e)}")
+
+        return cleaned_store
+
+    def _report_from_state(self, state):
+        """由累计计数生成与 clean_chunks 相同结构的 cleaning"""
+        self.cleaning['steps'] = ["标准化列名", "删除完全空值的行"]
+        duplicates = state['non_empty_count'] - len(state['seen'])
+        if duplicates > 0:
+            self.cleaning['steps'].append(self._duplicates_step(duplicates))
+        self.cleaning['steps'].extend(self._date_steps())
+
+        missing_report = {}
+        for col in state['columns']:
+            missing_count = int(state['missing'][col])
+            if missing_count > 0:
+                fill_value = state['fill_values'].get(col, np.nan)
+                if state['kinds'][col] == 'numeric':
+                    missing_report[col] = f"填充中位数: {fill_value:.2f} ({missing_count} 个缺失值)"
+                else:
+                    missing_report[col] = f"填充众数: '{fill_value}' ({missing_count} 个缺失值)"
+        if missing_report:
+            self.cleaning['steps'].append("处理缺失值")
+            self.cleaning['missing_report'] = missing_report
+
+        outlier_report = {}
+        for col, (lower_bound, upper_bound) in state['bounds'].items():
+            outliers_count = int(state['outlier_counts'][col])
+            if outliers_count > 0:
+                outlier_report[col] = {
+                    'lower_bound': lower_bound,
+                    'upper_bound': upper_bound,
+                    'outliers_count': outliers_count
+                }
+        if outlier_report:
+            self.cleaning['steps'].append("处理异常值")
+            self.cleaning['outlier_report'] = outlier_report
+
+        self.cleaning['rows_removed'] = state['original_count'] - state['final_count']
+        self.cleaning['final_shape'] = (state['final_count'], len(state['columns']))
+
+    @staticmethod
+    def _count_outliers(values, lower_bounds, upper_bounds):
+        """逐列统计落在 [lower, upper] 之外的值的个数，只生成布尔掩码而不复制数据"""
+        return (values.lt(lower_bounds, axis=1) | values.gt(upper_bounds, axis=1)).sum()
+
+    def _clip_column(self, col, below, above, lower, upper):
+        """把一列中 below/above 位置处的值原地替换为边界值（结果为 float64，与 _clip_outliers 相同）"""
+        if self.df[col].dtype != np.float64:
+            self.df[col] = self.df[col].astype(np.float64)
+        assign_where(self.df, col, below, lower)
+        assign_where(self.df, col, above, upper)
+
+    @staticmethod
+    def _clip_outliers(df, outlier_report):
+        """把 outlier_report 中各列的值截断到对应边界，与逐列 np.where 替换的结果相同（结果为 float64）"""
+        if not outlier_report:
+            return df
+        cols = list(outlier_report)
+        lower = pd.Series({col: info['lower_bound'] for col, info in outlier_report.items()})
+        upper = pd.Series({col: info['upper_bound'] for col, info in outlier_report.items()})
+        df[cols] = df[cols].astype(np.float64).clip(lower, upper, axis=1)
+        return df
+
+    def _resolve_keys(self, columns):
+        """把 dedup_keys 解析为标准化后的列名；有不存在的列时记录问题并按整行去重"""
+        if not self.dedup_keys:
+            return None
+        keys = [key if key in columns else standardize_name(key) for key in self.dedup_keys]
+        unknown = [key for key, resolved in zip(self.dedup_keys, keys) if resolved not in columns]
+        if unknown:
+            self.issues.append(f"去重键列不存在: {', '.join(unknown)}，按整行去重")
+            return None
+        return list(dict.fromkeys(keys))
+
+    def _key_frame(self, df):
+        return df[self._keys] if self._keys else df
+
+    def _duplicate_mask(self, empty):
+        """与先删除空行再 duplicated() 相同的重复行掩码：只在非空行之间比较，空行的位置为 False"""
+        if not empty.any():
+            return duplicated_mask(self._key_frame(self.df), self.executor)
+        hashes = row_hashes(self._key_frame(self.df), self.executor)
+        mask = np.zeros(len(hashes), dtype=bool)
+        mask[~empty] = pd.Series(hashes[~empty]).duplicated().to_numpy()
+        return mask
+
+    def _duplicates_step(self, duplicates):
+        if self._keys:
+            return f"删除 {duplicates} 个重复行（按键列 {', '.join(self._keys)}）"
+        return f"删除 {duplicates} 个重复行"
+
+    def _date_steps(self):
+        return [f"转换 '{col}' 列为日期类型（{describe_spec(spec)}）"
+                for col, spec in self.date_specs.items() if spec.get('format') or spec.get('unit')]
+
+    def _deduplicate_chunks(self, chunks, seen):
+        """
+        按块去重。外部去重时先把所有块的行哈希分桶写盘、块暂存到磁盘，逐桶确定重复行后再依次返回去重后的块。
+        """
+        if not isinstance(seen, PartitionedRowHashSet):
+            for chunk in chunks:
+                yield chunk[seen.first_occurrence_mask(self._key_frame(chunk))]
+            return
+
+        staged = ChunkStore(prefix='da_dedup_chunks_')
+        try:
+            for chunk in chunks:
+                seen.add(self._key_frame(chunk))
+                staged.append(chunk)
+            seen.finalize()
+            for chunk in staged:
+                yield chunk[seen.first_occurrence_mask(chunk)]
+        finally:
+            staged.cleanup()
+
+    def _conform_chunk(self, chunk, kinds):
+        """
+        各块独立推断类型，可能与之前的块不一致。
+        列类型以首个含非空值的块为准（此时按内容识别日期列并记录解析规格），后续块按该类型强制转换；
+        日期列在每个块中按同一规格解析。
+        """
+        for col in chunk.columns:
+            is_numeric = pd.api.types.is_numeric_dtype(chunk[col])
+            if kinds[col] is None:
+                if not chunk[col].notna().any():
+                    continue
+                spec = detect_datetime(chunk[col], col)
+                if spec is None:
+                    kinds[col] = 'numeric' if is_numeric else 'other'
+                    continue
+                kinds[col] = 'datetime'
+                self.date_specs[col] = spec
+                if spec.get('ambiguous'):
+                    self.issues.append(ambiguity_issue(col, spec))
+            if kinds[col] == 'datetime':
+                chunk[col] = parse_datetime(chunk[col], self.date_specs[col])
+            elif kinds[col] == 'numeric' and not is_numeric:
+                issue = f"列 '{col}' 在部分数据块中含非数值内容，已强制转换为数值"
+                if issue not in self.issues:
+                    self.issues.append(issue)
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+            elif kinds[col] == 'other' and is_numeric:
+                chunk[col] = chunk[col].astype(object)
+        return chunk
@@ -0,0 +1,136 @@
+#相关性模块
+#宽表的相关系数：每列只标准化一次（float32），按行分块累加 Zᵀ·Z 的矩阵乘积（BLAS），每块内存有上限；
+#Spearman 相关先对各列做一次秩变换再按同样方式计算。结果只输出最强的若干变量对，
+#热力图只保留相关性最强的若干列并按层次聚类排序。
+import numpy as np
+import pandas as pd
+
+CORR_METHODS = ('pearson', 'spearman')
+# 每个行块的 float32 数据上限（字节）
+CORR_BLOCK_BYTES = 64 * 1024 * 1024
+# 报告中列出的最强相关变量对个数
+CORR_TOP_PAIRS = 20
+# 热力图最多显示的列数，以及标注系数的列数上限
+HEATMAP_MAX_COLUMNS = 30
+HEATMAP_ANNOT_MAX_COLUMNS = 12
+
+
+def _block_rows(width, arrays):
+    """每块行数：arrays 个 行数 × width 的 float32 数组不超过 CORR_BLOCK_BYTES"""
+    return max(CORR_BLOCK_BYTES // (4 * max(width, 1) * arrays), 1024)
+
+
+def correlation_matrix(df, method='pearson'):
+    """
+    数值列的相关系数矩阵（与 DataFrame.corr 相同：缺失值按成对删除，常数列为 NaN）。
+    :param df: 只含数值列的 DataFrame
+    :return: 列数 × 列数 的 float64 数组
+    """
+    if method == 'spearman':
+        df = df.rank()      # 一次秩变换（平均秩，缺失值保持为 NaN）
+    width = df.shape[1]
+    means = df.mean().to_numpy(dtype=np.float64)
+    stds = df.std().to_numpy(dtype=np.float64, copy=True)
+    constant = ~(stds > 0)
+    stds[constant] = 1.0
+    means = np.nan_to_num(means)
+    has_missing = bool(df.isna().to_numpy().any())
+
+    if not has_missing:
+        # 标准化后 corr = ZᵀZ / (n - 1)
+        total = np.zeros((width, width))
+        step = _block_rows(width, 1)
+        for start in range(0, len(df), step):
+            z = ((df.iloc[start:start + step].to_numpy(dtype=np.float64) - means) / stds).astype(np.float32)
+            total += z.T @ z
+        corr = total / max(len(df) - 1, 1)
+    else:
+        # 成对删除：对每对列只使用两列都有值的行，由 4 个矩阵乘积得到成对的计数、和、平方和与乘积和
+        count = np.zeros((width, width))
+        sums = np.zeros((width, width))
+        squares = np.zeros((width, width))
+        products = np.zeros((width, width))
+        step = _block_rows(width, 3)
+        for start in range(0, len(df), step):
+            x = (df.iloc[start:start + step].to_numpy(dtype=np.float64, na_value=np.nan) - means) / stds
+            present = ~np.isnan(x)
+            mask = present.astype(np.float32)
+            z = np.where(present, x, 0.0).astype(np.float32)
+            count += mask.T @ mask
+            sums += z.T @ mask          #sums[i, j]：列 j 有值的行上列 i 的和
+            squares += (z * z).T @ mask
+            products += z.T @ z
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = products - sums * sums.T / count
+            var = squares - sums ** 2 / count
+            corr = cov / np.sqrt(var * var.T)
+        corr[count < 2] = np.nan
+
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[constant, :] = np.nan
+    corr[:, constant] = np.nan
+    np.fill_diagonal(corr, np.where(constant, np.nan, 1.0))
+    return corr
+
+
+def _cluster_order(matrix):
+    """按 1 - |r| 做平均链接层次聚类，返回叶节点顺序（相关性强的列排在一起）"""
+    similarity = np.nan_to_num(np.abs(matrix))
+    clusters = [[i] for i in range(len(matrix))]
+    while len(clusters) > 1:
+        best, best_pair = -1.0, (0, 1)
+        for a in range(len(clusters)):
+            for b in range(a + 1, len(clusters)):
+                value = similarity[np.ix_(clusters[a], clusters[b])].mean()
+                if value > best:
+                    best, best_pair = value, (a, b)
+        a, b = best_pair
+        clusters[a] = clusters[a] + clusters[b]
+        del clusters[b]
+    return clusters[0] if clusters else []
+
+
+class Correlation:
+    """相关系数矩阵及其摘要（最强变量对、聚类截断后的热力图数据）"""
+
+    def __init__(self, columns, matrix, method='pearson'):
+        self.columns = list(columns)
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.method = method
+
+    @classmethod
+    def from_frame(cls, df, method='pearson'):
+        return cls(df.columns, correlation_matrix(df, method), method)
+
+    def top_pairs(self, k=CORR_TOP_PAIRS):
+        """绝对值最大的 k 对（上三角，不含 NaN），按 |r| 从大到小"""
+        rows, cols = np.triu_indices(len(self.columns), k=1)
+        values = self.matrix[rows, cols]
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) > k:
+            valid = valid[np.argpartition(-np.abs(values[valid]), k - 1)[:k]]
+        valid = valid[np.argsort(-np.abs(values[valid]), kind='stable')]
+        return [(self.columns[rows[i]], self.columns[cols[i]], float(values[i])) for i in valid]
+
+    def heatmap(self, max_columns=HEATMAP_MAX_COLUMNS):
+        """
+        热力图数据：列数超过 max_columns 时只保留与其他列最大 |r| 最高的列，再按层次聚类排序。
+        :return: 以列名为行列索引的 DataFrame
+        """
+        keep = np.arange(len(self.columns))
+        if len(keep) > max_columns:
+            strength = np.nan_to_num(np.abs(self.matrix))
+            np.fill_diagonal(strength, 0.0)
+            keep = np.sort(np.argsort(-strength.max(axis=1), kind='stable')[:max_columns])
+        sub = self.matrix[np.ix_(keep, keep)]
+        order = keep[_cluster_order(sub)]
+        names = [self.columns[i] for i in order]
+        return pd.DataFrame(self.matrix[np.ix_(order, order)], index=names, columns=names)
+
+    def summary(self, k=CORR_TOP_PAIRS):
+        """写入 analysis 的摘要（不含完整矩阵）"""
+        return {
+            'method': self.method,
+            'column_count': len(self.columns),
+            'top_pairs': [{'left': left, 'right': right, 'r': round(r, 4)} for left, right, r in self.top_pairs(k)]
+        }
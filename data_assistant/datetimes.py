@@ -0,0 +1,156 @@
+#日期识别模块
+#按内容识别日期列：对列的样本尝试一组候选格式和时间戳单位，确定后整列按该格式（或单位）一次向量化解析，
+#避免 pandas 在未指定格式时逐个元素推断。
+import re
+import numpy as np
+import pandas as pd
+
+# 每列用于识别格式的样本值个数
+DATE_SAMPLE_SIZE = 200
+# 样本中至少有该比例的值可按某格式解析时，认为该列是日期列
+DATE_MATCH_RATIO = 0.9
+# 候选格式，按常见程度排列；ISO8601 兜底处理带时区、小数秒等变体
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%d.%m.%Y',
+    '%Y%m%d',
+    '%Y年%m月%d日',
+    'ISO8601'
+]
+# 日、月顺序相反的格式对：样本在两种格式下都能解析时（日和月都不超过 12），用整列的取值判断
+DAY_MONTH_SWAPPED = {
+    '%d/%m/%Y': '%m/%d/%Y',
+    '%m/%d/%Y': '%d/%m/%Y',
+    '%d/%m/%Y %H:%M:%S': '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S': '%d/%m/%Y %H:%M:%S'
+}
+# 时间戳单位（每单位的纳秒数）；取值须落在 EPOCH_RANGE 内
+EPOCH_UNITS = {'s': 10 ** 9, 'ms': 10 ** 6, 'us': 10 ** 3, 'ns': 1}
+EPOCH_RANGE = (pd.Timestamp('1990-01-01').value, pd.Timestamp('2100-01-01').value)
+# 数值列只有在列名中含这些词时才按时间戳或 YYYYMMDD 识别，避免把计数、编号等整数列误判为日期
+TIME_NAME_TOKENS = {'date', 'time', 'datetime', 'timestamp', 'epoch', 'created', 'updated'}
+# 这些缩写只有作为整个列名或最后一个词时才算（created_ts 算，ts_count 不算）
+TIME_NAME_SUFFIXES = {'ts', 'dt'}
+
+
+def has_time_name(name):
+    """按单词（而不是子串）判断列名是否表示时间：update_count 不算，created_at 算"""
+    tokens = [token for token in re.split(r'[^a-z0-9]+', str(name).lower()) if token]
+    return bool(TIME_NAME_TOKENS & set(tokens)) or bool(tokens and tokens[-1] in TIME_NAME_SUFFIXES)
+
+
+def _sample(series, size=DATE_SAMPLE_SIZE):
+    """在整列中均匀取非空样本"""
+    values = series.dropna()
+    if len(values) > size:
+        values = values.iloc[np.linspace(0, len(values) - 1, size).astype(np.intp)]
+    return values
+
+
+def detect_datetime(series, name=None):
+    """
+    识别日期列。
+    :return: 解析规格 {'format': 格式} 或 {'unit': 时间戳单位}；已是日期类型时为 {'format': None}；不是日期列时返回 None
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return {'format': None}
+    if pd.api.types.is_bool_dtype(series):
+        return None
+    sample = _sample(series)
+    if sample.empty:
+        return None
+    if pd.api.types.is_numeric_dtype(sample):
+        return _detect_numeric(sample, name)
+
+    values = sample.to_numpy(dtype=object)
+    if not all(isinstance(value, str) for value in values):
+        return None
+    spec = _detect_format(pd.Series(values, dtype=object).str.strip())
+    if spec and spec['format'] in DAY_MONTH_SWAPPED:
+        spec = _resolve_day_month(series, spec['format'])
+    return spec
+
+
+def _resolve_day_month(series, fmt):
+    """
+    样本中的日和月都不超过 12 时，两种顺序都能解析样本；改用整列的不同取值比较，
+    能解析更多取值的顺序（出现了大于 12 的日）胜出；仍然相同时保留 fmt 并标记为有歧义。
+    """
+    swapped = DAY_MONTH_SWAPPED[fmt]
+    values = pd.Series(pd.unique(series.dropna().astype(str).str.strip()), dtype=object)
+    parsed = {candidate: pd.to_datetime(values, format=candidate, errors='coerce').notna().sum()
+              for candidate in (fmt, swapped)}
+    if parsed[fmt] == parsed[swapped]:
+        return {'format': fmt, 'ambiguous': True}
+    return {'format': max(parsed, key=parsed.get)}
+
+
+def _detect_format(sample):
+    # 快速排除：大部分值须以数字开头、长度至少为 6（排除普通文本和单独的年份、编号）
+    if sample.str.match(r'\d').mean() < DATE_MATCH_RATIO or sample.str.len().min() < 6:
+        return None
+    best, best_ratio = None, DATE_MATCH_RATIO
+    for fmt in DATE_FORMATS:
+        ratio = pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+        if ratio > best_ratio or (best is None and ratio >= best_ratio):
+            best, best_ratio = fmt, ratio
+            if ratio == 1:
+                break
+    return {'format': best} if best else None
+
+
+def _detect_numeric(sample, name):
+    if not has_time_name(name):
+        return None
+    values = sample.to_numpy(dtype=np.float64)
+    if not np.array_equal(values, np.round(values)):
+        return None
+    low, high = values.min(), values.max()
+    for unit, scale in EPOCH_UNITS.items():
+        if EPOCH_RANGE[0] / scale <= low and high <= EPOCH_RANGE[1] / scale:
+            return {'unit': unit}
+    # 形如 20240131 的整数日期
+    if 19000101 <= low and high <= 21001231:
+        parsed = pd.to_datetime(sample.astype(np.int64).astype(str), format='%Y%m%d', errors='coerce')
+        if parsed.notna().mean() >= DATE_MATCH_RATIO:
+            return {'format': '%Y%m%d'}
+    return None
+
+
+def parse_datetime(series, spec):
+    """按识别出的规格一次性解析整列，无法解析的值为 NaT"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # 字典编码的列只解析各个类别，再按整数编码展开
+        categories = pd.Index(parse_datetime(pd.Series(series.cat.categories), spec))
+        values = categories.take(series.cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT)
+        return pd.Series(values, index=series.index, name=series.name)
+    if spec.get('unit'):
+        return pd.to_datetime(series, unit=spec['unit'], errors='coerce')
+    if pd.api.types.is_numeric_dtype(series):
+        series = series.astype('Float64').round().astype('Int64').astype('string')
+    return pd.to_datetime(series, format=spec['format'], errors='coerce')
+
+
+def describe_spec(spec):
+    if spec.get('unit'):
+        return f"时间戳，单位 {spec['unit']}"
+    if spec.get('ambiguous'):
+        return f"格式 {spec['format']}，日与月的顺序无法确定"
+    return f"格式 {spec['format']}" if spec.get('format') else "已是日期类型"
+
+
+def ambiguity_issue(col, spec):
+    return f"列 '{col}' 的日期中日和月都不超过 12，无法确定顺序，已按 {spec['format']} 解析"
@@ -0,0 +1,219 @@
+#Excel读取模块
+#以只读流式方式逐行读取工作表（不构建完整的工作簿对象模型），按块把各列直接转换为类型化的 NumPy 数组。
+#安装了 python-calamine 时使用其 Rust 解析器，否则使用 openpyxl 的只读模式。
+import os
+import importlib.util
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+HAS_CALAMINE = importlib.util.find_spec('python_calamine') is not None
+# 每读取这么多行，把行转置为列并转换为类型化数组，行对象随即释放
+EXCEL_BLOCK_ROWS = 50000
+# 命令行 --sheets 中表示全部工作表的值
+ALL_SHEETS = 'all'
+
+_NONE_TYPE = type(None)
+_NUMBER_TYPES = {int, float}
+
+
+def _open_workbook(file_path):
+    """返回 (引擎名, 工作簿)；.xls 且未安装 calamine 时返回 ('xlrd', ExcelFile)"""
+    if HAS_CALAMINE:
+        from python_calamine import CalamineWorkbook
+        return 'calamine', CalamineWorkbook.from_path(file_path)
+    if os.path.splitext(file_path)[1].lower() == '.xls':
+        return 'xlrd', pd.ExcelFile(file_path)
+    import openpyxl
+    return 'openpyxl', openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+
+
+def _close_workbook(engine, workbook):
+    close = getattr(workbook, 'close', None)
+    if close is not None:
+        close()
+
+
+def _workbook_sheet_names(engine, workbook):
+    return list(workbook.sheetnames if engine == 'openpyxl' else workbook.sheet_names)
+
+
+def sheet_names(file_path):
+    engine, workbook = _open_workbook(file_path)
+    try:
+        return _workbook_sheet_names(engine, workbook)
+    finally:
+        _close_workbook(engine, workbook)
+
+
+def resolve_sheets(file_path, requested=None):
+    """
+    把命令行指定的工作表（名称、从0开始的序号或 'all'）解析为工作表名称列表。
+    :param requested: 为空时只处理第一个工作表
+    """
+    names = sheet_names(file_path)
+    if not names:
+        raise ValueError("工作簿中没有工作表")
+    if not requested:
+        return names[:1]
+    if ALL_SHEETS in requested:
+        return names
+
+    resolved = []
+    for item in requested:
+        if item in names:
+            name = item
+        elif item.isdigit() and int(item) < len(names):
+            name = names[int(item)]
+        else:
+            raise ValueError(f"工作表不存在: {item}（可用的工作表: {', '.join(names)}）")
+        if name not in resolved:
+            resolved.append(name)
+    return resolved
+
+
+def _block_array(values):
+    """把一块中某列的值转换为数组：全为数值时为 float64，全为日期时间时为 datetime64，全为缺失时返回 None"""
+    types = set(map(type, values))
+    if str in types and '' in values:
+        # 空字符串按缺失值处理（与 read_excel 一致；calamine 用 '' 表示空单元格）
+        values = [None if value == '' else value for value in values]
+        types = set(map(type, values))
+    has_missing = _NONE_TYPE in types
+    types.discard(_NONE_TYPE)
+    if not types:
+        return None
+    try:
+        if types <= _NUMBER_TYPES:
+            return np.array(values, dtype=np.float64)
+        if types == {datetime}:
+            return np.array(values, dtype='datetime64[ns]')
+        if types == {bool} and not has_missing:
+            return np.array(values, dtype=bool)
+    except (TypeError, ValueError, OverflowError):
+        pass
+    array = np.array(values, dtype=object)
+    if has_missing:
+        array[pd.isna(array)] = np.nan
+    return array
+
+
+class ColumnBuilder:
+    """按块累积一列的类型化数组，最后合并为一个数组；各块类型不一致时合并为 object"""
+
+    def __init__(self, missing=0):
+        self.blocks = []    # [(行数, 数组或 None)]
+        if missing:
+            self.blocks.append((missing, None))
+
+    def append(self, values):
+        self.blocks.append((len(values), _block_array(values)))
+
+    def to_array(self):
+        arrays = [array for _, array in self.blocks if array is not None]
+        dtypes = {array.dtype for array in arrays}
+        if len(dtypes) == 1 and len(arrays) == len(self.blocks):
+            result = np.concatenate(arrays) if len(arrays) > 1 else arrays[0]
+        elif len(dtypes) == 1 and next(iter(dtypes)).kind in 'fM':
+            missing = np.nan if next(iter(dtypes)).kind == 'f' else np.datetime64('NaT')
+            dtype = next(iter(dtypes))
+            result = np.concatenate([array if array is not None else np.full(size, missing, dtype=dtype)
+                                     for size, array in self.blocks])
+        elif not arrays:
+            result = np.full(sum(size for size, _ in self.blocks), np.nan)
+        else:
+            result = np.concatenate([array.astype(object) if array is not None else np.full(size, np.nan, dtype=object)
+                                     for size, array in self.blocks])
+        self.blocks = []
+
+        # 无缺失的整数值浮点列还原为 int64（与 read_excel 一致）
+        if result.dtype == np.float64 and len(result) and not np.isnan(result).any() \
+                and np.array_equal(result, np.round(result)) and np.abs(result).max() < 2 ** 53:
+            result = result.astype(np.int64)
+        return result
+
+
+def _unique_names(header):
+    """表头转为列名：空表头为 'Unnamed: i'，重复列名加 '.1'、'.2' 后缀（与 read_excel 一致）"""
+    names, seen = [], {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None or value == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _iter_rows(engine, workbook, sheet):
+    if engine == 'calamine':
+        return workbook.get_sheet_by_name(sheet).iter_rows()
+    return workbook[sheet].iter_rows(values_only=True)
+
+
+def frame_from_rows(rows, block_rows=EXCEL_BLOCK_ROWS):
+    """由行迭代器（第一行为表头）构建 DataFrame，行只在内存中保留一块"""
+    rows = iter(rows)
+    header = list(next(rows, ()))
+    # openpyxl 按工作表尺寸把每行补齐，去掉表头末尾的空单元格
+    while header and (header[-1] is None or header[-1] == ''):
+        header.pop()
+    width = len(header)
+    builders = [ColumnBuilder() for _ in range(width)]
+    count = 0
+    block = []
+
+    def flush():
+        nonlocal block
+        for builder, values in zip(builders, zip(*block)):
+            builder.append(values)
+        block = []
+
+    for row in rows:
+        row = tuple(row)
+        if len(row) != width:
+            if len(row) > width and any(value is not None and value != '' for value in row[width:]):
+                # 表头之外的列有数据：增加未命名列，此前的行在该列为缺失值
+                flush()
+                extra = len(row) - width
+                builders.extend(ColumnBuilder(missing=count) for _ in range(extra))
+                header.extend([None] * extra)
+                width = len(row)
+            else:
+                row = row[:width] + (None,) * (width - len(row))
+        block.append(row)
+        count += 1
+        if len(block) >= block_rows:
+            flush()
+    if block:
+        flush()
+
+    names = _unique_names(header)
+    df = pd.DataFrame({name: builder.to_array() for name, builder in zip(names, builders)}, copy=False)
+
+    # 去掉末尾的空行（与 read_excel 一致；中间的空行由清洗步骤处理）
+    if len(df):
+        non_empty = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+        last = non_empty[-1] + 1 if len(non_empty) else 0
+        if last < len(df):
+            df = df.iloc[:last]
+    return df
+
+
+def read_excel_sheet(file_path, sheet=None):
+    """
+    流式读取一个工作表。
+    :param sheet: 工作表名称，为 None 时读取第一个工作表
+    :return: (DataFrame, 工作表名称, 引擎名)
+    """
+    engine, workbook = _open_workbook(file_path)
+    try:
+        if sheet is None:
+            sheet = _workbook_sheet_names(engine, workbook)[0]
+        if engine == 'xlrd':
+            return workbook.parse(sheet), sheet, engine
+        return frame_from_rows(_iter_rows(engine, workbook, sheet)), sheet, engine
+    finally:
+        _close_workbook(engine, workbook)
@@ -0,0 +1,164 @@
+#增量分析模块
+#只追加写入的数据文件（如日志）再次分析时，只解析上次处理位置之后新增的部分，
+#在保存的清洗状态和可合并统计草图上累计；文件被截断或改写时自动回退到完整分析。
+import os
+import pickle
+import hashlib
+from .loader import DataLoader, complete_lines_end
+from .cleaner import DataCleaner
+from .analyzer import DataAnalyzer
+from .sketches import StatsEngine
+from .cache import DEFAULT_STATE_DIR
+
+STATE_VERSION = 4
+# 未指定块大小时增量模式每块读取的行数
+INCREMENTAL_CHUNKSIZE = 200000
+# 校验文件是否被改写：比较文件开头和上次处理位置之前的字节
+PREFIX_BYTES = 1024 * 1024
+BOUNDARY_BYTES = 64 * 1024
+# 填充值与异常值边界在完整分析时确定；此后追加的字节数超过完整分析时文件大小的该倍数时重新完整分析
+REFRESH_RATIO = 1.0
+
+
+def range_digest(file_path, start, end, block_size=1024 * 1024):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def file_signature(file_path, offset):
+    """已处理部分 [0, offset) 的签名：开头 PREFIX_BYTES 字节和 offset 之前 BOUNDARY_BYTES 字节的哈希"""
+    return {
+        'offset': offset,
+        'prefix': range_digest(file_path, 0, min(offset, PREFIX_BYTES)),
+        'boundary': range_digest(file_path, max(offset - BOUNDARY_BYTES, 0), offset)
+    }
+
+
+class StateStore:
+    """按文件绝对路径保存增量分析状态（pickle），写入时先写临时文件再替换"""
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR):
+        self.state_dir = state_dir
+        self.issues = []
+
+    def path_for(self, file_path):
+        key = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.state_dir, f"{key}.pkl")
+
+    def load(self, file_path):
+        path = self.path_for(file_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            self.issues.append(f"增量状态读取失败，执行完整分析: {str(e)}")
+            return None
+        return state if state.get('version') == STATE_VERSION else None
+
+    def save(self, file_path, state):
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            path = self.path_for(file_path)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.issues.append(f"增量状态保存失败: {str(e)}")
+
+
+def check_state(state, file_path, options_key):
+    """
+    判断能否在保存的状态上做增量分析。
+    :return: 需要完整分析的原因；可以增量分析时返回 None
+    """
+    if state is None:
+        return "没有增量状态"
+    if state['options'] != options_key:
+        return "分析选项已变化"
+    offset = state['signature']['offset']
+    size = os.path.getsize(file_path)
+    if size < offset:
+        return "文件被截断"
+    if file_signature(file_path, offset) != state['signature']:
+        return "文件已被改写"
+    if size - state['full_offset'] > REFRESH_RATIO * state['full_offset']:
+        return "追加的数据已超过上次完整分析的规模，重新确定填充值与异常值边界"
+    return None
+
+
+def run_incremental(file_path, options, store=None):
+    """
+    增量分析单个CSV文件。统计使用可合并的近似草图（StatsEngine），清洗沿用首次完整分析得到的
+    填充值与异常值边界，重复行判断覆盖此前所有行。
+    :param options: 命令行参数（argparse.Namespace）
+    :return: (loader, cleaner, analyzer)，加载失败时返回 None
+    """
+    store = store or StateStore(options.state_dir)
+    options_key = {'fast': options.fast, 'dedup_keys': options.dedup_keys}
+    state = store.load(file_path)
+    reason = check_state(state, file_path, options_key)
+    end = complete_lines_end(file_path)
+
+    loader = DataLoader(file_path, chunksize=options.chunksize or INCREMENTAL_CHUNKSIZE,
+                        memory_budget=options.memory_budget, fast=options.fast)
+    cleaner = DataCleaner(dedup_keys=options.dedup_keys)
+    analyzer = DataAnalyzer(mode='approx', corr_method=options.corr_method)
+
+    if reason is None:
+        offset = state['signature']['offset']
+        print(f"增量分析: 从第 {offset} 字节开始解析新增的 {end - offset} 字节")
+        if not loader.load_chunks(byte_range=(offset, end), names=state['cleaner']['columns']):
+            return None
+        cleaned_chunks = cleaner.clean_increment(loader.chunks, state['cleaner'])
+        try:
+            analyzer.analyze_chunks(cleaned_chunks, engine=StatsEngine.from_dict(state['engine']))
+        finally:
+            cleaned_chunks.cleanup()
+    else:
+        print(f"{reason}，执行完整分析")
+        offset = 0
+        if not loader.load_chunks(byte_range=(0, end)):
+            return None
+        cleaned_chunks = cleaner.clean_chunks(loader.chunks, keep_state=True)
+        try:
+            analyzer.analyze_chunks(cleaned_chunks)
+        finally:
+            cleaned_chunks.cleanup()
+
+    # 清洗或分析出错时不保存状态，下次重新完整分析
+    if cleaner.state is not None and 'summary' in analyzer.analysis:
+        store.save(file_path, {
+            'version': STATE_VERSION,
+            'options': options_key,
+            'signature': file_signature(file_path, end),
+            'cleaner': cleaner.state,
+            'engine': analyzer.engine.to_dict(),
+            'full_offset': state['full_offset'] if reason is None else end
+        })
+    loader.issues.extend(store.issues)
+
+    # 报告中的原始形状为累计结果
+    if cleaner.state is not None:
+        new_rows = loader.file_info.get('original_shape', (0, 0))[0]
+        loader.file_info['original_shape'] = (cleaner.state['original_count'], len(cleaner.state['columns']))
+        loader.file_info['columns'] = cleaner.state['columns']
+        loader.file_info['incremental'] = {
+            'mode': 'full' if reason else 'append',
+            'reason': reason,
+            'start_offset': offset,
+            'end_offset': end,
+            'new_rows': new_rows
+        }
+    return loader, cleaner, analyzer
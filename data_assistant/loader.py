@@ -1,40 +1,420 @@
-#数据加载模块
-import pandas as pd
-import os
-from datetime import datetime
-
-class DataLoader:
-    def __init__(self, file_path):
-        self.file_path = file_path
-        self.df = None
-        self.file_info = {}
-        self.issues = []
-
-    def load_data(self):
-        try:
-            file_ext = os.path.splitext(self.file_path)[1].lower()
-
-            if file_ext == '.csv':
-                self.df = pd.read_csv(self.file_path, encoding='utf-8', engine='python')
-            elif file_ext in ['.xlsx', '.xls']:
-                self.df = pd.read_excel(self.file_path, engine='openpyxl')
-            else:
-                raise ValueError("不支持的文件格式。请提供CSV或Excel文件。")
-
-            # 记录文件信息
-            self.file_info = {
-                'filename': os.path.basename(self.file_path),
-                'file_type': "CSV" if file_ext == '.csv' else "Excel",
-                'load_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'original_shape': self.df.shape,
-                'columns': list(self.df.columns),
-                'data_types': self.df.dtypes.astype(str).to_dict()
-            }
-
-            print(f"成功加载数据: {self.df.shape[0]} 行, {self.df.shape[1]} 列")
-            return True
-
-        except Exception as e:
-            self.issues.append(f"数据加载失败: {str(e)}")
-            print(f"错误: {str(e)}")
-            return False
\ No newline at end of file
+#数据加载模块
+import pandas as pd
+import numpy as np
+import io
+import os
+import time
+import contextlib
+import importlib.util
+from datetime import datetime
+from .utils import peak_rss_mb
+from .cache import file_fingerprint
+from .excel import read_excel_sheet
+from .sketches import CATEGORY_MAX_CARDINALITY
+from .sampling import (QUICK_SAMPLE_ROWS, QUICK_SECONDS, QUICK_SCAN_CHUNK_ROWS, sample_rows, reservoir_sample,
+                       read_byte_ranges, byte_range_plan, use_reservoir)
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+# 清洗时块会产生若干临时副本，按内存预算推算块大小时预留的倍数
+CHUNK_MEMORY_FACTOR = 4
+# 推算单行内存占用时读取的样本行数
+CHUNK_SAMPLE_ROWS = 1000
+# 快速模式下推断列类型的样本行数
+DTYPE_SAMPLE_ROWS = 10000
+# 唯一值占比低于该值（且唯一值个数不超过 CATEGORY_MAX_CARDINALITY）的文本列存为 category
+CATEGORY_MAX_RATIO = 0.5
+# 编码前先用均匀抽样的行估计唯一值占比，ID 类高基数列不做完整的字典编码
+CATEGORY_SAMPLE_SIZE = 10000
+
+# 内存模式的峰值内存约为解析结果大小（按样本行的内存占用推算）的倍数：解析时的临时对象、
+# 文本列字典编码前后的两份数据，以及删除重复行时取出的新表
+IN_MEMORY_PEAK_FACTOR = 4
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+
+def copy_on_write():
+    """
+    处理流程在 Copy-on-Write 模式下运行（pandas 3.0 起为默认行为）：列子集、切片和各阶段之间传递的 DataFrame
+    都是延迟复制的视图，只有被修改的列才会复制，没有其他引用时原地修改。
+    只在处理流程内生效，不改变导入本模块的其他代码的 pandas 全局设置。
+    """
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return contextlib.nullcontext()
+    return pd.option_context('mode.copy_on_write', True)
+
+
+def infer_csv_dtypes(sample):
+    """
+    根据样本行推断整表读取时使用的列类型。
+    数值列统一按 float64 读取（整数列在后续行中可能出现缺失值），读入后再压缩；文本列按 object 读取，
+    避免解析器逐列猜测类型。
+    """
+    dtypes = {}
+    for col in sample.columns:
+        if pd.api.types.is_bool_dtype(sample[col]):
+            continue
+        if pd.api.types.is_numeric_dtype(sample[col]):
+            dtypes[col] = 'float64'
+        else:
+            dtypes[col] = 'object'
+    return dtypes
+
+
+def encode_categorical(s):
+    """
+    低基数文本列字典编码为 category（一次 factorize，类别按首次出现的顺序），之后的计数、众数、
+    哈希都在整数编码上进行。高基数列（抽样唯一值占比高，或唯一值过多）返回 None，由草图计数。
+    """
+    non_null = s.count()
+    if not non_null:
+        return None
+    if len(s) > CATEGORY_SAMPLE_SIZE:
+        sample = s.iloc[np.linspace(0, len(s) - 1, CATEGORY_SAMPLE_SIZE).astype(np.intp)].dropna()
+        if len(sample) and len(pd.unique(sample)) / len(sample) >= CATEGORY_MAX_RATIO:
+            return None
+    codes, uniques = pd.factorize(s)
+    if len(uniques) > CATEGORY_MAX_CARDINALITY or len(uniques) / non_null >= CATEGORY_MAX_RATIO:
+        return None
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=s.index, name=s.name)
+
+
+def _is_text(s):
+    return s.dtype == object or (pd.api.types.is_string_dtype(s) and not isinstance(s.dtype, pd.CategoricalDtype))
+
+
+def encode_categoricals(df):
+    """加载后对所有低基数文本列做字典编码（原地修改并返回 df）"""
+    for col in df.columns:
+        if _is_text(df[col]):
+            encoded = encode_categorical(df[col])
+            if encoded is not None:
+                df[col] = encoded
+    return df
+
+
+def compact_dtypes(df):
+    """
+    压缩列类型（原地修改并返回 df）：
+    - 无缺失且全为整数的数值列转为最小的整数类型，可无损表示的浮点列转为 float32；
+    - 低基数文本列转为 category，其余文本列转为 Arrow 字符串（未安装 pyarrow 时保持 object）。
+    """
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_bool_dtype(s):
+            continue
+        if pd.api.types.is_float_dtype(s):
+            values = s.to_numpy()
+            finite = values[~np.isnan(values)]
+            if (len(finite) == len(values) and np.array_equal(finite, np.round(finite))
+                    and np.abs(finite).max(initial=0) < 2 ** 53):
+                df[col] = pd.to_numeric(s.astype(np.int64), downcast='integer')
+            elif np.array_equal(finite.astype(np.float32).astype(np.float64), finite):
+                df[col] = s.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(s):
+            df[col] = pd.to_numeric(s, downcast='integer')
+        elif _is_text(s):
+            encoded = encode_categorical(s)
+            if encoded is not None:
+                df[col] = encoded
+            elif HAS_PYARROW:
+                df[col] = s.astype('string[pyarrow]')
+    return df
+
+
+def complete_lines_end(file_path, block_size=64 * 1024):
+    """文件中最后一个换行符之后的位置；正在追加写入的文件末尾可能有不完整的行，读取到此为止"""
+    with open(file_path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(end - block_size, 0)
+            f.seek(start)
+            pos = f.read(end - start).rfind(b'\n')
+            if pos >= 0:
+                return start + pos + 1
+            end = start
+    return 0
+
+
+class ByteRangeReader(io.RawIOBase):
+    """只读取文件 [start, end) 字节范围的流，供 read_csv 解析文件的一部分"""
+
+    def __init__(self, file_path, start, end):
+        self._file = open(file_path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class DataLoader:
+    def __init__(self, file_path, chunksize=None, memory_budget=None, fast=False, cache=None, sheet=None):
+        self.file_path = file_path
+        self.sheet = sheet                  #Excel工作表名称，为 None 时读取第一个工作表
+        self.chunksize = chunksize          #流式模式每块行数
+        self.memory_budget = memory_budget  #流式模式内存预算（MB），未指定块大小时据此推算
+        self.fast = fast                    #快速解析模式：C/PyArrow解析器 + 采样推断类型 + 紧凑列类型
+        self.cache = cache                  #DataCache 实例，为 None 时不使用解析缓存
+        self.parser = 'python'
+        self.df = None
+        self.chunks = None
+        self.sample = None                  #快速模式的抽样方案（QuickSample），self.df 为样本
+        self.file_info = {}
+        self.issues = []
+
+    @property
+    def streaming_requested(self):
+        return bool(self.chunksize or self.memory_budget)
+
+    def supports_chunks(self):
+        """目前只有CSV支持分块读取"""
+        return os.path.splitext(self.file_path)[1].lower() == '.csv'
+
+    def load_data(self):
+        try:
+            file_ext = os.path.splitext(self.file_path)[1].lower()
+            if file_ext not in SUPPORTED_EXTENSIONS:
+                raise ValueError("不支持的文件格式。请提供CSV或Excel文件。")
+            start = time.perf_counter()
+
+            # 优先从解析缓存读取
+            cache_key = None
+            if self.cache is not None and self.cache.available:
+                cache_options = {'fast': self.fast}
+                if self.sheet is not None:
+                    cache_options['sheet'] = self.sheet
+                cache_key = file_fingerprint(self.file_path, cache_options)
+                self.df = self.cache.load(cache_key)
+            elif self.cache is not None:
+                self.issues.append("未安装 pyarrow，解析缓存未启用")
+
+            if self.df is not None:
+                self.parser = 'cache'
+            else:
+                self._parse_file(file_ext)
+                if cache_key:
+                    self.cache.store(cache_key, self.df)
+            if self.cache is not None:
+                self.issues.extend(self.cache.issues)
+
+            self._record_file_info(file_ext, start)
+            print(f"成功加载数据: {self.df.shape[0]} 行, {self.df.shape[1]} 列")
+            return True
+
+        except Exception as e:
+            self.issues.append(f"数据加载失败: {str(e)}")
+            print(f"错误: {str(e)}")
+            return False
+
+    def load_sample(self, rows=None, seconds=None):
+        """
+        快速模式：在行数预算和时间预算内抽取样本作为 self.df，抽样方案保存在 self.sample（QuickSample）。
+        不超过 QUICK_SCAN_BYTES 的CSV文件一遍扫描做蓄水池抽样（预计超出时间预算时改为字节块抽样）；
+        更大的CSV文件按随机顺序读取与行首对齐的字节块，直到达到任一预算；Excel 文件不能按字节定位，完整读取后等概率抽取行（时间预算不适用）。
+        :param rows: 样本行数上限，默认 QUICK_SAMPLE_ROWS
+        :param seconds: 抽样时间预算（秒），默认 QUICK_SECONDS
+        """
+        rows = rows or QUICK_SAMPLE_ROWS
+        seconds = seconds or QUICK_SECONDS
+        try:
+            file_ext = os.path.splitext(self.file_path)[1].lower()
+            if file_ext not in SUPPORTED_EXTENSIONS:
+                raise ValueError("不支持的文件格式。请提供CSV或Excel文件。")
+            start = time.perf_counter()
+
+            self.parser = 'c' if self.fast else 'python'
+            if file_ext != '.csv':
+                self._parse_file(file_ext)
+                self.df, self.sample = sample_rows(self.df, rows)
+            else:
+                sampled = None
+                if use_reservoir(self.file_path):
+                    size = os.path.getsize(self.file_path)
+                    with open(self.file_path, 'rb') as f:
+                        reader = pd.read_csv(f, encoding='utf-8', engine=self.parser,
+                                             chunksize=min(rows, QUICK_SCAN_CHUNK_ROWS))
+                        with reader:
+                            sampled = reservoir_sample(reader, rows, seconds=seconds,
+                                                       progress=lambda: f.tell() / max(size, 1))
+                    if sampled is None:
+                        print("完整扫描预计超出时间预算，改为字节块抽样")
+                    else:
+                        self.df, self.sample = sampled
+                        self.sample.bytes_read = size
+                if sampled is None:
+                    remaining = max(seconds - (time.perf_counter() - start), 0.0)
+                    data, counts, population = read_byte_ranges(self.file_path, complete_lines_end(self.file_path),
+                                                                rows, remaining)
+                    self.df = pd.read_csv(io.BytesIO(data), encoding='utf-8', engine=self.parser)
+                    self.sample, aligned = byte_range_plan(counts, population, len(self.df))
+                    self.sample.bytes_read = len(data)
+                    if not aligned:
+                        self.issues.append("抽样数据的行数与换行符数不一致（可能有含换行的引号字段），置信区间按逐行抽样近似")
+            if file_ext == '.csv':
+                self.df = compact_dtypes(self.df) if self.fast else encode_categoricals(self.df)
+
+            self.sample.seconds = time.perf_counter() - start
+            self.sample.observe(self.df)
+            self._record_file_info(file_ext, start)
+            self.file_info['quick'] = self.sample.describe()
+            print(f"快速模式抽样: {self.df.shape[0]} 行, {self.df.shape[1]} 列"
+                  f"（{self.sample.seconds:.2f} 秒，读取 {self.sample.bytes_read / 1024 ** 2:.1f} MB）")
+            return True
+
+        except Exception as e:
+            self.issues.append(f"数据加载失败: {str(e)}")
+            print(f"错误: {str(e)}")
+            return False
+
+    def _record_file_info(self, file_ext, start):
+        """记录文件信息（内存模式；快速模式下为样本的形状与类型）"""
+        self.file_info = {
+            'filename': os.path.basename(self.file_path),
+            'file_type': "CSV" if file_ext == '.csv' else "Excel",
+            'load_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'original_shape': self.df.shape,
+            'columns': list(self.df.columns),
+            'data_types': self.df.dtypes.astype(str).to_dict(),
+            'parser': self.parser,
+            'load_seconds': round(time.perf_counter() - start, 3),
+            'memory_mb': round(self.df.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+            'peak_rss_mb': peak_rss_mb()
+        }
+        if file_ext != '.csv':
+            self.file_info['sheet'] = self.sheet
+
+    def _parse_file(self, file_ext):
+        if file_ext == '.csv':
+            self.df = self._read_csv_fast() if self.fast else None
+            if self.df is None:
+                self.parser = 'python'
+                self.df = encode_categoricals(pd.read_csv(self.file_path, encoding='utf-8', engine='python'))
+        else:
+            # 流式读取：只读模式逐行解析，按块构建类型化的列数组
+            self.df, self.sheet, self.parser = read_excel_sheet(self.file_path, self.sheet)
+            if self.fast:
+                compact_dtypes(self.df)
+            else:
+                encode_categoricals(self.df)
+
+    def load_chunks(self, byte_range=None, names=None):
+        """
+        流式加载：不一次性读入整个文件，而是把 self.chunks 设为按块返回 DataFrame 的迭代器。
+        original_shape 在迭代结束后才完整。
+        :param byte_range: (start, end)，只解析该字节范围（增量分析时为新追加的部分）
+        :param names: 列名；指定时 byte_range 内不含表头行
+        """
+        try:
+            if not self.supports_chunks():
+                raise ValueError("流式模式仅支持CSV文件。")
+
+            chunksize = self.resolve_chunksize()
+            # pyarrow 解析器不支持分块，快速模式下使用 C 解析器
+            self.parser = 'c' if self.fast else 'python'
+            source = self.file_path
+            if byte_range is not None:
+                source = io.BufferedReader(ByteRangeReader(self.file_path, *byte_range))
+            reader = pd.read_csv(source, encoding='utf-8', engine=self.parser, chunksize=chunksize,
+                                 header=None if names else 'infer', names=names)
+
+            self.file_info = {
+                'filename': os.path.basename(self.file_path),
+                'file_type': "CSV",
+                'load_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'original_shape': (0, 0),
+                'columns': [],
+                'data_types': {},
+                'parser': self.parser,
+                'chunksize': chunksize
+            }
+            self.chunks = self._iter_chunks(reader, None if byte_range is None else source)
+
+            print(f"以流式模式加载数据: 每块 {chunksize} 行")
+            return True
+
+        except Exception as e:
+            self.issues.append(f"数据加载失败: {str(e)}")
+            print(f"错误: {str(e)}")
+            return False
+
+    def estimate_rows(self, sample_bytes=1024 * 1024):
+        """按文件开头样本的平均行长度估计CSV文件的行数"""
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(sample_bytes)
+        lines = sample.count(b'\n')
+        return int(size * lines / len(sample)) if lines else 1
+
+    def resolve_chunksize(self):
+        """确定块大小：优先使用 chunksize，否则按内存预算和样本行的内存占用推算"""
+        if self.chunksize:
+            return self.chunksize
+
+        self.chunksize = max(int(self.memory_budget * 1024 ** 2 / (self.sample_row_bytes() * CHUNK_MEMORY_FACTOR)), 1)
+        return self.chunksize
+
+    def sample_row_bytes(self):
+        """按文件开头 CHUNK_SAMPLE_ROWS 行解析后的内存占用（含文本内容）估计的单行字节数"""
+        sample = pd.read_csv(self.file_path, encoding='utf-8', engine='python', nrows=CHUNK_SAMPLE_ROWS)
+        return max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+
+    def estimate_peak_mb(self):
+        """加载前估计内存模式的峰值内存(MB)：估计行数 × 样本行的内存占用 × IN_MEMORY_PEAK_FACTOR"""
+        return self.estimate_rows() * self.sample_row_bytes() * IN_MEMORY_PEAK_FACTOR / 1024 ** 2
+
+    def release(self):
+        """
+        交出加载的 DataFrame 并不再持有它：清洗阶段会原地修改这份数据，加载器中不会留下被修改的别名；
+        清洗删除行得到新表后，原始数据没有其他引用，可以立即释放。
+        """
+        df, self.df = self.df, None
+        return df
+
+    def _read_csv_fast(self):
+        """
+        快速解析：先用 C 解析器读取样本推断列类型，再用 PyArrow（未安装时用 C）解析器按该类型读取全表，
+        最后压缩列类型。文件格式异常导致解析失败时返回 None，由调用方回退到 python 解析器。
+        """
+        engine = 'pyarrow' if HAS_PYARROW else 'c'
+        try:
+            sample = pd.read_csv(self.file_path, encoding='utf-8', engine='c', nrows=DTYPE_SAMPLE_ROWS)
+            df = pd.read_csv(self.file_path, encoding='utf-8', engine=engine, dtype=infer_csv_dtypes(sample))
+        except Exception as e:
+            self.issues.append(f"快速解析失败，已回退到 python 解析器: {str(e)}")
+            print(f"快速解析失败，回退到 python 解析器: {str(e)}")
+            return None
+
+        self.parser = engine
+        return compact_dtypes(df)
+
+    def _iter_chunks(self, reader, handle=None):
+        rows = 0
+        try:
+            with reader:
+                for chunk in reader:
+                    if not self.file_info['columns']:
+                        self.file_info['columns'] = list(chunk.columns)
+                        self.file_info['data_types'] = chunk.dtypes.astype(str).to_dict()
+                    rows += len(chunk)
+                    self.file_info['original_shape'] = (rows, chunk.shape[1])
+                    yield chunk
+        finally:
+            # read_csv 不会关闭调用方传入的文件对象
+            if handle is not None:
+                handle.close()
+
+        print(f"成功加载数据: {rows} 行, {len(self.file_info['columns'])} 列")
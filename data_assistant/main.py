@@ -1,62 +1,116 @@
-import argparse
-from .loader import DataLoader
-from .cleaner import DataCleaner
-from .analyzer import DataAnalyzer
-from .visualizer import DataVisualizer
-from .reporter import ReportGenerator
-from .utils import set_chinese_font, ensure_dir_exists
-
-
-def main():
-    """
-    命令行接口
-    """
-    parser = argparse.ArgumentParser(description='数据处理小助手 - CSV/Excel文件分析工具')
-    parser.add_argument('file', type=str, help='数据文件路径 (CSV 或 Excel)')
-    parser.add_argument('-o', '--output', type=str, help='输出目录', default='reports')
-    args = parser.parse_args()
-
-    # 设置中文字体
-    set_chinese_font()
-
-    # 确保输出目录存在
-    output_dir = ensure_dir_exists(args.output)
-
-    # 1. 加载数据
-    loader = DataLoader(args.file)
-    if not loader.load_data():
-        print("数据加载失败，程序终止。")
-        return
-
-    # 2. 清洗数据
-    cleaner = DataCleaner(loader.df)
-    cleaned_df = cleaner.clean_data()
-
-    # 3. 分析数据
-    analyzer = DataAnalyzer(cleaned_df)
-    analyzer.analyze_data()
-
-    # 4. 创建可视化
-    visualizer = DataVisualizer(cleaned_df)
-    visualizer.create_visualizations()
-
-    # 5. 生成报告
-    report_data = {
-        'file_info': loader.file_info,
-        'cleaning': cleaner.cleaning,
-        'analysis': analyzer.analysis,
-        'visualizations': visualizer.visualizations,
-        'issues': loader.issues + cleaner.issues + analyzer.issues + visualizer.issues
-    }
-
-    report_generator = ReportGenerator(output_dir)
-    report_path = report_generator.generate_report(report_data)
-
-    if report_path:
-        print(f"\n✅ 数据处理完成！报告已保存至: {report_path}")
-    else:
-        print("\n❌ 数据处理失败，请检查错误信息")
-
-
-if __name__ == "__main__":
+import sys
+import argparse
+from .cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB, DEFAULT_STATE_DIR
+from .profiling import PROFILE_STAGES
+from .utils import ensure_dir_exists
+
+
+def build_parser():
+    """命令行参数定义，命令行和常驻服务（service 模块）共用"""
+    parser = argparse.ArgumentParser(description='数据处理小助手 - CSV/Excel文件分析工具')
+    parser.add_argument('file', type=str, nargs='+',
+                        help='数据文件路径 (CSV 或 Excel)；可以是多个文件、目录或通配符（如 "data/**/*.csv"），此时进入批处理模式')
+    parser.add_argument('-o', '--output', type=str, help='输出目录', default='reports')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='流式模式：每块读取的行数，适用于超出内存的大CSV文件')
+    parser.add_argument('--memory-budget', type=int, default=None,
+                        help='流式模式：内存预算(MB)，未指定 --chunksize 时据此推算块大小')
+    parser.add_argument('--max-memory', type=int, default=None,
+                        help='内存上限(MB)：加载前按文件大小和样本行的列类型估计峰值内存，超过时自动改用流式模式（仅CSV）')
+    parser.add_argument('--fast', action='store_true',
+                        help='快速解析：C/PyArrow解析器 + 采样推断列类型 + 紧凑列类型，解析失败时自动回退')
+    parser.add_argument('--quick', action='store_true',
+                        help='快速概览：在时间或行数预算内抽样（大CSV随机读取与行首对齐的字节块），清洗、分析和图表都基于样本，'
+                             '报告中的统计均为估计值（均值与分位数含置信区间，行数、缺失值与重复行为估计总数）')
+    parser.add_argument('--quick-seconds', type=float, default=None,
+                        help='快速模式的抽样时间预算（秒，默认 5）')
+    parser.add_argument('--sample-rows', type=int, default=None,
+                        help='快速模式的样本行数上限（默认 100000）')
+    parser.add_argument('--sheets', type=str, nargs='+', default=None,
+                        help='Excel：要处理的工作表名称或序号（从0开始），all 表示全部；默认只处理第一个工作表，'
+                             '多个工作表在同一份报告中各占一节')
+    parser.add_argument('--cache', action='store_true',
+                        help='缓存解析结果（Arrow IPC，需要 pyarrow），同一文件再次运行时直接内存映射读取')
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR, help='解析缓存目录')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help='解析缓存大小上限(MB)，超出时淘汰最久未使用的缓存')
+    parser.add_argument('--dedup-keys', type=str, nargs='+', default=None,
+                        help='按这些键列判断重复行（保留首次出现），默认按整行判断')
+    parser.add_argument('--dedup', choices=['auto', 'memory', 'external'], default='auto',
+                        help='流式模式的去重方式：memory 在内存中保存行哈希；external 把行哈希分桶写入磁盘，'
+                             '内存与行数无关；auto 按 --memory-budget 自动选择')
+    parser.add_argument('--stats', choices=['exact', 'approx'], default='exact',
+                        help='统计模式：exact 精确统计；approx 使用可合并草图近似统计（报告中给出误差界）')
+    parser.add_argument('--corr-method', choices=['pearson', 'spearman'], default='pearson',
+                        help='相关系数：pearson 或 spearman（对各列做一次秩变换后计算；流式与近似模式只支持 pearson）')
+    parser.add_argument('--chart-jobs', type=int, default=None,
+                        help='并行绘图的进程数（默认按图表数量和CPU核数自动决定，1 表示不并行）')
+    parser.add_argument('--column-jobs', type=int, default=None,
+                        help='内存模式下按列并行清洗与统计的线程数（默认按列数、行数和CPU核数自动决定，1 表示不并行）')
+    parser.add_argument('--no-charts', '--stats-only', dest='no_charts', action='store_true',
+                        help='只做清洗与统计分析，不生成图表（不加载 matplotlib/seaborn，适合短任务）')
+    parser.add_argument('--image-mode', choices=['inline', 'files'], default='inline',
+                        help='图表输出方式：inline 以base64内嵌到报告；files 写入报告目录下的 assets/ 并延迟加载')
+    parser.add_argument('--image-format', choices=['png', 'webp', 'svg', 'auto'], default='png',
+                        help='图表格式：优化压缩的PNG、WebP、SVG，或 auto（简单图表用SVG，其余用PNG）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量分析（仅CSV）：只解析上次运行后追加的数据，统计使用可合并草图；文件被截断或改写时自动完整分析')
+    parser.add_argument('--state-dir', type=str, default=DEFAULT_STATE_DIR, help='增量分析状态的保存目录')
+    parser.add_argument('--trace', action='store_true',
+                        help='导出各阶段、清洗步骤和图表的 Chrome trace-event 文件（报告同名 .trace.json）')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='用 tracemalloc 统计各步骤的峰值内存（默认使用进程RSS峰值增长，开销更小）')
+    parser.add_argument('--profile', choices=PROFILE_STAGES, default=None,
+                        help='用 cProfile 剖析指定阶段，结果保存为报告同名 .<阶段>.prof 并打印耗时最多的函数')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='批处理模式：并行处理文件的进程数（默认为CPU核数）')
+    parser.add_argument('--service', type=str, default=None, metavar='URL',
+                        help='提交给已运行的常驻服务（如 http://127.0.0.1:8765）处理，'
+                             '避免每次重新导入库和设置字体；服务用 python -m data_assistant.service 启动')
+    return parser
+
+
+def run(args, report_name=None):
+    """
+    执行一次分析（单个文件或批处理），命令行和常驻服务共用。
+    :param args: build_parser() 解析得到的参数
+    :param report_name: 单文件报告的文件名，默认按时间命名
+    :return: 报告路径（批处理时为索引页路径），失败时返回 None
+    """
+    # 处理流程（pandas 等）在解析参数之后才导入，--help 和参数错误时立即返回；
+    # 绘图库只在创建可视化时导入，中文字体也在那时设置
+    from .pipeline import run_pipeline
+    from .batch import is_batch, run_batch
+
+    # 确保输出目录存在
+    output_dir = ensure_dir_exists(args.output)
+
+    if is_batch(args.file):
+        return run_batch(args.file, output_dir, args, jobs=args.jobs)
+
+    report_path, _ = run_pipeline(args.file[0], output_dir, args, report_name)
+
+    if report_path:
+        print(f"\n✅ 数据处理完成！报告已保存至: {report_path}")
+    else:
+        print("\n❌ 数据处理失败，请检查错误信息")
+    return report_path
+
+
+def main(argv=None):
+    """
+    命令行接口
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = build_parser().parse_args(argv)
+
+    if args.service:
+        # 客户端只做参数检查和一次 HTTP 请求，不导入 pandas
+        from .service import submit_job
+        sys.exit(0 if submit_job(args.service, argv) else 1)
+
+    run(args)
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,189 @@
+#列并行模块
+#宽表上的逐列计算（缺失计数、分位数、中位数、众数计数、异常值定位、行哈希、日期识别与解析）彼此独立，
+#按列划分后并行执行，结果按列的原始顺序合并，与逐列串行计算的结果完全相同。
+#数值列和字典编码（category）列上的 NumPy/pandas 计算释放 GIL，使用线程池，列数据不复制；
+#未编码文本列的日期解析可以在进程池中进行：父进程把列转换为 Arrow 字符串，其偏移量和 UTF-8 数据缓冲区
+#整块复制到共享内存（不逐个值编码），工作进程由缓冲区重建列并解析，结果（int64，单位与串行解析相同）写入
+#另一块共享内存列缓冲区，输入和输出都不经过 pickle。按识别出的格式解析本身已是向量化的，
+#进程启动的开销大于并行的收益（benchmarks/date_parsing.py），因此默认不启用（PROCESS_MIN_ROWS 为 None），
+#文本列与其他列一样在线程池中解析。
+#进程池使用 forkserver 启动方式：父进程此时已有线程池的线程，fork 会复制其持有的锁。
+import os
+import importlib.util
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from .datetimes import parse_datetime
+
+# 未指定并行数时，列数和行数都达到下限才并行（线程调度的开销大于窄表或小表上的计算）
+PARALLEL_MIN_COLUMNS = 16
+PARALLEL_MIN_ROWS = 10000
+# 文本列达到该行数时才在进程池中解析日期（进程启动和文本传输有固定开销）；None 表示不使用进程池
+PROCESS_MIN_ROWS = None
+# 进程池的启动方式（不支持 forkserver 的平台使用 spawn）
+PROCESS_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def resolve_column_jobs(jobs, df):
+    """
+    列并行数：指定时直接使用（1 表示不并行）；未指定时宽表且行数足够时为CPU核数（不超过列数），否则为 1。
+    """
+    if jobs:
+        return max(jobs, 1)
+    if df is None or df.shape[1] < PARALLEL_MIN_COLUMNS or len(df) < PARALLEL_MIN_ROWS:
+        return 1
+    return max(min(os.cpu_count() or 1, df.shape[1]), 1)
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _share_text(series):
+    """
+    把一列文本写入共享内存：int64 偏移量（行数 + 1 个）、缺失值掩码、UTF-8 数据，均为 Arrow large_string
+    缓冲区的整块复制。列中有非字符串值（无法转换为 Arrow 字符串）时返回 None。
+    """
+    import pyarrow as pa
+    try:
+        array = pa.array(series, type=pa.large_string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, UnicodeEncodeError):
+        return None
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    rows = len(array)
+    offsets = np.frombuffer(array.buffers()[1], dtype=np.int64)[array.offset:array.offset + rows + 1]
+    data = np.frombuffer(array.buffers()[2], dtype=np.uint8) if array.buffers()[2] is not None else np.empty(0, np.uint8)
+    data = data[offsets[0]:offsets[-1]]
+    missing = array.is_null().to_numpy(zero_copy_only=False)
+    data_start = offsets.nbytes + rows
+    buffer = shared_memory.SharedMemory(create=True, size=max(data_start + len(data), 1))
+    np.subtract(offsets, offsets[0], out=np.ndarray(rows + 1, dtype=np.int64, buffer=buffer.buf))
+    np.ndarray(rows, dtype=np.bool_, buffer=buffer.buf, offset=offsets.nbytes)[:] = missing
+    np.ndarray(len(data), dtype=np.uint8, buffer=buffer.buf, offset=data_start)[:] = data
+    return buffer
+
+
+def _read_text(name, rows):
+    """工作进程：由 _share_text 写入的缓冲区重建文本列（对象数组，缺失值为 None）"""
+    import pyarrow as pa
+    buffer = shared_memory.SharedMemory(name=name)
+    try:
+        offsets = np.ndarray(rows + 1, dtype=np.int64, buffer=buffer.buf).copy()
+        missing = np.ndarray(rows, dtype=np.bool_, buffer=buffer.buf, offset=offsets.nbytes).copy()
+        data = np.ndarray(int(offsets[-1]), dtype=np.uint8, buffer=buffer.buf, offset=offsets.nbytes + rows).copy()
+    finally:
+        buffer.close()
+    validity = pa.py_buffer(np.packbits(~missing, bitorder='little'))
+    array = pa.Array.from_buffers(pa.large_string(), rows, [validity, pa.py_buffer(offsets), pa.py_buffer(data)],
+                                  null_count=int(missing.sum()))
+    return array.to_numpy(zero_copy_only=False)
+
+
+def _parse_into_shared(values, spec, name):
+    """
+    工作进程：解析一列文本日期，结果按其 datetime64 单位以 int64 写入共享内存缓冲区，返回结果的类型名；
+    结果不是无时区的 datetime64 时（如带时区的格式）直接返回解析结果。
+    :param values: (共享内存名, 行数)，_share_text 写入的文本
+    """
+    values = _read_text(*values)
+    parsed = parse_datetime(pd.Series(values), spec)
+    if not np.issubdtype(parsed.dtype, np.datetime64):
+        return parsed.to_numpy()
+    buffer = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(len(values), dtype=np.int64, buffer=buffer.buf)
+        out[:] = parsed.to_numpy().view(np.int64)
+        del out
+    finally:
+        buffer.close()
+    return str(parsed.dtype)
+
+
+class ColumnExecutor:
+    """
+    按列并行执行逐列计算；jobs 为 1 时在当前线程中逐列执行。线程池和进程池在首次并行时创建，
+    close() 之后退回串行执行。
+    """
+
+    def __init__(self, jobs=1):
+        self.jobs = max(jobs or 1, 1)
+        self._threads = None
+        self._processes = None
+
+    def map(self, func, columns):
+        """对每列调用 func(列名)，返回与 columns 顺序一致的结果列表"""
+        columns = list(columns)
+        if self.jobs <= 1 or len(columns) < 2:
+            return [func(col) for col in columns]
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='column')
+        return list(self._threads.map(func, columns))
+
+    def groups(self, columns):
+        """按并行数把列分组：逐组计算并处理结果，同时保留的逐列中间结果（如掩码）不超过并行数列"""
+        columns = list(columns)
+        for start in range(0, len(columns), self.jobs):
+            yield columns[start:start + self.jobs]
+
+    def parse_datetimes(self, df, specs):
+        """
+        按识别出的规格解析多个日期列。
+        :param specs: {列名: 解析规格}
+        :return: {列名: 解析后的 Series 或解析时抛出的异常}，顺序与 specs 相同
+        """
+        def parse(col):
+            try:
+                return parse_datetime(df[col], specs[col])
+            except Exception as e:
+                return e
+
+        buffers = {}
+        try:
+            # 未编码的文本列（能转换为 Arrow 字符串时）在进程池中解析，其余列（数值时间戳、category 列只解析类别）
+            # 在线程池中解析
+            if self.jobs > 1 and HAS_PYARROW and PROCESS_MIN_ROWS is not None and len(df) >= PROCESS_MIN_ROWS:
+                for col in specs:
+                    if _is_text(df[col]):
+                        text = _share_text(df[col])
+                        if text is not None:
+                            buffers[(col, 'text')] = text
+            text_cols = [col for col in specs if (col, 'text') in buffers]
+            if len(text_cols) < 2:
+                return dict(zip(specs, self.map(parse, specs)))
+
+            other_cols = [col for col in specs if col not in text_cols]
+            results = dict(zip(other_cols, self.map(parse, other_cols)))
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=min(self.jobs, len(text_cols)),
+                                                      mp_context=multiprocessing.get_context(PROCESS_START_METHOD))
+            futures = {}
+            for col in text_cols:
+                buffers[col] = shared_memory.SharedMemory(create=True, size=max(len(df), 1) * 8)
+                futures[col] = self._processes.submit(_parse_into_shared, (buffers[(col, 'text')].name, len(df)),
+                                                      specs[col], buffers[col].name)
+            for col in text_cols:
+                try:
+                    values = futures[col].result()
+                except Exception as e:
+                    results[col] = e
+                    continue
+                if isinstance(values, str):
+                    values = np.ndarray(len(df), dtype=np.int64, buffer=buffers[col].buf).copy().view(values)
+                results[col] = pd.Series(values, index=df.index, name=col)
+        finally:
+            for buffer in buffers.values():
+                buffer.close()
+                buffer.unlink()
+        return {col: results[col] for col in specs}
+
+    def close(self):
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown()
+        self._threads = self._processes = None
+        self.jobs = 1
@@ -0,0 +1,240 @@
+#处理流程模块
+import os
+from .loader import DataLoader, copy_on_write
+from .cleaner import DataCleaner
+from .analyzer import DataAnalyzer
+from .reporter import ReportGenerator
+from .cache import DataCache
+from .excel import resolve_sheets
+from .incremental import run_incremental
+from .profiling import Profiler
+from .streaming import DEDUP_BYTES_PER_ROW
+
+
+def run_pipeline(file_path, output_dir, options, report_name=None):
+    """
+    对单个文件执行 加载 → 清洗 → 分析 → 可视化 → 报告 的完整流程。
+    各阶段的耗时、CPU时间和内存记录在报告的“性能”部分；流式模式下数据在清洗阶段才被逐块解析，解析耗时计入清洗阶段。
+    :param options: 命令行参数（argparse.Namespace），批处理时原样传给各个工作进程
+    :return: (报告路径, 报告数据)，加载失败时返回 (None, None)
+    """
+    profiler = Profiler(trace_memory=options.trace_memory, cprofile_stage=options.profile)
+    try:
+        # 服务和批处理的工作进程也经由这里执行，Copy-on-Write 只在每次处理期间生效
+        with copy_on_write():
+            return _run_stages(file_path, output_dir, options, report_name, profiler)
+    finally:
+        profiler.close()
+
+
+def _run_stages(file_path, output_dir, options, report_name, profiler):
+    sheets = _requested_sheets(file_path, options)
+    if sheets is None:
+        print("数据加载失败，程序终止。")
+        return None, None
+
+    if len(sheets) > 1:
+        # 多个工作表：依次处理，每个工作表在报告中占一节
+        sections = []
+        for sheet in sheets:
+            print(f"\n处理工作表: {sheet}")
+            with profiler.stage(f"工作表 {sheet}", 'sheet'):
+                result = _load_and_analyze(file_path, options, profiler, sheet)
+                if result is not None:
+                    sections.append(_build_section(*result, output_dir, options, profiler))
+        if not sections:
+            print("数据加载失败，程序终止。")
+            return None, None
+        report_data = _combine_sections(sections)
+    else:
+        result = _load_and_analyze(file_path, options, profiler, sheets[0])
+        if result is None:
+            print("数据加载失败，程序终止。")
+            return None, None
+        report_data = _build_section(*result, output_dir, options, profiler)
+
+    return _write_report(report_data, output_dir, options, report_name, profiler)
+
+
+def _requested_sheets(file_path, options):
+    """Excel 文件要处理的工作表名称列表；CSV 文件返回 [None]，工作表不存在时返回 None"""
+    if not options.sheets:
+        return [None]
+    if file_path.lower().endswith('.csv'):
+        print("--sheets 只适用于Excel文件，已忽略。")
+        return [None]
+    try:
+        return resolve_sheets(file_path, options.sheets)
+    except Exception as e:
+        print(f"错误: {str(e)}")
+        return None
+
+
+def _load_and_analyze(file_path, options, profiler, sheet=None):
+    """
+    加载、清洗并分析一个数据集（CSV 文件或一个工作表）。
+    :return: (loader, cleaner, analyzer, 清洗后数据, 列统计缓存)，加载失败时返回 None
+    """
+    # 快速模式只读取样本并在内存中处理，不使用增量、流式与解析缓存
+    quick = options.quick
+    if options.incremental and not quick and file_path.lower().endswith('.csv'):
+        # 1-3. 增量加载、清洗与分析，可视化使用累计的清洗后数据抽样
+        with profiler.stage('incremental'):
+            result = run_incremental(file_path, options)
+        if result is None:
+            return None
+        loader, cleaner, analyzer = result
+        return loader, cleaner, analyzer, cleaner.sample_df, None
+    if options.incremental and not quick:
+        print("增量模式仅支持CSV文件，改用完整分析。")
+
+    # 1. 加载数据
+    cache = DataCache(options.cache_dir, options.cache_size) if options.cache and not quick else None
+    loader = DataLoader(file_path, chunksize=None if quick else options.chunksize,
+                        memory_budget=None if quick else options.memory_budget,
+                        fast=options.fast, cache=cache, sheet=sheet)
+    if options.max_memory and not quick and not loader.streaming_requested:
+        _choose_strategy(loader, options.max_memory)
+    streaming = loader.streaming_requested and loader.supports_chunks()
+    if loader.streaming_requested and not streaming:
+        print("流式模式仅支持CSV文件，改用内存模式处理。")
+
+    if streaming:
+        with profiler.stage('loader'):
+            loaded = loader.load_chunks()
+        if not loaded:
+            return None
+
+        # 2-3. 分块清洗与分析，可视化使用清洗后数据的抽样
+        cleaner = DataCleaner(profiler=profiler, dedup_keys=options.dedup_keys,
+                              external_dedup=_use_external_dedup(loader, options))
+        with profiler.stage('cleaner'):
+            cleaned_chunks = cleaner.clean_chunks(loader.chunks)
+        try:
+            analyzer = DataAnalyzer(mode=options.stats, corr_method=options.corr_method)
+            with profiler.stage('analyzer'):
+                analyzer.analyze_chunks(cleaned_chunks)
+        finally:
+            cleaned_chunks.cleanup()
+        return loader, cleaner, analyzer, cleaner.sample_df, None
+
+    with profiler.stage('loader'):
+        loaded = loader.load_sample(options.sample_rows, options.quick_seconds) if quick else loader.load_data()
+    if not loaded:
+        return None
+
+    # 2. 清洗数据
+    # 数据直接交给清洗阶段原地修改，这里不保留引用，删除行后原始数据即可释放；
+    # 清洗阶段创建的列统计缓存由各阶段共享，清洗修改数据时会使相应统计失效
+    cleaner = DataCleaner(loader.release(), profiler=profiler, dedup_keys=options.dedup_keys,
+                          column_jobs=options.column_jobs)
+    with profiler.stage('cleaner'):
+        cleaned_df = cleaner.clean_data()
+
+    # 3. 分析数据
+    analyzer = DataAnalyzer(cleaned_df, mode=options.stats, profile=cleaner.profile, corr_method=options.corr_method)
+    try:
+        with profiler.stage('analyzer'):
+            analyzer.analyze_data()
+            if loader.sample is not None and cleaned_df is not None and 'summary' in analyzer.analysis:
+                # 快速模式：估计文件中的总数，并给出样本统计量的置信区间
+                loader.file_info['quick'].update(loader.sample.totals(cleaned_df.index.to_numpy(), cleaned_df.columns))
+                analyzer.analysis['estimates'] = loader.sample.statistics(cleaned_df, cleaner.profile.numeric_cols)
+    finally:
+        # 列统计已在清洗和分析阶段完成，可视化只读取缓存，列并行的线程池与进程池在此释放
+        cleaner.profile.close()
+    return loader, cleaner, analyzer, cleaned_df, cleaner.profile
+
+
+def _choose_strategy(loader, max_memory):
+    """
+    --max-memory：加载前按文件大小和样本行的列类型估计内存模式的峰值内存，超过上限时改用流式模式，
+    块大小和去重方式按该上限确定。只有CSV支持流式模式。
+    """
+    if not loader.supports_chunks():
+        return
+    estimate = loader.estimate_peak_mb()
+    if estimate > max_memory:
+        loader.memory_budget = max_memory
+        print(f"预计内存模式峰值约 {estimate:.0f} MB，超过上限 {max_memory} MB，使用流式模式")
+    else:
+        print(f"预计内存模式峰值约 {estimate:.0f} MB，在上限 {max_memory} MB 以内，使用内存模式")
+
+
+def _use_external_dedup(loader, options):
+    """流式模式下是否外部去重：auto 时在内存去重集合的预计大小超过内存预算的一半时启用"""
+    if options.dedup != 'auto':
+        return options.dedup == 'external'
+    if not loader.memory_budget:
+        return False
+    external = loader.estimate_rows() * DEDUP_BYTES_PER_ROW > loader.memory_budget * 1024 ** 2 / 2
+    if external:
+        print("预计去重所需内存超过内存预算的一半，使用外部（分桶落盘）去重")
+    return external
+
+
+def _build_section(loader, cleaner, analyzer, cleaned_df, profile, output_dir, options, profiler):
+    """创建可视化并汇总一个数据集的报告数据"""
+    # 4. 创建可视化（--no-charts 时跳过，不导入绘图库）
+    visualizations, visualizer_issues = [], []
+    if not options.no_charts:
+        with profiler.stage('visualizer'):
+            from .visualizer import DataVisualizer
+
+            image_dir = os.path.join(output_dir, 'assets') if options.image_mode == 'files' else None
+            visualizer = DataVisualizer(cleaned_df, profile=profile, jobs=options.chart_jobs, image_dir=image_dir,
+                                        image_format=options.image_format, profiler=profiler,
+                                        rollups=analyzer.rollups, correlation=analyzer.correlation)
+            visualizer.create_visualizations()
+        visualizations, visualizer_issues = visualizer.visualizations, visualizer.issues
+
+    return {
+        'file_info': loader.file_info,
+        'cleaning': cleaner.cleaning,
+        'analysis': analyzer.analysis,
+        'visualizations': visualizations,
+        'issues': loader.issues + cleaner.issues + analyzer.issues + visualizer_issues
+    }
+
+
+def _combine_sections(sections):
+    """多个工作表的报告数据：各工作表的结果在 sheets 中，顶层为汇总（供批处理索引和报告总结使用）"""
+    first = sections[0]['file_info']
+    rows = sum(section['file_info']['original_shape'][0] for section in sections)
+    final_rows = sum(section['cleaning'].get('final_shape', (0, 0))[0] for section in sections)
+    return {
+        'file_info': {
+            'filename': first['filename'],
+            'file_type': first['file_type'],
+            'load_time': first['load_time'],
+            'original_shape': (rows, max(section['file_info']['original_shape'][1] for section in sections)),
+            'sheet_names': [section['file_info'].get('sheet') for section in sections]
+        },
+        'cleaning': {'final_shape': (final_rows, max(section['cleaning'].get('final_shape', (0, 0))[1]
+                                                     for section in sections))},
+        'analysis': {},
+        'visualizations': [vis for section in sections for vis in section['visualizations']],
+        'issues': [f"[{section['file_info'].get('sheet')}] {issue}" for section in sections
+                   for issue in section['issues']],
+        'sheets': sections
+    }
+
+
+def _write_report(report_data, output_dir, options, report_name, profiler):
+    # 5. 生成报告（报告生成本身的耗时只出现在控制台输出和 trace 文件中）
+    report_data['performance'] = {'memory_source': profiler.memory_source, 'records': profiler.summary()}
+
+    report_generator = ReportGenerator(output_dir)
+    with profiler.stage('reporter'):
+        report_path = report_generator.generate_report(report_data, report_name)
+    print(f"各阶段耗时与内存增长: {profiler.stage_line()}")
+
+    if report_path:
+        base_path = os.path.splitext(report_path)[0]
+        if options.trace:
+            print(f"trace 已导出: {profiler.export_trace(base_path + '.trace.json')}")
+        if options.profile:
+            cprofile_path = profiler.save_cprofile(f"{base_path}.{options.profile}.prof")
+            if cprofile_path:
+                print(f"cProfile 结果已保存: {cprofile_path}")
+    return report_path, report_data
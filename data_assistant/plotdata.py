@@ -0,0 +1,98 @@
+#绘图数据预聚合模块
+#在主进程中把整列数据聚合成分箱计数、KDE曲线或二维直方图，绘图时只处理这些固定大小的结果，
+#因此单个图表的绘制时间和图片大小不随数据行数增长。
+import numpy as np
+
+# 直方图分箱数上限
+MAX_BINS = 100
+# 拟合 KDE 使用的抽样点数上限
+KDE_SAMPLE_SIZE = 10000
+# KDE 曲线的取值点个数
+KDE_GRID_SIZE = 200
+# 散点矩阵中行数不超过该值时绘制全部散点，否则绘制二维直方图密度
+PAIR_MAX_POINTS = 5000
+# 二维直方图每个维度的分箱数
+PAIR_BINS = 50
+
+
+def finite_values(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+def reservoir_sample(values, size=KDE_SAMPLE_SIZE, seed=0):
+    """不放回的等概率抽样，行数不超过 size 时返回全部数据"""
+    if len(values) <= size:
+        return values
+    rng = np.random.default_rng(seed)
+    return values[rng.choice(len(values), size=size, replace=False)]
+
+
+def histogram(values, max_bins=MAX_BINS):
+    """按 numpy 'auto' 规则分箱（箱数不超过 max_bins），返回 (counts, edges)"""
+    edges = np.histogram_bin_edges(values, bins='auto')
+    if len(edges) - 1 > max_bins:
+        edges = np.histogram_bin_edges(values, bins=max_bins)
+    return np.histogram(values, bins=edges)
+
+
+def kde_curve(sample, low, high, grid_size=KDE_GRID_SIZE):
+    """
+    在 [low, high] 上计算高斯核密度曲线（Scott 带宽，与 seaborn 默认一致）。
+    样本过少或方差为 0 时返回 None。
+    """
+    if len(sample) < 2 or low == high:
+        return None
+    std = sample.std(ddof=1)
+    if std == 0:
+        return None
+    bandwidth = std * len(sample) ** (-1 / 5)
+    grid = np.linspace(low, high, grid_size)
+    density = np.zeros(grid_size)
+    # 分批计算，避免构造 样本数 × 取值点数 的大矩阵
+    for start in range(0, len(sample), 2000):
+        batch = sample[start:start + 2000]
+        density += np.exp(-0.5 * ((grid[:, None] - batch[None, :]) / bandwidth) ** 2).sum(axis=1)
+    density /= len(sample) * bandwidth * np.sqrt(2 * np.pi)
+    return grid, density
+
+
+def distribution_data(values):
+    """单列分布图数据：分箱计数，以及缩放到计数尺度的 KDE 曲线"""
+    values = finite_values(values)
+    if len(values) == 0:
+        return {'counts': np.zeros(0), 'edges': np.zeros(1), 'kde': None}
+    counts, edges = histogram(values)
+    kde = kde_curve(reservoir_sample(values), edges[0], edges[-1])
+    if kde is not None:
+        grid, density = kde
+        kde = (grid, density * len(values) * (edges[1] - edges[0]))
+    return {'counts': counts, 'edges': edges, 'kde': kde}
+
+
+def pair_data(df):
+    """
+    散点矩阵数据：对角线为各列的 KDE 曲线；非对角线在行数较少时为散点，否则为二维直方图。
+    """
+    columns = list(df.columns)
+    arrays = {col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in columns}
+    diagonal = {}
+    for col in columns:
+        values = finite_values(arrays[col])
+        diagonal[col] = kde_curve(reservoir_sample(values), values.min(), values.max()) if len(values) else None
+
+    dense = len(df) > PAIR_MAX_POINTS
+    cells = {}
+    for i, x_col in enumerate(columns):
+        for y_col in columns[i + 1:]:
+            x, y = arrays[x_col], arrays[y_col]
+            mask = np.isfinite(x) & np.isfinite(y)
+            if dense:
+                # 对称位置的单元格使用转置结果，每对列只统计一次
+                counts, x_edges, y_edges = np.histogram2d(x[mask], y[mask], bins=PAIR_BINS)
+                cells[(x_col, y_col)] = {'counts': counts, 'x_edges': x_edges, 'y_edges': y_edges}
+                cells[(y_col, x_col)] = {'counts': counts.T, 'x_edges': y_edges, 'y_edges': x_edges}
+            else:
+                cells[(x_col, y_col)] = {'x': x[mask], 'y': y[mask]}
+                cells[(y_col, x_col)] = {'x': y[mask], 'y': x[mask]}
+    return {'columns': columns, 'diagonal': diagonal, 'cells': cells, 'dense': dense}
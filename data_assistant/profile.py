@@ -0,0 +1,143 @@
+#列统计缓存模块
+import numpy as np
+import pandas as pd
+from .timeseries import build_rollups
+from .sketches import CategoryCounter
+from .correlation import Correlation
+from .parallel import ColumnExecutor, resolve_column_jobs
+
+# 缓存的分位点：清洗阶段的 IQR 边界和分析阶段的 describe 共用
+QUANTILES = [0.25, 0.5, 0.75]
+# 文本列分批计数的行数：高基数列超过唯一值阈值后改为草图，内存不随行数增长
+COUNT_BATCH_ROWS = 200000
+
+
+class DataProfile:
+    """
+    在清洗、分析、可视化之间共享的列统计缓存。
+    统计量在首次使用时逐列计算并缓存（宽表上按列并行）；清洗步骤修改数据后调用 update() 使相应缓存失效，
+    因此同一版本的数据上每个统计量只计算一次。
+    """
+
+    def __init__(self, df, jobs=None):
+        """
+        :param jobs: 列并行数（ColumnExecutor），None 表示按表的宽度和行数自动决定，1 表示不并行
+        """
+        self.df = df
+        self.executor = ColumnExecutor(resolve_column_jobs(jobs, df))   #逐列统计的执行器，清洗阶段复用
+        self.version = 0
+        self._frame_cache = {}      #整表级统计（列类型分组、相关系数矩阵）
+        self._column_cache = {}     #(统计名, 列名) -> 结果
+
+    def update(self, df=None, columns=None, keep=()):
+        """
+        数据修改后调用。
+        :param df: 修改后的 DataFrame（对象未变时可省略）
+        :param columns: 被修改的列；为 None 表示行或列结构发生变化，全部缓存失效
+        :param keep: 这些列上仍然有效的统计名
+        """
+        if df is not None:
+            self.df = df
+        self.version += 1
+        self._frame_cache = {}
+        if columns is None:
+            self._column_cache = {}
+            return
+        columns = set(columns)
+        self._column_cache = {key: value for key, value in self._column_cache.items()
+                              if key[1] not in columns or key[0] in keep}
+
+    def _frame(self, name, compute):
+        if name not in self._frame_cache:
+            self._frame_cache[name] = compute()
+        return self._frame_cache[name]
+
+    def _columns(self, name, cols, compute):
+        """按列缓存：只对尚未缓存的列调用 compute(列名)（由 executor 按列并行），返回 {列名: 结果}"""
+        pending = [col for col in cols if (name, col) not in self._column_cache]
+        for col, result in zip(pending, self.executor.map(compute, pending)):
+            self._column_cache[(name, col)] = result
+        return {col: self._column_cache[(name, col)] for col in cols}
+
+    def close(self):
+        """释放列并行的线程池与进程池，之后的统计逐列串行计算"""
+        self.executor.close()
+
+    # ---- 列类型分组 ----
+
+    @property
+    def numeric_cols(self):
+        return self._frame('numeric_cols', lambda: self.df.select_dtypes(include=np.number).columns)
+
+    @property
+    def categorical_cols(self):
+        return self._frame('categorical_cols',
+                           lambda: self.df.select_dtypes(exclude=[np.number, 'datetime']).columns)
+
+    @property
+    def datetime_cols(self):
+        return self._frame('datetime_cols', lambda: self.df.select_dtypes(include='datetime').columns)
+
+    # ---- 列统计 ----
+
+    def missing_counts(self, cols=None):
+        cols = list(self.df.columns if cols is None else cols)
+        result = self._columns('missing', cols, lambda col: int(self.df[col].isna().sum()))
+        return pd.Series(result, index=cols, dtype='int64')
+
+    def non_null_counts(self, cols=None):
+        cols = list(self.df.columns if cols is None else cols)
+        return len(self.df) - self.missing_counts(cols)
+
+    def quantiles(self, cols):
+        """数值列的 QUANTILES 分位数，返回以分位点为索引、列名为列的 DataFrame"""
+        cols = list(cols)
+        result = self._columns('quantiles', cols, lambda col: self.df[col].quantile(QUANTILES))
+        return pd.DataFrame(result, index=QUANTILES, columns=cols)
+
+    def numeric_stats(self, cols):
+        """数值列的均值、标准差、最小值、最大值（float64）"""
+        def compute(col):
+            series = self.df[col]
+            return pd.Series({'mean': series.mean(), 'std': series.std(),
+                              'min': series.min(), 'max': series.max()}, dtype='float64').to_dict()
+        return self._columns('numeric_stats', list(cols), compute)
+
+    def datetime_stats(self, cols):
+        """日期列的 describe 统计量（均值、最小值、分位数、最大值）"""
+        def compute(col):
+            series = self.df[col]
+            q1, q2, q3 = series.quantile(QUANTILES)
+            return {'mean': series.mean(), 'min': series.min(), '25%': q1, '50%': q2,
+                    '75%': q3, 'max': series.max()}
+        return self._columns('datetime_stats', list(cols), compute)
+
+    def category_counts(self, col):
+        """
+        分类列的 CategoryCounter：category 列由整数编码 bincount 精确计数；文本列分批计数，
+        唯一值超过阈值时改用 Space-Saving + HyperLogLog 近似。清洗（众数填充）、分析和可视化共用。
+        """
+        return self.category_counters([col])[col]
+
+    def category_counters(self, cols):
+        """多个分类列的 CategoryCounter（{列名: 计数结果}），尚未计数的列按列并行计数"""
+        def compute(col):
+            series = self.df[col]
+            counter = CategoryCounter()
+            step = len(series) if isinstance(series.dtype, pd.CategoricalDtype) else COUNT_BATCH_ROWS
+            for start in range(0, len(series), max(step, 1)):
+                counter.update(series.iloc[start:start + step])
+            return counter
+        return self._columns('category_counts', list(cols), compute)
+
+    def value_counts(self, col):
+        """按计数从大到小排列的非空值计数（高基数列为近似的高频值）"""
+        return self.category_counts(col).value_counts
+
+    def corr(self, method='pearson'):
+        """数值列的相关系数（Correlation：分块矩阵乘积计算，含最强变量对与热力图摘要）"""
+        return self._frame(f'corr_{method}', lambda: Correlation.from_frame(self.df[self.numeric_cols], method))
+
+    def time_rollups(self):
+        """每个日期列上所有数值列的 日/周/月 汇总（{日期列: TimeRollup}），分析和时间序列图表共用"""
+        return self._frame('time_rollups', lambda: build_rollups(self.df, self.datetime_cols, self.numeric_cols))
@@ -0,0 +1,192 @@
+#性能剖析模块
+import os
+import json
+import time
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from .utils import peak_rss_mb, current_rss_mb
+
+# 可以用 cProfile 单独剖析的阶段
+PROFILE_STAGES = ['loader', 'cleaner', 'analyzer', 'visualizer', 'reporter']
+# cProfile 结果打印的函数个数
+CPROFILE_TOP = 20
+
+
+class Profiler:
+    """
+    记录各阶段及其内部步骤（清洗步骤、单个图表）的耗时、CPU时间、峰值内存和内存增长。
+    峰值内存默认为进程峰值常驻内存(RSS)在该步骤内的增长量；trace_memory=True 时改用 tracemalloc
+    统计该步骤内 Python/NumPy 分配的峰值（更准确，但会明显拖慢运行）。
+    内存增长为步骤结束与开始时的内存之差（当前RSS；trace_memory=True 时为 tracemalloc 统计的当前分配量，
+    只反映启用跟踪后的分配），即该步骤留下的数据副本。
+    """
+
+    def __init__(self, trace_memory=False, cprofile_stage=None):
+        self.trace_memory = trace_memory
+        self.cprofile_stage = cprofile_stage        #用 cProfile 剖析的阶段名
+        self.records = []
+        self.cprofile = None
+        self.origin = time.perf_counter()
+        self._stack = []
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @property
+    def memory_source(self):
+        return 'tracemalloc' if self.trace_memory else 'rss'
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    # ---- 记录 ----
+
+    def _begin(self, category):
+        span = {'category': category, 'start': time.perf_counter(), 'cpu': time.process_time(), 'max_peak': 0}
+        if self.trace_memory:
+            # 嵌套步骤会重置 tracemalloc 的峰值，先把当前峰值记到外层步骤上
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['max_peak'] = max(self._stack[-1]['max_peak'], peak)
+            tracemalloc.reset_peak()
+            span['base'] = current
+            span['current'] = current / 1024 ** 2
+        else:
+            span['base'] = peak_rss_mb()
+            span['current'] = current_rss_mb()
+        self._stack.append(span)
+        return span
+
+    def _end(self, span, name):
+        self._stack.pop()
+        wall = time.perf_counter() - span['start']
+        cpu = time.process_time() - span['cpu']
+        if self.trace_memory:
+            peak = max(span['max_peak'], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]['max_peak'] = max(self._stack[-1]['max_peak'], peak)
+            peak_mb = (peak - span['base']) / 1024 ** 2
+            current = tracemalloc.get_traced_memory()[0] / 1024 ** 2
+        else:
+            rss = peak_rss_mb()
+            peak_mb = rss - span['base'] if rss is not None and span['base'] is not None else None
+            current = current_rss_mb()
+        growth_mb = current - span['current'] if current is not None and span['current'] is not None else None
+        self.add(name, span['category'], span['start'], wall, cpu, peak_mb, depth=len(self._stack),
+                 growth_mb=growth_mb)
+
+    def add(self, name, category, start, wall, cpu, peak_mb=None, pid=None, tid=None, depth=None, growth_mb=None):
+        """
+        添加一条记录（如子进程中绘制的图表）。
+        :param start: time.perf_counter() 时刻；同一台机器上各进程的单调时钟一致
+        """
+        self.records.append({
+            'name': name,
+            'category': category,
+            'depth': len(self._stack) if depth is None else depth,
+            'start': start - self.origin,
+            'wall': wall,
+            'cpu': cpu,
+            'peak_mb': peak_mb,
+            'growth_mb': growth_mb,
+            'pid': pid or os.getpid(),
+            'tid': tid or threading.get_native_id()
+        })
+
+    @contextmanager
+    def stage(self, name, category='stage'):
+        """记录一个阶段；阶段名为 cprofile_stage 时同时用 cProfile 剖析"""
+        span = self._begin(category)
+        profiler = None
+        if name == self.cprofile_stage:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.cprofile = profiler
+            self._end(span, name)
+
+    def laps(self, category):
+        """
+        按顺序记录一系列步骤而无需把每个步骤包在 with 块中：每次 mark(name) 记录从上一次 mark 到现在的步骤。
+        用完调用 close()（出错时丢弃未完成的步骤）。
+        """
+        return _Laps(self, category)
+
+    # ---- 输出 ----
+
+    def summary(self):
+        """供报告使用的记录（按开始时间排序，保留层级）"""
+        return [{
+            'name': record['name'],
+            'category': record['category'],
+            'depth': record['depth'],
+            'wall': round(record['wall'], 4),
+            'cpu': round(record['cpu'], 4),
+            'peak_mb': round(record['peak_mb'], 2) if record['peak_mb'] is not None else None,
+            'growth_mb': round(record['growth_mb'], 2) if record['growth_mb'] is not None else None
+        } for record in sorted(self.records, key=lambda record: (record['start'], record['depth']))]
+
+    def stage_line(self):
+        """各阶段的耗时和内存增长（如 'loader 1.20s +85.3MB'）"""
+        parts = []
+        for record in self.records:
+            if record['category'] != 'stage':
+                continue
+            growth = f" {record['growth_mb']:+.1f}MB" if record['growth_mb'] is not None else ''
+            parts.append(f"{record['name']} {record['wall']:.2f}s{growth}")
+        return ' | '.join(parts)
+
+    def export_trace(self, path):
+        """导出 Chrome trace-event 格式（可在 chrome://tracing 或 Perfetto 中打开）"""
+        events = []
+        for record in self.records:
+            events.append({
+                'name': record['name'],
+                'cat': record['category'],
+                'ph': 'X',
+                'ts': round(record['start'] * 1e6, 1),
+                'dur': round(record['wall'] * 1e6, 1),
+                'pid': record['pid'],
+                'tid': record['tid'],
+                'args': {'cpu_seconds': round(record['cpu'], 6), 'peak_mb': record['peak_mb'],
+                         'growth_mb': record['growth_mb'], 'memory_source': self.memory_source}
+            })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path
+
+    def save_cprofile(self, path):
+        """保存 cProfile 结果（可用 snakeviz 等工具查看）并打印累计耗时最多的函数"""
+        if self.cprofile is None:
+            return None
+        self.cprofile.dump_stats(path)
+        print(f"\n阶段 '{self.cprofile_stage}' 的 cProfile 结果（按累计耗时）:")
+        pstats.Stats(self.cprofile).sort_stats('cumulative').print_stats(CPROFILE_TOP)
+        return path
+
+
+class _Laps:
+    def __init__(self, profiler, category):
+        self.profiler = profiler
+        self.category = category
+        self._span = profiler._begin(category)
+
+    def mark(self, name):
+        self.profiler._end(self._span, name)
+        self._span = self.profiler._begin(self.category)
+
+    def close(self):
+        stack = self.profiler._stack
+        if self._span is not None and stack and stack[-1] is self._span:
+            stack.pop()
+        self._span = None
@@ -1,211 +1,473 @@
-#报告生成模块
-import os
-import jinja2
-from datetime import datetime
-from .utils import ensure_dir_exists
-
-class ReportGenerator:
-    def __init__(self, output_dir="reports"):
-        self.output_dir = ensure_dir_exists(output_dir)
-
-    def generate_report(self, report_data, report_name=None):
-        if not report_name:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            report_name = f"data_report_{timestamp}.html"
-
-        report_path = os.path.join(self.output_dir, report_name)
-
-        # 设置Jinja2环境
-        env = jinja2.Environment(loader=jinja2.FileSystemLoader(''))
-        template = env.get_template('report_template.html') if os.path.exists('report_template.html') else None
-
-        # 如果模板不存在，使用内置模板
-        if not template:
-            template = env.from_string("""
-            <!DOCTYPE html>
-            <html lang="zh-CN">
-            <head>
-                <meta charset="UTF-8">
-                <title>数据分析报告 - {{ report_data.file_info.filename }}</title>
-                <style>
-                    body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.6; color: #333; max-width: 1200px; margin: 0 auto; padding: 20px; }
-                    h1, h2, h3 { color: #2c3e50; }
-                    h1 { border-bottom: 2px solid #3498db; padding-bottom: 10px; }
-                    h2 { border-bottom: 1px solid #ecf0f1; padding-bottom: 5px; margin-top: 30px; }
-                    .section { background: white; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.05); padding: 20px; margin-bottom: 30px; }
-                    .info-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(300px, 1fr)); gap: 20px; }
-                    .info-card { background: #f8f9fa; border-left: 4px solid #3498db; padding: 15px; border-radius: 4px; }
-                    .visualization { margin: 20px 0; text-align: center; }
-                    .visualization img { max-width: 100%; border: 1px solid #eee; border-radius: 4px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }
-                    table { width: 100%; border-collapse: collapse; margin: 20px 0; }
-                    th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }
-                    th { background-color: #f8f9fa; font-weight: 600; }
-                    tr:hover { background-color: #f1f7fd; }
-                    .issue { background: #fff3cd; padding: 15px; border-radius: 4px; border-left: 4px solid #ffc107; margin: 10px 0; }
-                    .success { color: #28a745; }
-                    .warning { color: #ffc107; }
-                    .danger { color: #dc3545; }
-                </style>
-            </head>
-            <body>
-                <h1>数据分析报告</h1>
-                <p>生成时间: {{ report_data.file_info.load_time }}</p>
-
-                <div class="section">
-                    <h2>文件信息</h2>
-                    <div class="info-grid">
-                        <div class="info-card">
-                            <h3>文件详情</h3>
-                            <p><strong>文件名:</strong> {{ report_data.file_info.filename }}</p>
-                            <p><strong>文件类型:</strong> {{ report_data.file_info.file_type }}</p>
-                            <p><strong>原始大小:</strong> {{ report_data.file_info.original_shape[0] }} 行 × {{ report_data.file_info.original_shape[1] }} 列</p>
-                        </div>
-
-                        <div class="info-card">
-                            <h3>清洗结果</h3>
-                            <p><strong>移除行数:</strong> {{ report_data.cleaning.rows_removed }}</p>
-                            <p><strong>最终大小:</strong> {{ report_data.cleaning.final_shape[0] }} 行 × {{ report_data.cleaning.final_shape[1] }} 列</p>
-                        </div>
-                    </div>
-                </div>
-
-                {% if report_data.issues %}
-                <div class="section">
-                    <h2>问题与警告</h2>
-                    {% for issue in report_data.issues %}
-                    <div class="issue">{{ issue }}</div>
-                    {% endfor %}
-                </div>
-                {% endif %}
-
-                <div class="section">
-                    <h2>数据清洗步骤</h2>
-                    <ul>
-                        {% for step in report_data.cleaning.steps %}
-                        <li>{{ step }}</li>
-                        {% endfor %}
-                    </ul>
-
-                    {% if 'missing_report' in report_data.cleaning %}
-                    <h3>缺失值处理</h3>
-                    <table>
-                        <tr>
-                            <th>列名</th>
-                            <th>处理方式</th>
-                        </tr>
-                        {% for col, desc in report_data.cleaning.missing_report.items() %}
-                        <tr>
-                            <td>{{ col }}</td>
-                            <td>{{ desc }}</td>
-                        </tr>
-                        {% endfor %}
-                    </table>
-                    {% endif %}
-
-                    {% if 'outlier_report' in report_data.cleaning %}
-                    <h3>异常值处理</h3>
-                    <table>
-                        <tr>
-                            <th>列名</th>
-                            <th>下界</th>
-                            <th>上界</th>
-                            <th>处理异常值数量</th>
-                        </tr>
-                        {% for col, info in report_data.cleaning.outlier_report.items() %}
-                        <tr>
-                            <td>{{ col }}</td>
-                            <td>{{ info.lower_bound | round(2) }}</td>
-                            <td>{{ info.upper_bound | round(2) }}</td>
-                            <td>{{ info.outliers_count }}</td>
-                        </tr>
-                        {% endfor %}
-                    </table>
-                    {% endif %}
-                </div>
-
-                <div class="section">
-                    <h2>数据可视化</h2>
-                    {% for vis in report_data.visualizations %}
-                    <div class="visualization">
-                        <h3>{{ vis.title }}</h3>
-                        <img src="data:image/png;base64,{{ vis.image }}" alt="{{ vis.title }}">
-                    </div>
-                    {% endfor %}
-                </div>
-
-                <div class="section">
-                    <h2>数据分析摘要</h2>
-
-                    <h3>数值变量统计</h3>
-                    <table>
-                        <tr>
-                            <th>变量</th>
-                            <th>平均值</th>
-                            <th>标准差</th>
-                            <th>最小值</th>
-                            <th>25%分位数</th>
-                            <th>中位数</th>
-                            <th>75%分位数</th>
-                            <th>最大值</th>
-                        </tr>
-                        {% for col, stats in report_data.analysis.summary.items() %}
-                        {% if col in ['count', 'unique', 'top', 'freq'] %}{% else %}
-                        <tr>
-                            <td>{{ col }}</td>
-                            <td>{{ stats.get('mean', '') | round(2) }}</td>
-                            <td>{{ stats.get('std', '') | round(2) }}</td>
-                            <td>{{ stats.get('min', '') | round(2) }}</td>
-                            <td>{{ stats.get('25%', '') | round(2) }}</td>
-                            <td>{{ stats.get('50%', '') | round(2) }}</td>
-                            <td>{{ stats.get('75%', '') | round(2) }}</td>
-                            <td>{{ stats.get('max', '') | round(2) }}</td>
-                        </tr>
-                        {% endif %}
-                        {% endfor %}
-                    </table>
-
-                    {% if 'categorical' in report_data.analysis %}
-                    <h3>分类变量分析</h3>
-                    {% for col, info in report_data.analysis.categorical.items() %}
-                    <h4>{{ col }} ({{ info.unique_count }} 个唯一值)</h4>
-                    <table>
-                        <tr>
-                            <th>值</th>
-                            <th>计数</th>
-                        </tr>
-                        {% for value, count in info.top_values.items() %}
-                        <tr>
-                            <td>{{ value }}</td>
-                            <td>{{ count }}</td>
-                        </tr>
-                        {% endfor %}
-                    </table>
-                    {% endfor %}
-                    {% endif %}
-
-                    {% if 'time_series' in report_data.analysis %}
-                    <h3>时间序列信息</h3>
-                    {% for col, info in report_data.analysis.time_series.items() %}
-                    <p><strong>{{ col }}:</strong> 从 {{ info.min_date }} 到 {{ info.max_date }} (时长: {{ info.duration }})</p>
-                    {% endfor %}
-                    {% endif %}
-                </div>
-
-                <div class="section">
-                    <h2>总结</h2>
-                    <p>数据分析完成于 {{ report_data.file_info.load_time }}。报告包含 {{ report_data.visualizations | length }} 个可视化图表。</p>
-                    <p class="success">✓ 数据处理成功完成</p>
-                </div>
-            </body>
-            </html>
-            """)
-
-        # 渲染报告
-        html_output = template.render(report_data=report_data)
-
-        # 保存报告
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(html_output)
-
-        print(f"报告已生成: {report_path}")
-        return report_path
\ No newline at end of file
+#报告生成模块
+import os
+import json
+import jinja2
+from datetime import datetime
+from .utils import ensure_dir_exists
+from .cache import DEFAULT_CACHE_DIR
+
+# 当前目录下存在该文件时优先使用，否则使用内置模板
+CUSTOM_TEMPLATE = 'report_template.html'
+BUILTIN_TEMPLATE = '__builtin_report__.html'
+INDEX_TEMPLATE = '__builtin_index__.html'
+# 编译后模板的字节码缓存目录，新进程无需重新编译模板
+TEMPLATE_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'templates')
+# 流式写出报告时每次写入的模板片段数
+STREAM_BUFFER_SIZE = 64
+
+REPORT_TEMPLATE = """{% macro stat(value) %}{{ value | round(2) if value is number else value }}{% endmacro -%}
+{% macro interval(values) %}{{ stat(values[0]) }}{% if values[1] == values[1] %} [{{ stat(values[1]) }}, {{ stat(values[2]) }}]{% endif %}{% endmacro -%}
+{% macro count_interval(values) %}{{ values[0] | round | int }}{% if values[1] == values[1] %} [{{ values[1] | round | int }}, {{ values[2] | round | int }}]{% endif %}{% endmacro -%}
+{% set sample_methods = {'reservoir': '蓄水池抽样（完整扫描一遍）', 'byte_ranges': '按随机顺序读取与行首对齐的字节块', 'rows': '完整读取后逐行随机抽样'} -%}
+
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>数据分析报告 - {{ report_data.file_info.filename }}</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.6; color: #333; max-width: 1200px; margin: 0 auto; padding: 20px; }
+        h1, h2, h3 { color: #2c3e50; }
+        h1 { border-bottom: 2px solid #3498db; padding-bottom: 10px; }
+        h2 { border-bottom: 1px solid #ecf0f1; padding-bottom: 5px; margin-top: 30px; }
+        .section { background: white; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.05); padding: 20px; margin-bottom: 30px; }
+        .info-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(300px, 1fr)); gap: 20px; }
+        .info-card { background: #f8f9fa; border-left: 4px solid #3498db; padding: 15px; border-radius: 4px; }
+        .visualization { margin: 20px 0; text-align: center; }
+        .visualization img { max-width: 100%; border: 1px solid #eee; border-radius: 4px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f8f9fa; font-weight: 600; }
+        tr:hover { background-color: #f1f7fd; }
+        .issue { background: #fff3cd; padding: 15px; border-radius: 4px; border-left: 4px solid #ffc107; margin: 10px 0; }
+        .success { color: #28a745; }
+        .warning { color: #ffc107; }
+        .danger { color: #dc3545; }
+    </style>
+</head>
+<body>
+    <h1>数据分析报告</h1>
+    <p>生成时间: {{ report_data.file_info.load_time }}</p>
+
+    {# 多个工作表时每个工作表一节（各节中的 report_data 为该工作表的数据），否则整个文件为一节 #}
+    {% set sections = report_data.sheets if report_data.sheets is defined else [report_data] %}
+    {% if sections | length > 1 %}
+    <div class="section">
+        <h2>工作表</h2>
+        <p>{{ report_data.file_info.filename }} 共处理 {{ sections | length }} 个工作表:
+        {% for section in sections %}<a href="#sheet-{{ loop.index }}">{{ section.file_info.sheet }}</a>{% if not loop.last %}、{% endif %}{% endfor %}</p>
+    </div>
+    {% endif %}
+
+    {% for report_data in sections %}
+    {% if sections | length > 1 %}
+    <h1 id="sheet-{{ loop.index }}">工作表: {{ report_data.file_info.sheet }}</h1>
+    {% endif %}
+    <div class="section">
+        <h2>文件信息</h2>
+        <div class="info-grid">
+            <div class="info-card">
+                <h3>文件详情</h3>
+                <p><strong>文件名:</strong> {{ report_data.file_info.filename }}</p>
+                <p><strong>文件类型:</strong> {{ report_data.file_info.file_type }}</p>
+                {% if report_data.file_info.sheet %}
+                <p><strong>工作表:</strong> {{ report_data.file_info.sheet }}</p>
+                {% endif %}
+                {% if report_data.file_info.quick is defined %}
+                {% set quick = report_data.file_info.quick %}
+                <p><strong>样本大小:</strong> {{ report_data.file_info.original_shape[0] }} 行 × {{ report_data.file_info.original_shape[1] }} 列</p>
+                <p><strong>快速模式:</strong> {{ sample_methods[quick.method] }}，用时 {{ quick.seconds }} 秒，读取 {{ (quick.bytes_read / 1024 / 1024) | round(1) }} MB</p>
+                {% if quick.rows is defined %}
+                <p><strong>估计总行数:</strong> {{ count_interval(quick.rows) }}</p>
+                {% endif %}
+                {% else %}
+                <p><strong>原始大小:</strong> {{ report_data.file_info.original_shape[0] }} 行 × {{ report_data.file_info.original_shape[1] }} 列</p>
+                {% endif %}
+                {% if report_data.file_info.incremental is defined %}
+                {% set inc = report_data.file_info.incremental %}
+                {% if inc.mode == 'append' %}
+                <p><strong>增量分析:</strong> 新增 {{ inc.new_rows }} 行（字节 {{ inc.start_offset }} - {{ inc.end_offset }}），统计为累计近似结果</p>
+                {% else %}
+                <p><strong>增量分析:</strong> {{ inc.reason }}，已完整分析并保存状态</p>
+                {% endif %}
+                {% endif %}
+                {% if report_data.file_info.load_seconds is defined %}
+                <p><strong>解析器:</strong> {{ report_data.file_info.parser }}，<strong>加载耗时:</strong> {{ report_data.file_info.load_seconds }} 秒</p>
+                <p><strong>内存占用:</strong> {{ report_data.file_info.memory_mb }} MB{% if report_data.file_info.peak_rss_mb %}（进程峰值 {{ report_data.file_info.peak_rss_mb }} MB）{% endif %}</p>
+                {% endif %}
+            </div>
+
+            <div class="info-card">
+                <h3>清洗结果{% if report_data.file_info.quick is defined %}（样本）{% endif %}</h3>
+                <p><strong>移除行数:</strong> {{ report_data.cleaning.rows_removed }}</p>
+                <p><strong>最终大小:</strong> {{ report_data.cleaning.final_shape[0] }} 行 × {{ report_data.cleaning.final_shape[1] }} 列</p>
+            </div>
+        </div>
+    </div>
+
+    {% if report_data.issues %}
+    <div class="section">
+        <h2>问题与警告</h2>
+        {% for issue in report_data.issues %}
+        <div class="issue">{{ issue }}</div>
+        {% endfor %}
+    </div>
+    {% endif %}
+
+    <div class="section">
+        <h2>数据清洗步骤{% if report_data.file_info.quick is defined %}（基于样本）{% endif %}</h2>
+        <ul>
+            {% for step in report_data.cleaning.steps %}
+            <li>{{ step }}</li>
+            {% endfor %}
+        </ul>
+
+        {% if 'missing_report' in report_data.cleaning %}
+        <h3>缺失值处理</h3>
+        <table>
+            <tr>
+                <th>列名</th>
+                <th>处理方式</th>
+            </tr>
+            {% for col, desc in report_data.cleaning.missing_report.items() %}
+            <tr>
+                <td>{{ col }}</td>
+                <td>{{ desc }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+
+        {% if 'outlier_report' in report_data.cleaning %}
+        <h3>异常值处理</h3>
+        <table>
+            <tr>
+                <th>列名</th>
+                <th>下界</th>
+                <th>上界</th>
+                <th>处理异常值数量</th>
+            </tr>
+            {% for col, info in report_data.cleaning.outlier_report.items() %}
+            <tr>
+                <td>{{ col }}</td>
+                <td>{{ info.lower_bound | round(2) }}</td>
+                <td>{{ info.upper_bound | round(2) }}</td>
+                <td>{{ info.outliers_count }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+    </div>
+
+    {% if report_data.visualizations %}
+    <div class="section">
+        <h2>数据可视化{% if report_data.file_info.quick is defined %}（基于样本）{% endif %}</h2>
+        {% for vis in report_data.visualizations %}
+        <div class="visualization">
+            <h3>{{ vis.title }}</h3>
+            {% if vis.src %}
+            <img src="{{ vis.src }}" loading="lazy" alt="{{ vis.title }}">
+            {% else %}
+            <img src="data:{{ vis.mime or 'image/png' }};base64,{{ vis.image }}" alt="{{ vis.title }}">
+            {% endif %}
+        </div>
+        {% endfor %}
+    </div>
+    {% endif %}
+
+    <div class="section">
+        <h2>数据分析摘要{% if report_data.file_info.quick is defined %}（估计）{% endif %}</h2>
+
+        {% if report_data.file_info.quick is defined and report_data.file_info.quick.rows is defined %}
+        {% set quick = report_data.file_info.quick %}
+        <div class="issue">
+            快速模式：以下统计均为基于 {{ quick.sample_rows }} 行样本的估计值，
+            方括号内为 {{ (quick.confidence * 100) | round(0) | int }}% 置信区间（按抽样方案计算，不含清洗规则本身的偏差）
+        </div>
+        <h3>文件中的估计总数</h3>
+        <table>
+            <tr>
+                <th>项目</th>
+                <th>估计值 [置信区间]</th>
+            </tr>
+            <tr>
+                <td>总行数</td>
+                <td>{{ count_interval(quick.rows) }}</td>
+            </tr>
+            <tr>
+                <td>重复行（样本之外的重复无法观测，为下限估计）</td>
+                <td>{{ count_interval(quick.duplicates) }}</td>
+            </tr>
+            {% for col, values in quick.missing.items() %}
+            <tr>
+                <td>缺失值: {{ col }}</td>
+                <td>{{ count_interval(values) }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+
+        {% if 'accuracy' in report_data.analysis %}
+        {% set acc = report_data.analysis.accuracy %}
+        <div class="issue">
+            近似统计（{{ (acc.confidence * 100) | round(0) | int }}% 置信水平）：
+            分位数秩误差 ±{{ (acc.quantile_rank_error * 100) | round(2) }}%，
+            唯一值计数相对误差 ±{{ (acc.distinct_relative_error * 100) | round(2) }}%，
+            高频值计数最多高估 {{ acc.top_values_max_error }}
+        </div>
+        {% endif %}
+
+        <h3>数值变量统计</h3>
+        <table>
+            <tr>
+                <th>变量</th>
+                <th>平均值</th>
+                <th>标准差</th>
+                <th>最小值</th>
+                <th>25%分位数</th>
+                <th>中位数</th>
+                <th>75%分位数</th>
+                <th>最大值</th>
+            </tr>
+            {% set estimates = report_data.analysis.estimates or {} %}
+            {% for col, stats in report_data.analysis.summary.items() %}
+            {% if col in ['count', 'unique', 'top', 'freq'] %}{% else %}
+            {% set est = estimates.get(col, {}) %}
+            <tr>
+                <td>{{ col }}</td>
+                <td>{% if 'mean' in est %}{{ interval(est['mean']) }}{% else %}{{ stat(stats.get('mean', '')) }}{% endif %}</td>
+                <td>{{ stat(stats.get('std', '')) }}</td>
+                <td>{{ stat(stats.get('min', '')) }}</td>
+                {% for name in ['25%', '50%', '75%'] %}
+                <td>{% if name in est %}{{ interval(est[name]) }}{% else %}{{ stat(stats.get(name, '')) }}{% endif %}</td>
+                {% endfor %}
+                <td>{{ stat(stats.get('max', '')) }}</td>
+            </tr>
+            {% endif %}
+            {% endfor %}
+        </table>
+
+        {% if report_data.analysis.correlation and report_data.analysis.correlation.top_pairs %}
+        {% set corr = report_data.analysis.correlation %}
+        <h3>相关性最强的变量对</h3>
+        <p>{{ 'Spearman' if corr.method == 'spearman' else 'Pearson' }} 相关系数，共 {{ corr.column_count }} 个数值变量，按绝对值列出前 {{ corr.top_pairs | length }} 对</p>
+        <table>
+            <tr>
+                <th>变量</th>
+                <th>变量</th>
+                <th>相关系数</th>
+            </tr>
+            {% for pair in corr.top_pairs %}
+            <tr>
+                <td>{{ pair.left }}</td>
+                <td>{{ pair.right }}</td>
+                <td>{{ pair.r | round(2) }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+
+        {% if 'categorical' in report_data.analysis %}
+        <h3>分类变量分析</h3>
+        {% for col, info in report_data.analysis.categorical.items() %}
+        <h4>{{ col }} ({% if info.approx %}约 {% endif %}{{ info.unique_count }} 个唯一值{% if info.approx %}，高频值为近似计数{% endif %})</h4>
+        <table>
+            <tr>
+                <th>值</th>
+                <th>计数</th>
+            </tr>
+            {% for value, count in info.top_values.items() %}
+            <tr>
+                <td>{{ value }}</td>
+                <td>{{ count }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        {% endfor %}
+        {% endif %}
+
+        {% if 'time_series' in report_data.analysis %}
+        <h3>时间序列信息</h3>
+        {% for col, info in report_data.analysis.time_series.items() %}
+        <p><strong>{{ col }}:</strong> 从 {{ info.min_date }} 到 {{ info.max_date }} (时长: {{ info.duration }})</p>
+        {% if info.rollup %}
+        {% set rollup = info.rollup %}
+        <p>按{{ rollup.level }}汇总（共 {{ rollup.total_periods }} 个周期{% if rollup.total_periods > rollup.periods|length %}，显示最近 {{ rollup.periods|length }} 个{% endif %}，数值为 平均值 (最小值 ~ 最大值)）</p>
+        <table>
+            <tr>
+                <th>周期</th>
+                <th>行数</th>
+                {% for name in rollup.columns %}
+                <th>{{ name }}</th>
+                {% endfor %}
+            </tr>
+            {% for period in rollup.periods %}
+            {% set i = loop.index0 %}
+            <tr>
+                <td>{{ period }}</td>
+                <td>{{ rollup.rows[i] }}</td>
+                {% for name, values in rollup.columns.items() %}
+                <td>{{ stat(values.mean[i]) }} ({{ stat(values.min[i]) }} ~ {{ stat(values.max[i]) }})</td>
+                {% endfor %}
+            </tr>
+            {% endfor %}
+        </table>
+        {% endif %}
+        {% endfor %}
+        {% endif %}
+    </div>
+    {% endfor %}
+
+    {% if report_data.performance %}
+    <div class="section">
+        <h2>性能</h2>
+        <table>
+            <tr>
+                <th>阶段 / 步骤</th>
+                <th>耗时 (秒)</th>
+                <th>CPU时间 (秒)</th>
+                <th>{% if report_data.performance.memory_source == 'tracemalloc' %}峰值内存 (MB, tracemalloc){% else %}进程峰值内存增长 (MB, RSS){% endif %}</th>
+                <th>内存增长 (MB)</th>
+            </tr>
+            {% for row in report_data.performance.records %}
+            <tr>
+                <td style="padding-left: {{ 15 + row.depth * 24 }}px">{% if row.depth == 0 %}<strong>{{ row.name }}</strong>{% else %}{{ row.name }}{% endif %}</td>
+                <td>{{ row.wall }}</td>
+                <td>{{ row.cpu }}</td>
+                <td>{{ row.peak_mb if row.peak_mb is not none else '-' }}</td>
+                <td>{{ row.growth_mb if row.growth_mb is not none else '-' }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+    </div>
+    {% endif %}
+
+    <div class="section">
+        <h2>总结</h2>
+        <p>数据分析完成于 {{ report_data.file_info.load_time }}。报告包含 {{ report_data.visualizations | length }} 个可视化图表。</p>
+        <p class="success">✓ 数据处理成功完成</p>
+    </div>
+</body>
+</html>
+"""
+
+BATCH_INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>批处理报告索引</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; line-height: 1.6; color: #333; max-width: 1200px; margin: 0 auto; padding: 20px; }
+        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        th, td { padding: 10px 12px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f8f9fa; font-weight: 600; }
+        tr:hover { background-color: #f1f7fd; }
+        .success { color: #27ae60; }
+        .error { color: #e74c3c; }
+    </style>
+</head>
+<body>
+    <h1>批处理报告索引</h1>
+    <p>生成时间: {{ generated_at }}，共 {{ entries | length }} 个文件，成功 {{ ok_count }} 个，失败 {{ entries | length - ok_count }} 个，总耗时 {{ total_seconds }} 秒。</p>
+    <table>
+        <tr><th>文件</th><th>大小 (MB)</th><th>原始形状</th><th>清洗后形状</th><th>图表</th><th>问题</th><th>耗时 (秒)</th><th>状态</th></tr>
+        {% for entry in entries %}
+        <tr>
+            <td>{% if entry.report %}<a href="{{ entry.report }}">{{ entry.file }}</a>{% else %}{{ entry.file }}{% endif %}</td>
+            <td>{{ entry.size_mb }}</td>
+            <td>{{ entry.original_shape | join(' × ') if entry.original_shape }}</td>
+            <td>{{ entry.final_shape | join(' × ') if entry.final_shape }}</td>
+            <td>{{ entry.charts }}</td>
+            <td>{{ entry.issues | length if entry.issues is defined }}</td>
+            <td>{{ entry.seconds }}</td>
+            {% if entry.status == 'ok' %}
+            <td class="success">✓</td>
+            {% else %}
+            <td class="error">✗ {{ entry.error }}</td>
+            {% endif %}
+        </tr>
+        {% endfor %}
+    </table>
+</body>
+</html>
+"""
+
+_environment = None
+
+
+def get_environment():
+    """
+    进程内共享的 Jinja2 环境：编译后的模板保存在环境的缓存中，同一进程内多次生成报告只编译一次；
+    字节码缓存写入 TEMPLATE_CACHE_DIR，新进程直接加载。
+    """
+    global _environment
+    if _environment is None:
+        try:
+            os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+        except OSError:
+            bytecode_cache = None
+        loader = jinja2.ChoiceLoader([
+            jinja2.FileSystemLoader(''),
+            jinja2.DictLoader({BUILTIN_TEMPLATE: REPORT_TEMPLATE, INDEX_TEMPLATE: BATCH_INDEX_TEMPLATE})
+        ])
+        _environment = jinja2.Environment(loader=loader, bytecode_cache=bytecode_cache)
+    return _environment
+
+
+def get_report_template():
+    env = get_environment()
+    if os.path.exists(CUSTOM_TEMPLATE):
+        return env.get_template(CUSTOM_TEMPLATE)
+    return env.get_template(BUILTIN_TEMPLATE)
+
+
+class ReportGenerator:
+    def __init__(self, output_dir="reports"):
+        self.output_dir = ensure_dir_exists(output_dir)
+
+    def generate_report(self, report_data, report_name=None):
+        if not report_name:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            report_name = f"data_report_{timestamp}.html"
+
+        report_path = os.path.join(self.output_dir, report_name)
+
+        # 使用缓存的已编译模板（当前目录下的 report_template.html 优先，否则为内置模板）
+        template = get_report_template()
+
+        # 渲染报告：流式写入临时文件，不在内存中拼接完整的 HTML 字符串；渲染出错时不留下不完整的报告
+        stream = template.stream(report_data=report_data)
+        stream.enable_buffering(STREAM_BUFFER_SIZE)
+        tmp_path = report_path + '.tmp'
+        try:
+            stream.dump(tmp_path, encoding='utf-8')
+            os.replace(tmp_path, report_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        print(f"报告已生成: {report_path}")
+        return report_path
+
+    def generate_index(self, entries, total_seconds=None, index_name="index"):
+        """
+        生成批处理索引：index.json 保存每个文件的处理结果，index.html 汇总并链接各报告。
+        :param entries: batch.process_file 返回的记录列表
+        """
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ok_count = sum(entry['status'] == 'ok' for entry in entries)
+
+        json_path = os.path.join(self.output_dir, f"{index_name}.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'generated_at': generated_at, 'total_seconds': total_seconds, 'files': entries},
+                      f, ensure_ascii=False, indent=2)
+
+        html_path = os.path.join(self.output_dir, f"{index_name}.html")
+        template = get_environment().get_template(INDEX_TEMPLATE)
+        template.stream(entries=entries, ok_count=ok_count, total_seconds=total_seconds,
+                        generated_at=generated_at).dump(html_path, encoding='utf-8')
+
+        print(f"索引已生成: {html_path}")
+        return html_path
@@ -0,0 +1,250 @@
+#快速抽样模块
+#只需要大文件的大致情况时（--quick），不读取整个文件，而是在时间预算或行数预算内抽取样本，
+#清洗、分析和图表都在样本上进行；报告中的统计量标注为估计值，均值和分位数给出置信区间，
+#总行数、各列缺失值个数和重复行数给出估计总数。
+#小CSV文件一遍扫描做蓄水池抽样（逐行等概率，预计超出时间预算时改为字节块抽样）；大CSV文件按随机顺序读取与行首对齐的字节块，
+#每个字节块是一个群（整群抽样），方差按群计算，相邻行相关时置信区间仍然有效。
+import os
+import time
+import numpy as np
+from .streaming import ReservoirSampler
+from .profile import QUANTILES
+
+# 未指定时的时间预算（秒）与行数预算，先达到者为准
+QUICK_SECONDS = 5.0
+QUICK_SAMPLE_ROWS = 100000
+# 字节块抽样时每块的字节数；块越小，同样行数的样本分布越分散，估计越准确，但随机读取次数越多
+QUICK_BLOCK_BYTES = 64 * 1024
+# 不超过该大小的CSV文件完整扫描一遍做蓄水池抽样（总行数精确）；按已读比例推算的扫描用时超出时间预算时改为字节块抽样
+QUICK_SCAN_BYTES = 64 * 1024 * 1024
+# 蓄水池抽样时每次读取的行数，每读完一块检查一次时间预算
+QUICK_SCAN_CHUNK_ROWS = 10000
+# 置信区间的置信水平及对应的正态分位数
+CONFIDENCE = 0.95
+Z_SCORE = 1.959964
+
+
+def _interval(estimate, spread, lower=-np.inf):
+    """[估计值, 下限, 上限]；无法估计方差时上下限为 NaN"""
+    estimate = float(estimate)
+    if np.isnan(spread):
+        return [estimate, np.nan, np.nan]
+    return [estimate, float(max(estimate - spread, lower)), float(estimate + spread)]
+
+
+class QuickSample:
+    """
+    抽样方案与估计量。样本的每一行属于一个群：字节块抽样时为所在的字节块，逐行抽样时为该行自身；
+    总体共 population 个群，从中等概率不放回地抽取了 sampled 个（可能有不含数据行的群）。
+    总数用群合计的均值放大估计，均值与分位数用比率估计（线性化方差，分位数按 Woodruff 方法由比例的区间反推）。
+    """
+
+    def __init__(self, method, clusters, sampled, population, rows_total=None):
+        self.method = method                                #'reservoir' / 'byte_ranges' / 'rows'
+        self.clusters = np.asarray(clusters, dtype=np.int64)#样本每行所属群的编号（0 .. sampled-1）
+        self.sampled = sampled
+        self.population = population
+        self.rows_total = rows_total                        #已知的总行数（完整扫描或 Excel 完整读取时）
+        self.seconds = 0.0
+        self.bytes_read = 0
+        self._missing = None    #每个群中各列的缺失值个数（原始列名）
+        self._missing_rows = None   #各列缺失值所在的样本行位置（按列顺序），清洗时这些位置被填充
+        self._empty = None      #样本中整行为空的行
+
+    @classmethod
+    def from_rows(cls, method, sample_rows, total_rows):
+        """逐行等概率抽样：每行是一个群"""
+        return cls(method, np.arange(sample_rows), sample_rows, total_rows, rows_total=total_rows)
+
+    @property
+    def fraction(self):
+        return min(self.sampled / self.population, 1.0) if self.population else 1.0
+
+    def observe(self, df):
+        """记录加载后（清洗前）样本中每个群的缺失值个数和空行，用于估计文件中的缺失值与重复行总数"""
+        missing = df.isna()
+        self._missing = {col: self._sums(missing[col].to_numpy()) for col in df.columns}
+        self._missing_rows = [np.flatnonzero(missing[col].to_numpy()) for col in df.columns]
+        self._empty = missing.all(axis=1).to_numpy()
+
+    def _sums(self, values, rows=None):
+        """样本行上的取值按群求和；rows 为这些取值对应的样本行位置（清洗后的数据），默认为全部样本行"""
+        clusters = self.clusters if rows is None else self.clusters[rows]
+        return np.bincount(clusters, weights=np.asarray(values, dtype=np.float64), minlength=self.sampled)
+
+    def _total(self, sums):
+        """由各群合计估计总体合计"""
+        if self.sampled < 2:
+            spread = 0.0 if self.fraction >= 1 else np.nan
+        else:
+            spread = Z_SCORE * self.population * np.sqrt((1 - self.fraction) * sums.var(ddof=1) / self.sampled)
+        return _interval(self.population * sums.mean(), spread, lower=0.0)
+
+    def _ratio_spread(self, y, x, ratio):
+        """比率估计量 Σy/Σx 的置信区间半宽"""
+        if self.sampled < 2 or x.sum() == 0:
+            return 0.0 if self.fraction >= 1 else np.nan
+        variance = (1 - self.fraction) * (y - ratio * x).var(ddof=1) / (self.sampled * x.mean() ** 2)
+        return Z_SCORE * np.sqrt(variance)
+
+    def totals(self, kept, columns):
+        """
+        估计文件中的总行数、各列缺失值个数和重复行数。
+        :param kept: 清洗后保留的样本行位置（清洗后数据的索引）
+        :param columns: 清洗后的列名，与加载时的列一一对应
+        :return: 写入 file_info['quick'] 的估计总数，各项为 [估计值, 下限, 上限]
+        """
+        if self.rows_total is not None:
+            rows = [float(self.rows_total)] * 3
+        else:
+            rows = self._total(self._sums(np.ones(len(self.clusters))))
+        missing = {}
+        for raw, col in zip(self._missing, columns):
+            if self._missing[raw].sum() > 0:
+                missing[col] = self._total(self._missing[raw])
+        # 清洗删除的非空行即为重复行；样本之外的重复无法观测，估计值为下限
+        removed = np.ones(len(self.clusters), dtype=bool)
+        removed[kept] = False
+        duplicates = self._total(self._sums(removed & ~self._empty))
+        return {'rows': rows, 'missing': missing, 'duplicates': duplicates}
+
+    def statistics(self, df, numeric_cols):
+        """
+        清洗后样本中数值列的均值与四分位数的估计值及置信区间。
+        缺失值按样本中位数填充后在中位数处形成随样本变化的点质量，分位数的估计值和区间都只由清洗前已有的值计算。
+        :return: {列名: {'mean'/'25%'/'50%'/'75%': [估计值, 下限, 上限]}}，写入 analysis['estimates']
+        """
+        rows = df.index.to_numpy()
+        result = {}
+        for col in numeric_cols:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            if not present.any():
+                continue
+            x = self._sums(present, rows)
+            y = self._sums(np.where(present, values, 0.0), rows)
+            mean = y.sum() / x.sum()
+            estimates = {'mean': _interval(mean, self._ratio_spread(y, x, mean))}
+
+            filled = np.zeros(len(self.clusters), dtype=bool)
+            filled[self._missing_rows[df.columns.get_loc(col)]] = True
+            observed = present & ~filled[rows]
+            ordered = np.sort(values[observed])
+            x_observed = self._sums(observed, rows)
+            for p in QUANTILES:
+                q = float(np.quantile(ordered, p)) if len(ordered) else float(np.quantile(values[present], p))
+                below = observed & (values <= q)
+                share = below.sum() / max(observed.sum(), 1)
+                spread = self._ratio_spread(self._sums(below, rows), x_observed, share)
+                if np.isnan(spread) or not len(ordered):
+                    estimates[f"{p:.0%}"] = [q, np.nan, np.nan]
+                else:
+                    estimates[f"{p:.0%}"] = [q, float(np.quantile(ordered, max(share - spread, 0.0))),
+                                             float(np.quantile(ordered, min(share + spread, 1.0)))]
+            result[col] = estimates
+        return result
+
+    def describe(self):
+        """写入 file_info['quick'] 的抽样信息"""
+        return {
+            'method': self.method,
+            'sample_rows': len(self.clusters),
+            'sampled_clusters': self.sampled,
+            'population_clusters': self.population,
+            'fraction': round(self.fraction, 6),
+            'seconds': round(self.seconds, 3),
+            'bytes_read': self.bytes_read,
+            'confidence': CONFIDENCE
+        }
+
+
+def sample_rows(df, rows, seed=0):
+    """已完整读取的表（Excel）中等概率抽取 rows 行，保持原有先后顺序"""
+    total = len(df)
+    if total > rows:
+        keep = np.sort(np.random.default_rng(seed).choice(total, rows, replace=False))
+        df = df.take(keep)
+    return df.reset_index(drop=True), QuickSample.from_rows('rows', min(total, rows), total)
+
+
+def reservoir_sample(chunks, rows, seed=0, seconds=None, progress=None):
+    """
+    一遍扫描全部数据块的蓄水池抽样，同时得到精确的总行数。
+    :param seconds: 时间预算；每读完一块按已用时间和已读比例（progress() 的返回值）推算扫描全部数据的用时，
+                    超出预算时停止扫描并返回 None（改用字节块抽样）
+    :return: (样本, QuickSample)，超出时间预算时为 None
+    """
+    start_time = time.perf_counter()
+    sampler = ReservoirSampler(rows, seed)
+    total = 0
+    for chunk in chunks:
+        sampler.update(chunk)
+        total += len(chunk)
+        if seconds is not None:
+            done = progress() if progress is not None else 0.0
+            elapsed = time.perf_counter() - start_time
+            if done < 1 and elapsed / max(done, 1e-9) > seconds:
+                return None
+    sample = sampler.sample.reset_index(drop=True)
+    return sample, QuickSample.from_rows('reservoir', len(sample), total)
+
+
+def read_block(f, start, stop, data_start):
+    """读取行首位于 [start, stop) 的所有完整行：相邻字节块不重叠、不遗漏，每行恰好属于一个块"""
+    if start > data_start:
+        # 从 start - 1 读到换行符为止，之后的位置即 start 处或之后的第一个行首
+        f.seek(start - 1)
+        f.readline()
+    else:
+        f.seek(start)
+    pos = f.tell()
+    if pos >= stop:
+        return b''
+    data = f.read(stop - pos)
+    if data and not data.endswith(b'\n'):
+        data += f.readline()
+    return data
+
+
+def count_rows(data):
+    """数据行数（read_csv 跳过空行）"""
+    return sum(1 for line in data.split(b'\n') if line.strip())
+
+
+def read_byte_ranges(file_path, end, rows, seconds, seed=0):
+    """
+    把表头之后、end 之前的数据划分为 QUICK_BLOCK_BYTES 字节的块，按随机顺序读取，
+    直到样本达到 rows 行、用时超过 seconds 秒或全部块读完（至少读取一块）。
+    :return: (表头 + 抽中各块的字节, 各块的数据行数, 块总数)
+    """
+    start_time = time.perf_counter()
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        data_start = len(header)
+        population = max(-(-(end - data_start) // QUICK_BLOCK_BYTES), 1)
+        parts, counts = [header], []
+        for block in np.random.default_rng(seed).permutation(population):
+            start = data_start + int(block) * QUICK_BLOCK_BYTES
+            data = read_block(f, start, min(start + QUICK_BLOCK_BYTES, end), data_start)
+            parts.append(data)
+            counts.append(count_rows(data))
+            if sum(counts) >= rows or time.perf_counter() - start_time >= seconds:
+                break
+    return b''.join(parts), counts, population
+
+
+def byte_range_plan(counts, population, parsed_rows):
+    """
+    由各块的行数构造整群抽样方案。解析得到的行数与按换行符统计的不一致时（如引号内含换行的字段），
+    无法把行对应到块，改为按逐行抽样近似，总体行数按块的平均行数估计。
+    :return: (QuickSample, 行数是否一致)
+    """
+    if sum(counts) == parsed_rows:
+        clusters = np.repeat(np.arange(len(counts)), counts)
+        return QuickSample('byte_ranges', clusters, len(counts), population), True
+    estimated = max(int(round(population * parsed_rows / max(len(counts), 1))), parsed_rows)
+    return QuickSample('byte_ranges', np.arange(parsed_rows), parsed_rows, estimated), False
+
+
+def use_reservoir(file_path):
+    return os.path.getsize(file_path) <= QUICK_SCAN_BYTES
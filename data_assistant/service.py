@@ -0,0 +1,307 @@
+#常驻服务模块
+#交互式使用时反复启动命令行，每次都要重新导入 pandas/matplotlib、设置字体、编译报告模板。
+#常驻服务在本机 HTTP 端口上运行：工作进程启动时完成这些准备并一直复用，分析任务在有界进程池中排队执行；
+#结果按 输入文件指纹 + 分析选项 缓存，相同的请求直接返回已有报告，正在执行的相同请求合并为一个任务。
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as urlrequest
+from urllib.error import HTTPError, URLError
+from .cache import file_fingerprint
+from .main import build_parser, run
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# 排队和执行中的任务数上限，超出时拒绝新任务（HTTP 503）
+DEFAULT_MAX_QUEUE = 64
+# 结果缓存保存的报告数，以及保留状态可供查询的已完成任务数
+RESULT_CACHE_SIZE = 1024
+JOB_HISTORY_SIZE = 1024
+# 参与缓存键的路径选项，按请求方的工作目录转换为绝对路径
+PATH_OPTIONS = ('output', 'cache_dir', 'state_dir')
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def _init_worker():
+    """工作进程初始化：导入处理流程和绘图库、设置中文字体、加载字体列表并编译报告模板，之后的任务直接复用"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+    import seaborn  # noqa: F401
+    from . import pipeline, visualizer  # noqa: F401
+    from .reporter import get_report_template
+    from .utils import set_chinese_font
+    set_chinese_font()
+    font_manager.findfont(font_manager.FontProperties())
+    get_report_template()
+
+
+def _warm_up():
+    """启动时提交给每个工作进程的空任务，使进程池立即创建全部进程并完成初始化"""
+    return os.getpid()
+
+
+def run_job(argv, cwd, report_name=None):
+    """
+    在工作进程中执行一次分析，与命令行运行相同（main.run）。
+    :param argv: 命令行参数列表
+    :param cwd: 请求方的工作目录，参数中的相对路径相对于该目录
+    :return: 报告的绝对路径，失败时返回 None
+    """
+    os.chdir(cwd)
+    args = build_parser().parse_args(argv)
+    args.service = None
+    # 任务之间已经并行，未指定时每个任务内部不再启动绘图进程池，也不再按列并行
+    if args.chart_jobs is None:
+        args.chart_jobs = 1
+    if args.column_jobs is None:
+        args.column_jobs = 1
+    report_path = run(args, report_name)
+    return os.path.abspath(report_path) if report_path else None
+
+
+def parse_job(argv, cwd):
+    """
+    解析并检查任务参数。
+    :return: (参数, 缓存键)；输入不是单个文件（批处理）时缓存键为 None
+    :raises ValueError: 参数错误
+    """
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit:
+        raise ValueError(f"参数错误: {' '.join(argv)}")
+    if len(args.file) != 1:
+        return args, None
+    file_path = os.path.join(cwd, args.file[0])
+    if not os.path.isfile(file_path):
+        return args, None
+    options = {key: value for key, value in vars(args).items() if key not in ('file', 'service')}
+    for key in PATH_OPTIONS:
+        options[key] = os.path.abspath(os.path.join(cwd, options[key]))
+    return args, file_fingerprint(file_path, options)
+
+
+class AnalysisService:
+    """
+    任务队列与结果缓存。任务在有界进程池中执行，进程在服务运行期间复用；
+    单文件任务按缓存键去重，报告以缓存键命名，不同选项的报告互不覆盖。
+    """
+
+    def __init__(self, workers=None, max_queue=DEFAULT_MAX_QUEUE):
+        self.workers = max(workers or os.cpu_count() or 1, 1)
+        self.max_queue = max_queue
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        self.jobs = OrderedDict()
+        self.results = OrderedDict()    # 缓存键 -> 报告路径
+        self.running = {}               # 缓存键 -> 执行中的任务ID
+        self.lock = threading.Lock()
+
+    def warm_up(self):
+        """创建全部工作进程并等待初始化完成"""
+        for future in [self.executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, argv, cwd):
+        """
+        提交任务：缓存中已有报告时直接返回已完成的任务，相同的任务正在执行时返回该任务。
+        :raises ValueError: 参数错误
+        :raises QueueFullError: 排队任务已达上限
+        """
+        args, key = parse_job(argv, cwd)
+        with self.lock:
+            report = self.results.get(key) if key else None
+            if report and os.path.exists(report):
+                self.results.move_to_end(key)
+                return self._add_job({'status': 'done', 'report': report, 'cached': True, 'seconds': 0.0})
+            if key in self.running:
+                return self.jobs[self.running[key]]
+            pending = sum(not job['future'].done() for job in self.jobs.values() if job.get('future'))
+            if pending >= self.max_queue:
+                raise QueueFullError(f"排队任务已达上限 ({self.max_queue})，请稍后再试")
+
+            report_name = None
+            if key:
+                stem = os.path.splitext(os.path.basename(args.file[0]))[0]
+                report_name = f"{stem}_{key[:12]}.html"
+            job = self._add_job({'status': 'queued', 'report': None, 'cached': False, 'key': key,
+                                 'started': time.perf_counter()})
+            if key:
+                self.running[key] = job['id']
+            job['future'] = self.executor.submit(run_job, list(argv), cwd, report_name)
+        job['future'].add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _add_job(self, fields):
+        job = {'id': uuid.uuid4().hex[:12], 'error': None, 'finished': threading.Event()}
+        job.update(fields)
+        if job['status'] in ('done', 'failed'):
+            job['finished'].set()
+        self.jobs[job['id']] = job
+        # 只保留最近的已完成任务
+        while len(self.jobs) > JOB_HISTORY_SIZE:
+            oldest = next(iter(self.jobs.values()))
+            if oldest['status'] not in ('done', 'failed'):
+                break
+            self.jobs.popitem(last=False)
+        return job
+
+    def _finish(self, job, future):
+        try:
+            report = future.result()
+            error = None if report else "数据处理失败"
+        except Exception as e:
+            report, error = None, str(e)
+        with self.lock:
+            job.update({'status': 'done' if report else 'failed', 'report': report, 'error': error,
+                        'seconds': round(time.perf_counter() - job['started'], 3)})
+            key = job['key']
+            if key:
+                self.running.pop(key, None)
+                if report:
+                    self.results[key] = report
+                    while len(self.results) > RESULT_CACHE_SIZE:
+                        self.results.popitem(last=False)
+        job['finished'].set()
+
+    def wait(self, job, timeout=None):
+        """等待任务完成（_finish 更新状态后设置 finished 事件）"""
+        job['finished'].wait(timeout)
+        return job
+
+    def describe(self, job):
+        """任务状态（JSON）"""
+        status = job['status']
+        if status == 'queued' and job.get('future') and job['future'].running():
+            status = 'running'
+        return {'id': job['id'], 'status': status, 'report': job['report'], 'error': job['error'],
+                'cached': job['cached'], 'seconds': job.get('seconds')}
+
+    def health(self):
+        with self.lock:
+            pending = sum(not job['future'].done() for job in self.jobs.values() if job.get('future'))
+            return {'status': 'ok', 'workers': self.workers, 'pending': pending, 'cached_reports': len(self.results)}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    POST /jobs       {"argv": [命令行参数], "cwd": 工作目录, "wait": 是否等待完成} -> 任务状态
+    GET  /jobs/<id>  任务状态：queued / running / done / failed，完成时包含报告路径
+    GET  /health     服务状态
+    """
+
+    def _reply(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/health':
+            self._reply(200, service.health())
+        elif self.path.startswith('/jobs/'):
+            with service.lock:
+                job = service.jobs.get(self.path[len('/jobs/'):])
+                data = service.describe(job) if job is not None else None
+            if data is None:
+                self._reply(404, {'error': "任务不存在"})
+            else:
+                self._reply(200, data)
+        else:
+            self._reply(404, {'error': "未知路径"})
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path != '/jobs':
+            self._reply(404, {'error': "未知路径"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            argv = [str(arg) for arg in payload.get('argv', [])]
+            job = service.submit(argv, payload.get('cwd') or os.getcwd())
+        except (ValueError, TypeError, AttributeError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except QueueFullError as e:
+            self._reply(503, {'error': str(e)})
+            return
+        if payload.get('wait'):
+            service.wait(job)
+        with service.lock:
+            data = service.describe(job)
+        self._reply(200 if data['status'] in ('done', 'failed') else 202, data)
+
+
+def submit_job(url, argv, wait=True):
+    """
+    命令行客户端：把参数提交给常驻服务并打印结果。
+    :return: 报告路径，失败时返回 None
+    """
+    payload = json.dumps({'argv': list(argv), 'cwd': os.getcwd(), 'wait': wait}).encode('utf-8')
+    req = urlrequest.Request(url.rstrip('/') + '/jobs', data=payload, headers={'Content-Type': 'application/json'})
+    try:
+        with urlrequest.urlopen(req) as response:
+            job = json.load(response)
+    except HTTPError as e:
+        print(f"\n❌ 服务拒绝任务: {json.load(e).get('error')}")
+        return None
+    except URLError as e:
+        print(f"\n❌ 无法连接常驻服务 {url}: {e.reason}")
+        return None
+
+    if job['status'] == 'done':
+        source = "（缓存）" if job['cached'] else f"（{job['seconds']} 秒）"
+        print(f"\n✅ 数据处理完成{source}！报告已保存至: {job['report']}")
+        return job['report']
+    if job['status'] == 'failed':
+        print(f"\n❌ 数据处理失败: {job['error']}")
+    else:
+        print(f"任务已提交: {job['id']}，查询状态: {url.rstrip('/')}/jobs/{job['id']}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据处理小助手 - 常驻分析服务（仅监听本机地址）')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='监听地址')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数（默认为CPU核数）')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help='排队和执行中的任务数上限，超出时拒绝新任务')
+    args = parser.parse_args()
+
+    service = AnalysisService(workers=args.workers, max_queue=args.max_queue)
+    start = time.perf_counter()
+    service.warm_up()
+    print(f"工作进程已就绪: {service.workers} 个 ({time.perf_counter() - start:.1f} 秒)")
+
+    server = ThreadingHTTPServer((args.host, args.port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"常驻服务已启动: http://{args.host}:{server.server_address[1]}")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务已停止")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
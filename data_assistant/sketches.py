@@ -0,0 +1,565 @@
+#可合并统计草图模块
+#每种草图都支持 update（逐块累计）、merge（合并不同块/分区的结果）和 to_dict/from_dict（序列化），
+#因此统计可以在数据流上或多个进程中并行计算，内存占用与行数无关。
+import numpy as np
+import pandas as pd
+from .timeseries import TimeRollup
+from .streaming import count_values, factorized_counts, merge_counts, mode_from_counts
+
+# KLL 分位数草图参数：k 越大越精确
+KLL_K = 200
+# HyperLogLog 寄存器位数：2^14 个寄存器，标准误差 1.04/sqrt(2^14) ≈ 0.81%
+HLL_P = 14
+# Space-Saving 计数器个数，远大于需要的 top-10 以保证前几名准确
+TOPK_CAPACITY = 1000
+# 分类列唯一值超过该数量时不再精确计数，改用 Space-Saving + HyperLogLog（内存模式下也不再编码为 category）
+CATEGORY_MAX_CARDINALITY = 100000
+# 误差界使用的置信水平对应的 z 值（99%）
+Z_99 = 2.576
+
+
+class Moments:
+    """Welford/Chan 算法累计计数、均值、方差、最小值与最大值"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        batch = Moments()
+        batch.count = len(values)
+        batch.mean = values.mean()
+        batch.m2 = ((values - batch.mean) ** 2).sum()
+        batch.min = values.min()
+        batch.max = values.max()
+        self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments.count, moments.mean, moments.m2 = data['count'], data['mean'], data['m2']
+        moments.min, moments.max = data['min'], data['max']
+        return moments
+
+
+class CoMoments:
+    """多列协方差矩阵的可合并累计（Chan 算法的矩阵形式），用于计算相关系数"""
+
+    def __init__(self, size):
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.comoment = np.zeros((size, size))
+
+    def update(self, x):
+        """x 为二维数组，含 NaN 的行被跳过"""
+        x = np.asarray(x, dtype=np.float64)
+        x = x[~np.isnan(x).any(axis=1)]
+        if len(x) == 0:
+            return
+        batch = CoMoments(x.shape[1])
+        batch.count = len(x)
+        batch.mean = x.mean(axis=0)
+        centered = x - batch.mean
+        batch.comoment = centered.T @ centered
+        self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.count * other.count / count
+        self.mean = self.mean + delta * other.count / count
+        self.count = count
+
+    def corr(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(np.diag(self.comoment))
+            return np.clip(self.comoment / np.outer(std, std), -1, 1)
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean.tolist(), 'comoment': self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        comoments = cls(len(data['mean']))
+        comoments.count = data['count']
+        comoments.mean = np.array(data['mean'], dtype=np.float64)
+        comoments.comoment = np.array(data['comoment'], dtype=np.float64)
+        return comoments
+
+
+class KLLSketch:
+    """
+    KLL 分位数草图。第 h 层每个元素代表 2^h 个原始值，层满时排序后随机保留奇数位或偶数位元素提升到上一层。
+    每次压缩对任意查询的秩误差为 0 或 ±2^h（等概率），据此累计误差方差给出秩误差界。
+    未发生压缩时结果与 np.quantile 完全一致。
+    """
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self.error_var = 0.0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # 元素个数为奇数时最大的一个留在本层
+                pairs = len(level) // 2 * 2
+                offset = self._rng.integers(2)
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], level[offset:pairs:2]])
+                self.levels[h] = level[pairs:]
+                self.error_var += float(2 ** h) ** 2
+            h += 1
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self.error_var += other.error_var
+        self._compress()
+
+    def quantiles(self, qs):
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cum_weights = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum_weights, np.asarray(qs) * cum_weights[-1], side='left')
+        return items[np.minimum(idx, len(items) - 1)]
+
+    @property
+    def rank_error(self):
+        """99% 置信水平下的归一化秩误差（占总数的比例）"""
+        return Z_99 * np.sqrt(self.error_var) / self.n if self.n else 0.0
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'error_var': self.error_var,
+                'levels': [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.n = data['n']
+        sketch.error_var = data['error_var']
+        sketch.levels = [np.array(level, dtype=np.float64) for level in data['levels']]
+        return sketch
+
+
+def _clz64(x):
+    """逐元素统计 uint64 的前导零个数"""
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = (x >> np.uint64(64 - shift)) == 0
+        zeros[mask] += shift
+        x[mask] <<= np.uint64(shift)
+    return zeros
+
+
+def hash_values(series):
+    """非空值的 64 位哈希，与列的存储类型（object/category）无关"""
+    return pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy()
+
+
+def hash_unique(values):
+    """各不相同的非空值的 64 位哈希（与 hash_values 的结果一致，省去其中按值去重的步骤）"""
+    return pd.util.hash_array(np.asarray(values), categorize=False)
+
+
+def batch_counts(series, capacity):
+    """
+    一块数据中计数最高的值（按计数从大到小，最多 capacity + 1 个，多出的一个供 Space-Saving 确定下限）
+    以及该块各个不同值的 64 位哈希（供 HyperLogLog 使用）。计数来自整数编码的 bincount，只对不同值哈希。
+    """
+    counts, uniques = factorized_counts(series)
+    hashes = hash_unique(uniques)
+    if len(counts) > capacity + 1:
+        keep = np.argpartition(-counts, capacity + 1)[:capacity + 1]
+        keep = keep[np.lexsort((keep, -counts[keep]))]
+    else:
+        keep = np.argsort(-counts, kind='stable')
+    return pd.Series(counts[keep], index=uniques[keep], dtype='int64'), hashes
+
+
+class HyperLogLog:
+    """HyperLogLog 唯一值计数，小基数时使用线性计数修正"""
+
+    def __init__(self, p=HLL_P):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, series):
+        self.update_hashes(hash_values(series))
+
+    def update_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # 低位补一个哨兵位，保证前导零个数不超过 64 - p
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        np.maximum.at(self.registers, idx, _clz64(rest) + 1)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def relative_error(self):
+        """99% 置信水平下的相对误差"""
+        return Z_99 * 1.04 / np.sqrt(len(self.registers))
+
+    def to_dict(self):
+        return {'p': self.p, 'registers': self.registers.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['p'])
+        sketch.registers = np.array(data['registers'], dtype=np.uint8)
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Space-Saving 高频值计数。保存最多 capacity 个计数器，每个计数是真实频数的上界，
+    error 为高估量上界；未保存的值频数不超过 floor。
+    """
+
+    def __init__(self, capacity=TOPK_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.floor = 0
+
+    def update(self, series):
+        self.merge(SpaceSaving.from_counts(batch_counts(series, self.capacity)[0], self.capacity))
+
+    @classmethod
+    def from_counts(cls, counts, capacity=TOPK_CAPACITY):
+        """由精确计数结果（按计数从大到小排列）构建"""
+        sketch = cls(capacity)
+        sketch.counts = counts.astype('int64')
+        sketch.errors = pd.Series(0, index=counts.index, dtype='int64')
+        sketch._truncate(0)
+        return sketch
+
+    def merge(self, other):
+        keys = self.counts.index.union(other.counts.index, sort=False)
+        counts = (self.counts.reindex(keys, fill_value=self.floor)
+                  + other.counts.reindex(keys, fill_value=other.floor))
+        errors = (self.errors.reindex(keys, fill_value=self.floor)
+                  + other.errors.reindex(keys, fill_value=other.floor))
+        self.counts = counts.sort_values(ascending=False, kind='stable').astype('int64')
+        self.errors = errors.reindex(self.counts.index).astype('int64')
+        self._truncate(self.floor + other.floor)
+
+    def _truncate(self, floor):
+        if len(self.counts) > self.capacity:
+            floor = max(floor, int(self.counts.iloc[self.capacity]))
+            self.counts = self.counts.iloc[:self.capacity]
+            self.errors = self.errors.iloc[:self.capacity]
+        self.floor = floor
+
+    def top(self, k=10):
+        return self.counts.head(k)
+
+    def max_error(self, k=10):
+        return int(self.errors.head(k).max()) if len(self.errors) else 0
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'floor': self.floor,
+                'items': [[key, int(count), int(self.errors[key])] for key, count in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.floor = data['floor']
+        keys = [item[0] for item in data['items']]
+        sketch.counts = pd.Series([item[1] for item in data['items']], index=keys, dtype='int64')
+        sketch.errors = pd.Series([item[2] for item in data['items']], index=keys, dtype='int64')
+        return sketch
+
+
+class CategoryCounter:
+    """
+    分类列计数：唯一值不超过 max_cardinality 时精确累计各值的计数；超过后把已有计数转为
+    Space-Saving 高频值草图和 HyperLogLog 唯一值计数，此后内存占用固定（适用于 ID 类高基数列）。
+    """
+
+    def __init__(self, max_cardinality=CATEGORY_MAX_CARDINALITY, capacity=TOPK_CAPACITY, p=HLL_P):
+        self.max_cardinality = max_cardinality
+        self.capacity = capacity
+        self.p = p
+        self.counts = None      #精确计数（未排序）
+        self.topk = None        #超过阈值后的 SpaceSaving
+        self.distinct_sketch = None
+
+    def update(self, series):
+        if self.topk is not None:
+            counts, hashes = batch_counts(series, self.capacity)
+            self.topk.merge(SpaceSaving.from_counts(counts, self.capacity))
+            self.distinct_sketch.update_hashes(hashes)
+            return
+        self.counts = merge_counts(self.counts, count_values(series))
+        if len(self.counts) > self.max_cardinality:
+            counts = self.value_counts
+            self.topk = SpaceSaving.from_counts(counts, self.capacity)
+            # HyperLogLog 与重复次数无关，用已出现的各个值初始化即可
+            self.distinct_sketch = HyperLogLog(self.p)
+            self.distinct_sketch.update_hashes(hash_unique(counts.index))
+            self.counts = None
+
+    def add(self, value, count):
+        """计入 count 个 value（如缺失值按众数填充后），不必重新扫描整列"""
+        counts = pd.Series([count], index=[value], dtype='int64')
+        if self.topk is not None:
+            self.topk.merge(SpaceSaving.from_counts(counts, self.capacity))
+        else:
+            self.counts = merge_counts(self.counts, counts)
+
+    @property
+    def approx(self):
+        return self.topk is not None
+
+    @property
+    def value_counts(self):
+        """按计数从大到小排列的计数；近似时只包含草图中保留的高频值"""
+        if self.topk is not None:
+            return self.topk.counts
+        if self.counts is None:
+            return pd.Series(dtype='int64')
+        return self.counts.sort_values(ascending=False, kind='stable').astype('int64')
+
+    @property
+    def distinct(self):
+        if self.topk is not None:
+            return self.distinct_sketch.count()
+        return 0 if self.counts is None else len(self.counts)
+
+    def mode(self):
+        return mode_from_counts(self.value_counts)
+
+
+class StatsEngine:
+    """
+    按列组合上述草图的统计引擎：数值列和日期列使用 Moments + KLL，分类列使用 HyperLogLog + Space-Saving，
+    数值列之间的相关性使用 CoMoments，日期列上各数值列的按日汇总使用 TimeRollup。列类型由第一个数据块确定。
+    """
+
+    def __init__(self, k=KLL_K, p=HLL_P, capacity=TOPK_CAPACITY):
+        self.k = k
+        self.p = p
+        self.capacity = capacity
+        self.columns = None
+        self.numeric_cols = []
+        self.categorical_cols = []
+        self.datetime_cols = []
+        self.non_null = {}
+        self.moments = {}
+        self.quantiles = {}
+        self.distinct = {}
+        self.topk = {}
+        self.comoments = None
+        self.rollups = {}
+
+    def _init_columns(self, chunk):
+        self.columns = list(chunk.columns)
+        self.numeric_cols = list(chunk.select_dtypes(include=np.number).columns)
+        self.categorical_cols = list(chunk.select_dtypes(exclude=[np.number, 'datetime']).columns)
+        self.datetime_cols = list(chunk.select_dtypes(include='datetime').columns)
+        self._init_sketches()
+
+    def _init_sketches(self):
+        self.non_null = dict.fromkeys(self.columns, 0)
+        self.moments = {col: Moments() for col in self.numeric_cols + self.datetime_cols}
+        self.quantiles = {col: KLLSketch(self.k) for col in self.numeric_cols + self.datetime_cols}
+        self.distinct = {col: HyperLogLog(self.p) for col in self.categorical_cols}
+        self.topk = {col: SpaceSaving(self.capacity) for col in self.categorical_cols}
+        self.comoments = CoMoments(len(self.numeric_cols))
+        self.rollups = {col: TimeRollup(col, self.numeric_cols) for col in self.datetime_cols} if self.numeric_cols else {}
+
+    def update(self, chunk):
+        if self.columns is None:
+            self._init_columns(chunk)
+
+        for col, count in chunk.notnull().sum().items():
+            self.non_null[col] += int(count)
+        for col in self.numeric_cols:
+            values = chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.moments[col].update(values)
+            self.quantiles[col].update(values)
+        for col in self.datetime_cols:
+            values = chunk[col].dropna().to_numpy(dtype='datetime64[ns]').view(np.int64).astype(np.float64)
+            self.moments[col].update(values)
+            self.quantiles[col].update(values)
+        for col in self.categorical_cols:
+            counts, hashes = batch_counts(chunk[col], self.capacity)
+            self.distinct[col].update_hashes(hashes)
+            self.topk[col].merge(SpaceSaving.from_counts(counts, self.capacity))
+        if self.numeric_cols and (len(self.numeric_cols) > 1 or self.rollups):
+            numeric = chunk[self.numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+            if len(self.numeric_cols) > 1:
+                self.comoments.update(numeric)
+            for col, rollup in self.rollups.items():
+                rollup.update(chunk[col].to_numpy(dtype='datetime64[ns]'), numeric)
+
+    def merge(self, other):
+        if other.columns is None:
+            return
+        if self.columns is None:
+            self.columns = list(other.columns)
+            self.numeric_cols = list(other.numeric_cols)
+            self.categorical_cols = list(other.categorical_cols)
+            self.datetime_cols = list(other.datetime_cols)
+            self._init_sketches()
+        for col in self.columns:
+            self.non_null[col] += other.non_null[col]
+        for col in self.numeric_cols + self.datetime_cols:
+            self.moments[col].merge(other.moments[col])
+            self.quantiles[col].merge(other.quantiles[col])
+        for col in self.categorical_cols:
+            self.distinct[col].merge(other.distinct[col])
+            self.topk[col].merge(other.topk[col])
+        self.comoments.merge(other.comoments)
+        for col, rollup in self.rollups.items():
+            rollup.merge(other.rollups[col])
+
+    # ---- 结果 ----
+
+    def summary_stats(self, col):
+        """与 describe(include='all') 对应的单列统计量"""
+        stats = {'count': float(self.non_null[col])}
+        if col in self.moments and self.moments[col].count:
+            moments = self.moments[col]
+            q1, q2, q3 = self.quantiles[col].quantiles([0.25, 0.5, 0.75])
+            if col in self.datetime_cols:
+                to_ts = lambda v: pd.Timestamp(int(v))
+                stats.update({'mean': to_ts(moments.mean), 'min': to_ts(moments.min), '25%': to_ts(q1),
+                              '50%': to_ts(q2), '75%': to_ts(q3), 'max': to_ts(moments.max)})
+            else:
+                stats.update({'mean': moments.mean, 'std': moments.std, 'min': moments.min,
+                              '25%': q1, '50%': q2, '75%': q3, 'max': moments.max})
+        elif col in self.topk and len(self.topk[col].counts):
+            top = self.topk[col].top(1)
+            stats.update({'unique': self.distinct[col].count(), 'top': top.index[0], 'freq': int(top.iloc[0])})
+        return stats
+
+    def correlation(self):
+        if len(self.numeric_cols) < 2 or self.comoments.count < 2:
+            return None
+        return pd.DataFrame(self.comoments.corr(), index=self.numeric_cols, columns=self.numeric_cols)
+
+    def categorical_stats(self, col, k=10):
+        return self.distinct[col].count(), self.topk[col].top(k)
+
+    def time_range(self, col):
+        moments = self.moments[col]
+        if not moments.count:
+            return pd.NaT, pd.NaT
+        return pd.Timestamp(int(moments.min)), pd.Timestamp(int(moments.max))
+
+    def error_bounds(self):
+        """各类近似统计的误差界（99% 置信水平）"""
+        return {
+            'quantile_rank_error': max([self.quantiles[col].rank_error for col in self.quantiles], default=0.0),
+            'distinct_relative_error': HyperLogLog(self.p).relative_error,
+            'top_values_max_error': max([self.topk[col].max_error() for col in self.topk], default=0)
+        }
+
+    # ---- 序列化 ----
+
+    def to_dict(self):
+        return {
+            'params': {'k': self.k, 'p': self.p, 'capacity': self.capacity},
+            'columns': self.columns,
+            'numeric_cols': self.numeric_cols,
+            'categorical_cols': self.categorical_cols,
+            'datetime_cols': self.datetime_cols,
+            'non_null': self.non_null,
+            'moments': {col: sketch.to_dict() for col, sketch in self.moments.items()},
+            'quantiles': {col: sketch.to_dict() for col, sketch in self.quantiles.items()},
+            'distinct': {col: sketch.to_dict() for col, sketch in self.distinct.items()},
+            'topk': {col: sketch.to_dict() for col, sketch in self.topk.items()},
+            'comoments': self.comoments.to_dict() if self.comoments is not None else None,
+            'rollups': {col: rollup.to_dict() for col, rollup in self.rollups.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        engine = cls(**data['params'])
+        if data['columns'] is None:
+            return engine
+        engine.columns = data['columns']
+        engine.numeric_cols = data['numeric_cols']
+        engine.categorical_cols = data['categorical_cols']
+        engine.datetime_cols = data['datetime_cols']
+        engine.non_null = dict(data['non_null'])
+        engine.moments = {col: Moments.from_dict(d) for col, d in data['moments'].items()}
+        engine.quantiles = {col: KLLSketch.from_dict(d) for col, d in data['quantiles'].items()}
+        engine.distinct = {col: HyperLogLog.from_dict(d) for col, d in data['distinct'].items()}
+        engine.topk = {col: SpaceSaving.from_dict(d) for col, d in data['topk'].items()}
+        engine.comoments = CoMoments.from_dict(data['comoments'])
+        engine.rollups = {col: TimeRollup.from_dict(d) for col, d in data['rollups'].items()}
+        return engine
@@ -0,0 +1,387 @@
+#流式（分块）处理辅助模块
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 流式模式下供可视化使用的抽样行数上限
+SAMPLE_SIZE = 100000
+# 外部去重的哈希分桶数；逐桶处理时内存约为 16 字节 × 行数 / 桶数
+DEDUP_PARTITIONS = 64
+HASH_RECORD = np.dtype([('hash', np.uint64), ('row', np.uint64)])
+# 内存去重集合每行的峰值内存（有序哈希数组及合并时的临时副本）
+DEDUP_BYTES_PER_ROW = 24
+# 合并各列哈希时的乘数（64 位 FNV 素数）：逐列 异或 后相乘，相同取值在不同列的顺序产生不同的行哈希
+HASH_COMBINE_PRIME = np.uint64(0x100000001B3)
+# 暂存列按块读回时每块的值个数；外存选择分位数时目标桶内不超过该个数的值直接读入排序
+SPILL_BLOCK_VALUES = 1 << 20
+# 外存选择每轮按保序键确定的位数（计数数组 2^RADIX_BITS 个）
+RADIX_BITS = 16
+
+
+class ChunkStore:
+    """将数据块暂存到磁盘临时目录，支持多次顺序遍历"""
+
+    def __init__(self, prefix='da_chunks_'):
+        self.dir = tempfile.mkdtemp(prefix=prefix)
+        self.paths = []
+
+    def append(self, chunk):
+        path = os.path.join(self.dir, f"{len(self.paths):06d}.pkl")
+        chunk.to_pickle(path)
+        self.paths.append(path)
+
+    def __iter__(self):
+        for path in self.paths:
+            yield pd.read_pickle(path)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self.paths = []
+
+
+class ColumnSpill:
+    """
+    按列把数值追加写入磁盘文件。分位数、均值等统计量按块顺序读回计算（外存选择），
+    内存为一个读入块加上计数数组，不随列的长度增长。
+    """
+
+    def __init__(self, prefix='da_cols_'):
+        self.dir = tempfile.mkdtemp(prefix=prefix)
+        self._files = {}
+
+    def append(self, col, values, dtype=np.float64):
+        if col not in self._files:
+            self._files[col] = (os.path.join(self.dir, f"{len(self._files):06d}.bin"), np.dtype(dtype))
+        path, dtype = self._files[col]
+        with open(path, 'ab') as f:
+            np.ascontiguousarray(values, dtype=dtype).tofile(f)
+
+    def count(self, col):
+        if col not in self._files:
+            return 0
+        path, dtype = self._files[col]
+        return os.path.getsize(path) // dtype.itemsize
+
+    def blocks(self, col):
+        """按 SPILL_BLOCK_VALUES 个值一块顺序读回一列"""
+        if col not in self._files:
+            return
+        path, dtype = self._files[col]
+        with open(path, 'rb') as f:
+            while True:
+                block = np.fromfile(f, dtype=dtype, count=SPILL_BLOCK_VALUES)
+                if not len(block):
+                    break
+                yield block
+
+    def moments(self, col):
+        """两遍扫描得到 (个数, 均值, 样本标准差, 最小值, 最大值)；整数列（日期纳秒）按 float64 计算均值"""
+        count, total, low, high = 0, 0.0, None, None
+        for block in self.blocks(col):
+            count += len(block)
+            total += float(block.sum(dtype=np.float64))
+            low = block.min() if low is None else min(low, block.min())
+            high = block.max() if high is None else max(high, block.max())
+        if not count:
+            return 0, np.nan, np.nan, np.nan, np.nan
+        mean = total / count
+        squares = sum(float(((block - mean) ** 2).sum()) for block in self.blocks(col))
+        std = np.sqrt(squares / (count - 1)) if count > 1 else np.nan
+        return count, mean, std, low, high
+
+    def count_outside(self, col, lower, upper):
+        """取值小于 lower 或大于 upper 的个数"""
+        return int(sum(((block < lower) | (block > upper)).sum() for block in self.blocks(col)))
+
+    def select(self, col, ranks, extra=None):
+        """
+        按从小到大的位次（从 0 开始）取值，结果与排序后取下标相同。
+        按保序键的高位逐轮分桶计数（每轮 RADIX_BITS 位、顺序读一遍文件），直到目标桶内的值不超过
+        SPILL_BLOCK_VALUES 个，再读入该桶排序。
+        :param extra: (值, 个数)：另外计入 个数 个相同的值（如缺失值的填充值），不写入文件、不展开
+        """
+        extra_value, extra_count = extra if extra is not None else (None, 0)
+        extra_key = None if not extra_count else int(sortable_keys(
+            np.array([extra_value], dtype=self._files[col][1] if col in self._files else np.float64))[0])
+        # 每个位次的状态：[已确定的高位前缀, 前缀位数, 在前缀桶内的位次, 桶内文件值个数]
+        states = {rank: [0, 0, rank, self.count(col)] for rank in set(ranks)}
+        radix = 1 << RADIX_BITS
+
+        def in_prefix(keys, prefix, bits):
+            return np.ones(len(keys), dtype=bool) if bits == 0 else (keys >> np.uint64(64 - bits)) == np.uint64(prefix)
+
+        def extra_in(prefix, bits):
+            return extra_key is not None and (bits == 0 or extra_key >> (64 - bits) == prefix)
+
+        while True:
+            pending = {rank: state for rank, state in states.items()
+                       if state[1] < 64 and state[3] > SPILL_BLOCK_VALUES}
+            if not pending:
+                break
+            counts = {rank: np.zeros(radix, dtype=np.int64) for rank in pending}
+            for block in self.blocks(col):
+                keys = sortable_keys(block)
+                for rank, (prefix, bits, _, _) in pending.items():
+                    digits = keys[in_prefix(keys, prefix, bits)] >> np.uint64(64 - bits - RADIX_BITS)
+                    counts[rank] += np.bincount((digits & np.uint64(radix - 1)).astype(np.int64), minlength=radix)
+            for rank, state in pending.items():
+                prefix, bits, position, _ = state
+                file_counts = counts[rank]
+                totals = file_counts.copy()
+                if extra_in(prefix, bits):
+                    totals[(extra_key >> (64 - bits - RADIX_BITS)) & (radix - 1)] += extra_count
+                cumulative = np.cumsum(totals)
+                bucket = int(np.searchsorted(cumulative, position, side='right'))
+                states[rank] = [(prefix << RADIX_BITS) | bucket, bits + RADIX_BITS,
+                                position - (int(cumulative[bucket - 1]) if bucket else 0), int(file_counts[bucket])]
+
+        # 最后一遍：读入各目标桶内的值排序后取位次，额外的值按个数插入
+        candidates = {rank: [] for rank in states}
+        for block in self.blocks(col):
+            keys = sortable_keys(block)
+            for rank, (prefix, bits, _, _) in states.items():
+                candidates[rank].append(block[in_prefix(keys, prefix, bits)])
+        result = {}
+        for rank, (prefix, bits, position, _) in states.items():
+            values = np.sort(np.concatenate(candidates[rank])) if candidates[rank] else np.empty(0)
+            if extra_in(prefix, bits):
+                before = int(np.searchsorted(values, extra_value, side='left'))
+                if position < before:
+                    result[rank] = values[position]
+                elif position < before + extra_count:
+                    result[rank] = values.dtype.type(extra_value) if len(values) else extra_value
+                else:
+                    result[rank] = values[position - extra_count]
+            else:
+                result[rank] = values[position]
+        return [result[rank] for rank in ranks]
+
+    def quantiles(self, col, probs, extra=None):
+        """与 np.quantile（线性插值）相同的分位数；extra 含义同 select"""
+        total = self.count(col) + (extra[1] if extra is not None else 0)
+        if not total:
+            return [np.nan] * len(probs)
+        positions = [p * (total - 1) for p in probs]
+        ranks = []
+        for position in positions:
+            low = int(np.floor(position))
+            ranks.extend([low, min(low + 1, total - 1)])
+        values = self.select(col, ranks, extra)
+        return [np.quantile(np.array([values[2 * i], values[2 * i + 1]]), position - np.floor(position))
+                for i, position in enumerate(positions)]
+
+    def median(self, col):
+        """与 np.median 相同：偶数个值时取中间两个值的平均"""
+        total = self.count(col)
+        if not total:
+            return np.nan
+        return np.mean(np.array(self.select(col, sorted({(total - 1) // 2, total // 2}))))
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self._files = {}
+
+
+def sortable_keys(values):
+    """把 float64 / int64 映射为保持大小顺序的 uint64 键（按键排序与按值排序一致）"""
+    bits = np.ascontiguousarray(values).view(np.uint64)
+    if values.dtype.kind == 'i':
+        return bits ^ np.uint64(1 << 63)
+    negative = (bits >> np.uint64(63)).astype(bool)
+    return np.where(negative, ~bits, bits | np.uint64(1 << 63))
+
+
+class ReservoirSampler:
+    """跨数据块的等概率行抽样：为每行分配随机键，只保留键最小的 size 行"""
+
+    def __init__(self, size=SAMPLE_SIZE, seed=0):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._sample = None
+        self._keys = None
+
+    def update(self, chunk):
+        keys = self._rng.random(len(chunk))
+        if self._sample is None:
+            sample, all_keys = chunk, keys
+        else:
+            sample = pd.concat([self._sample, chunk])
+            all_keys = np.concatenate([self._keys, keys])
+
+        if len(sample) > self.size:
+            # 保持行的原始先后顺序
+            keep = np.sort(np.argpartition(all_keys, self.size)[:self.size])
+            sample, all_keys = sample.iloc[keep], all_keys[keep]
+
+        self._sample, self._keys = sample, all_keys
+
+    @property
+    def sample(self):
+        return self._sample
+
+
+class RowHashSet:
+    """基于64位行哈希的去重集合（有序 uint64 数组，每行约 8 字节）"""
+
+    def __init__(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+
+    def first_occurrence_mask(self, chunk):
+        """返回块内首次出现（且此前各块中未出现过）的行掩码，并记录这些行"""
+        hashes = row_hashes(normalize_for_hash(chunk))
+        mask = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen):
+            pos = np.searchsorted(self._seen, hashes)
+            pos[pos == len(self._seen)] = 0
+            mask &= self._seen[pos] != hashes
+        # 只对新增的哈希排序，按插入位置并入已有的有序数组（一次复制，不重新排序已有的哈希）
+        new = np.sort(hashes[mask])
+        self._seen = np.insert(self._seen, np.searchsorted(self._seen, new), new)
+        return mask
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class PartitionedRowHashSet:
+    """
+    外部（分区）去重：行哈希与行号按哈希高位分桶追加写入磁盘，全部写完后逐桶读回找出重复行，
+    重复标记写入磁盘上的逐行标记文件。内存占用为单个桶（约 16 字节 × 行数 / 桶数），与文件大小无关。
+    用法：先对所有块调用 add()，再调用 finalize()，之后按块顺序调用 first_occurrence_mask()。
+    """
+
+    def __init__(self, partitions=DEDUP_PARTITIONS, prefix='da_dedup_'):
+        self.dir = tempfile.mkdtemp(prefix=prefix)
+        self.bits = max(int(partitions - 1).bit_length(), 1)
+        self.partitions = 1 << self.bits
+        self.count = 0              #已写入的行数
+        self.unique = 0             #finalize 后为不重复的行数
+        self._duplicates = None     #逐行重复标记（np.memmap, uint8）
+        self._offset = 0
+
+    def _bucket_path(self, bucket):
+        return os.path.join(self.dir, f"{bucket:04d}.bin")
+
+    def add(self, chunk):
+        hashes = row_hashes(normalize_for_hash(chunk))
+        records = np.empty(len(hashes), dtype=HASH_RECORD)
+        records['hash'] = hashes
+        records['row'] = np.arange(self.count, self.count + len(hashes), dtype=np.uint64)
+        self.count += len(hashes)
+
+        buckets = (hashes >> np.uint64(64 - self.bits)).astype(np.intp)
+        order = np.argsort(buckets, kind='stable')
+        records, buckets = records[order], buckets[order]
+        bounds = np.searchsorted(buckets, np.arange(self.partitions + 1))
+        for bucket in np.flatnonzero(np.diff(bounds)):
+            with open(self._bucket_path(bucket), 'ab') as f:
+                records[bounds[bucket]:bounds[bucket + 1]].tofile(f)
+
+    def finalize(self):
+        """逐桶找出重复行：同一哈希按行号排序，第一行之后的都是重复行"""
+        path = os.path.join(self.dir, 'duplicates.bin')
+        self._duplicates = np.memmap(path, dtype=np.uint8, mode='w+', shape=(max(self.count, 1),))
+        self.unique = 0
+        for bucket in range(self.partitions):
+            bucket_path = self._bucket_path(bucket)
+            if not os.path.exists(bucket_path):
+                continue
+            records = np.fromfile(bucket_path, dtype=HASH_RECORD)
+            os.remove(bucket_path)
+            records = records[np.lexsort((records['row'], records['hash']))]
+            repeated = np.empty(len(records), dtype=bool)
+            repeated[0] = False
+            np.equal(records['hash'][1:], records['hash'][:-1], out=repeated[1:])
+            self._duplicates[records['row'][repeated]] = 1
+            self.unique += len(records) - int(repeated.sum())
+        self._duplicates.flush()
+
+    def first_occurrence_mask(self, chunk):
+        """按 add() 时的块顺序依次调用，返回该块的首次出现掩码"""
+        mask = self._duplicates[self._offset:self._offset + len(chunk)] == 0
+        self._offset += len(chunk)
+        return mask
+
+    def __len__(self):
+        return self.unique
+
+    def cleanup(self):
+        self._duplicates = None
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def row_hashes(df, executor=None):
+    """
+    逐行的64位哈希（向量化，不含索引）：各列用 pd.util.hash_pandas_object 哈希，
+    再按列顺序 out = (out ^ 列哈希) * HASH_COMBINE_PRIME 合并（按 2^64 取模）。
+    :param executor: 列并行执行器（ColumnExecutor），各列的哈希并行计算，合并方式相同，结果与串行计算一致
+    """
+    def column_hash(i):
+        return pd.util.hash_pandas_object(df.iloc[:, i], index=False).to_numpy()
+
+    columns = range(df.shape[1])
+    hashes = executor.map(column_hash, columns) if executor is not None else map(column_hash, columns)
+    out = np.zeros(len(df), dtype=np.uint64)
+    for values in hashes:
+        out ^= values
+        out *= HASH_COMBINE_PRIME
+    return out
+
+
+def duplicated_mask(df, executor=None):
+    """与 df.duplicated() 相同语义（保留首次出现）的重复行掩码，只对每行计算一次哈希"""
+    return pd.Series(row_hashes(df, executor)).duplicated().to_numpy()
+
+
+def normalize_for_hash(chunk):
+    """整数列统一视为 float64，避免不同块推断出 int/float 时相同行的哈希不一致"""
+    int_cols = chunk.select_dtypes(include=['integer']).columns
+    if len(int_cols) == 0:
+        return chunk
+    return chunk.astype({col: np.float64 for col in int_cols})
+
+
+def factorized_counts(series):
+    """
+    各个不同值（首次出现的顺序）及其计数，计数为 0 的值已去掉。
+    category 列直接使用已有的整数编码，其他列先 factorize；计数都由 np.bincount 得到，不构建逐值的哈希表结果。
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    observed = np.flatnonzero(counts)
+    if len(observed) < len(uniques):
+        return counts[observed], uniques[observed]
+    return counts, uniques
+
+
+def count_values(series):
+    """非空值的计数，按计数从大到小排列（计数相同时按值首次出现的先后，与 value_counts 一致）"""
+    counts, uniques = factorized_counts(series)
+    order = np.argsort(-counts, kind='stable')
+    return pd.Series(counts[order], index=uniques[order], name='count')
+
+
+def merge_counts(total, counts):
+    """合并两个 value_counts 结果"""
+    if total is None:
+        return counts
+    return total.add(counts, fill_value=0)
+
+
+def mode_from_counts(counts):
+    """从计数结果取众数，并列时与 Series.mode() 一样取排序后的第一个；没有值时为 NaN"""
+    if counts is None or counts.empty:
+        return np.nan
+    top = counts[counts == counts.max()].index
+    try:
+        return sorted(top)[0]
+    except TypeError:
+        return top[0]
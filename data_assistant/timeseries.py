@@ -0,0 +1,182 @@
+#时间序列汇总模块
+#每个日期列只做一次排序分组，得到所有数值列按 日/周/月 汇总的 行数/计数/均值/最小值/最大值。
+#原始数据只扫描一次（按日聚合），周、月汇总由日汇总合并得到；汇总结果是紧凑的 NumPy 数组，
+#可以跨数据块合并、随统计状态保存，分析报告和时间序列图表共用同一份结果。
+import numpy as np
+import pandas as pd
+
+ROLLUP_LEVELS = ['day', 'week', 'month']
+LEVEL_NAMES = {'day': '日', 'week': '周', 'month': '月'}
+NS_PER_DAY = 86400 * 10 ** 9
+# 按日聚合时每次处理的数值列数，限制排序后临时数组的大小
+ROLLUP_COLUMN_BLOCK = 64
+_NAT = np.iinfo(np.int64).min
+
+
+def _reduce(keys, rows, count, total, low, high):
+    """按升序 keys 合并相同键的汇总行"""
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.intp)
+    if len(starts) == len(keys):
+        return keys, rows[order], count[order], total[order], low[order], high[order]
+    return (keys[starts], np.add.reduceat(rows[order], starts), np.add.reduceat(count[order], starts, axis=0),
+            np.add.reduceat(total[order], starts, axis=0), np.minimum.reduceat(low[order], starts, axis=0),
+            np.maximum.reduceat(high[order], starts, axis=0))
+
+
+class TimeRollup:
+    """
+    一个日期列上各数值列的按日汇总。days 为升序的日序号（自 1970-01-01 起的天数），
+    rows 为每天的行数，count/sum/min/max 为 (天数, 列数) 数组（无值时 min/max 为 ±inf）。
+    """
+
+    def __init__(self, date_col, columns):
+        self.date_col = date_col
+        self.columns = list(columns)
+        width = len(self.columns)
+        self.days = np.zeros(0, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros((0, width), dtype=np.int64)
+        self.sum = np.zeros((0, width))
+        self.min = np.zeros((0, width))
+        self.max = np.zeros((0, width))
+        self._levels = {}
+
+    def update(self, dates, values):
+        """
+        :param dates: datetime64[ns] 数组
+        :param values: (行数, 列数) 的 float64 数组，缺失值为 NaN
+        """
+        ints = np.asarray(dates, dtype='datetime64[ns]').view(np.int64)
+        valid = ints != _NAT
+        days = ints[valid] // NS_PER_DAY
+        if len(days) == 0:
+            return
+        # 每个日期列只排序一次，各数值列按同一顺序分组
+        order = np.argsort(days, kind='stable')
+        days = days[order]
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        rows = np.diff(np.r_[starts, len(days)])
+
+        width = len(self.columns)
+        count = np.zeros((len(starts), width), dtype=np.int64)
+        total = np.zeros((len(starts), width))
+        low = np.full((len(starts), width), np.inf)
+        high = np.full((len(starts), width), -np.inf)
+        for start in range(0, width, ROLLUP_COLUMN_BLOCK):
+            block = slice(start, start + ROLLUP_COLUMN_BLOCK)
+            sorted_values = values[:, block][valid][order]
+            present = ~np.isnan(sorted_values)
+            count[:, block] = np.add.reduceat(present, starts, axis=0)
+            total[:, block] = np.add.reduceat(np.where(present, sorted_values, 0.0), starts, axis=0)
+            low[:, block] = np.minimum.reduceat(np.where(present, sorted_values, np.inf), starts, axis=0)
+            high[:, block] = np.maximum.reduceat(np.where(present, sorted_values, -np.inf), starts, axis=0)
+        self._append(days[starts], rows, count, total, low, high)
+
+    def update_frame(self, df):
+        self.update(df[self.date_col].to_numpy(dtype='datetime64[ns]'),
+                    df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def merge(self, other):
+        self._append(other.days, other.rows, other.count, other.sum, other.min, other.max)
+
+    def _append(self, days, rows, count, total, low, high):
+        if len(self.days):
+            days = np.concatenate([self.days, days])
+            rows = np.concatenate([self.rows, rows])
+            count = np.concatenate([self.count, count])
+            total = np.concatenate([self.sum, total])
+            low = np.concatenate([self.min, low])
+            high = np.concatenate([self.max, high])
+        self.days, self.rows, self.count, self.sum, self.min, self.max = _reduce(days, rows, count, total, low, high)
+        self._levels = {}
+
+    # ---- 结果 ----
+
+    def rollup(self, level):
+        """
+        指定粒度的汇总（结果缓存）：{'periods': 各周期起始日期, 'rows', 'count', 'mean', 'min', 'max'}，
+        数组的行对应周期、列对应 self.columns；没有值的单元为 NaN。周从周一开始。
+        """
+        if level not in self._levels:
+            if level == 'day':
+                keys = self.days
+                arrays = (self.days, self.rows, self.count, self.sum, self.min, self.max)
+            else:
+                if level == 'week':
+                    keys = (self.days + 3) // 7       # 1970-01-01 是周四，+3 使每周从周一开始
+                else:
+                    keys = self.days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+                arrays = _reduce(keys, self.rows, self.count, self.sum, self.min, self.max)
+            keys, rows, count, total, low, high = arrays
+            if level == 'day':
+                periods = keys.astype('datetime64[D]')
+            elif level == 'week':
+                periods = (keys * 7 - 3).astype('datetime64[D]')
+            else:
+                periods = keys.astype('datetime64[M]').astype('datetime64[D]')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = np.where(count > 0, total / count, np.nan)
+            self._levels[level] = {
+                'periods': periods,
+                'rows': rows,
+                'count': count,
+                'mean': mean,
+                'min': np.where(count > 0, low, np.nan),
+                'max': np.where(count > 0, high, np.nan)
+            }
+        return self._levels[level]
+
+    def choose_level(self, max_periods):
+        """周期数不超过 max_periods 的最细粒度；都超过时为月"""
+        for level in ROLLUP_LEVELS:
+            if len(self.rollup(level)['periods']) <= max_periods:
+                return level
+        return 'month'
+
+    def to_dict(self):
+        return {'date_col': self.date_col, 'columns': self.columns, 'days': self.days.tolist(),
+                'rows': self.rows.tolist(), 'count': self.count.tolist(), 'sum': self.sum.tolist(),
+                'min': self.min.tolist(), 'max': self.max.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        rollup = cls(data['date_col'], data['columns'])
+        shape = (-1, len(rollup.columns))
+        rollup.days = np.array(data['days'], dtype=np.int64)
+        rollup.rows = np.array(data['rows'], dtype=np.int64)
+        rollup.count = np.array(data['count'], dtype=np.int64).reshape(shape)
+        rollup.sum = np.array(data['sum'], dtype=np.float64).reshape(shape)
+        rollup.min = np.array(data['min'], dtype=np.float64).reshape(shape)
+        rollup.max = np.array(data['max'], dtype=np.float64).reshape(shape)
+        return rollup
+
+
+def build_rollups(df, datetime_cols, numeric_cols):
+    """内存中的 DataFrame：每个日期列一次排序分组，汇总所有数值列"""
+    values = df[list(numeric_cols)].to_numpy(dtype=np.float64, na_value=np.nan)
+    rollups = {}
+    for col in datetime_cols:
+        rollups[col] = TimeRollup(col, numeric_cols)
+        rollups[col].update(df[col].to_numpy(dtype='datetime64[ns]'), values)
+    return rollups
+
+
+def rollup_table(rollup, max_periods, max_columns):
+    """
+    报告中的汇总表：选择周期数不超过 max_periods 的最细粒度（超过时只保留最近的 max_periods 个周期），
+    最多 max_columns 个数值列的 均值/最小值/最大值。
+    """
+    level = rollup.choose_level(max_periods)
+    data = rollup.rollup(level)
+    recent = slice(max(len(data['periods']) - max_periods, 0), None)
+    columns = rollup.columns[:max_columns]
+    return {
+        'level': LEVEL_NAMES[level],
+        'total_periods': len(data['periods']),
+        'periods': [str(period) for period in data['periods'][recent]],
+        'rows': data['rows'][recent].tolist(),
+        'columns': {col: {stat: pd.Series(data[stat][recent, i]).round(2).tolist() for stat in ('mean', 'min', 'max')}
+                    for i, col in enumerate(columns)}
+    }
@@ -1,42 +1,116 @@
-#通用工具函数
-import os
-import re
-import platform
-import matplotlib.pyplot as plt
-from io import BytesIO
-import base64
-
-
-def set_chinese_font():
-    """配置中文字体支持"""
-    system = platform.system()
-    if system == 'Windows':
-        plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'KaiTi', 'Arial Unicode MS']
-    elif system == 'Darwin':  # macOS
-        plt.rcParams['font.sans-serif'] = ['Heiti SC', 'STHeiti', 'PingFang SC', 'Arial Unicode MS']
-    else:  # Linux
-        plt.rcParams['font.sans-serif'] = ['WenQuanYi Micro Hei', 'WenQuanYi Zen Hei', 'AR PL UMing CN',
-                                           'Arial Unicode MS']
-
-    plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-
-
-def fig_to_base64(fig):
-    """将matplotlib图表转换为base64编码图像"""
-    buf = BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight', dpi=100)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    return img_base64
-
-
-def standardize_column_names(df):
-    """标准化列名"""
-    return [re.sub(r'[^a-zA-Z0-9_]', '_', col).strip().lower() for col in df.columns]
-
-
-def ensure_dir_exists(directory):
-    """确保目录存在"""
-    os.makedirs(directory, exist_ok=True)
-    return directory
+#通用工具函数
+import os
+import re
+import hashlib
+import platform
+import tempfile
+from io import BytesIO
+import base64
+
+# matplotlib 只在绘图时导入（见各函数内部），不绘图的运行（--help、--stats-only）不加载绘图库
+_font_configured = False
+
+
+def set_chinese_font():
+    """配置中文字体支持（每个进程只设置一次）"""
+    global _font_configured
+    if _font_configured:
+        return
+    import matplotlib
+
+    system = platform.system()
+    if system == 'Windows':
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'KaiTi', 'Arial Unicode MS']
+    elif system == 'Darwin':  # macOS
+        matplotlib.rcParams['font.sans-serif'] = ['Heiti SC', 'STHeiti', 'PingFang SC', 'Arial Unicode MS']
+    else:  # Linux
+        matplotlib.rcParams['font.sans-serif'] = ['WenQuanYi Micro Hei', 'WenQuanYi Zen Hei', 'AR PL UMing CN',
+                                                  'Arial Unicode MS']
+
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    _font_configured = True
+
+
+IMAGE_MIME_TYPES = {'png': 'image/png', 'webp': 'image/webp', 'svg': 'image/svg+xml'}
+# 各格式的保存参数：PNG 开启压缩优化，WebP 使用有损压缩；去掉日期元数据使相同图表输出相同内容
+IMAGE_SAVE_OPTIONS = {
+    'png': {'pil_kwargs': {'optimize': True}},
+    'webp': {'pil_kwargs': {'quality': 80, 'method': 6}},
+    'svg': {'metadata': {'Date': None}}
+}
+
+
+def fig_to_base64(fig, fmt='png'):
+    """将matplotlib图表转换为base64编码图像"""
+    import matplotlib
+
+    buf = BytesIO()
+    with matplotlib.rc_context({'svg.hashsalt': 'data_assistant'}):
+        fig.savefig(buf, format=fmt, bbox_inches='tight', dpi=100, **IMAGE_SAVE_OPTIONS[fmt])
+    buf.seek(0)
+    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
+    buf.close()
+    return img_base64
+
+
+def save_figure(fig, directory, fmt='png'):
+    """
+    将图表直接写入目录（不经过内存缓冲和base64编码），文件名为内容哈希，
+    相同的图片只保留一份。返回文件名。
+    """
+    import matplotlib
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=f'.{fmt}.tmp')
+    os.close(fd)
+    with matplotlib.rc_context({'svg.hashsalt': 'data_assistant'}):
+        fig.savefig(tmp_path, format=fmt, bbox_inches='tight', dpi=100, **IMAGE_SAVE_OPTIONS[fmt])
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(tmp_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+
+    filename = f"{digest.hexdigest()}.{fmt}"
+    path = os.path.join(directory, filename)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    return filename
+
+
+def standardize_name(col):
+    """标准化单个列名"""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', col).strip().lower()
+
+
+def standardize_column_names(df):
+    """标准化列名"""
+    return [standardize_name(col) for col in df.columns]
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存(MB)，平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return round(peak / 1024 ** 2 if platform.system() == 'Darwin' else peak / 1024, 2)
+
+
+def current_rss_mb():
+    """当前进程的常驻内存(MB)，从 /proc 读取（Linux），其他平台返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2, 2)
+
+
+def ensure_dir_exists(directory):
+    """确保目录存在"""
+    os.makedirs(directory, exist_ok=True)
+    return directory
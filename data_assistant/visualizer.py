@@ -1,111 +1,272 @@
-#可视化模块
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from .utils import fig_to_base64, set_chinese_font
-
-class DataVisualizer:
-    def __init__(self, df):
-        self.df = df
-        self.visualizations = []
-        self.issues = []
-        set_chinese_font()  # 确保中文字体设置
-
-    def create_visualizations(self):
-        if self.df is None or self.df.empty:
-            self.issues.append("可视化失败: 数据未加载或为空")
-            return
-
-        try:
-            # 1. 数值变量分布
-            numeric_cols = self.df.select_dtypes(include=np.number).columns
-            for col in numeric_cols:
-                plt.figure(figsize=(10, 6))
-                sns.histplot(self.df[col], kde=True)
-                plt.title(f'{col} 分布')
-                plt.xlabel(col)
-                plt.ylabel('频数')
-                img_data = fig_to_base64(plt)
-                plt.close()
-
-                self.visualizations.append({
-                    'type': 'distribution',
-                    'title': f'{col} 分布',
-                    'image': img_data
-                })
-
-            # 2. 分类变量计数
-            categorical_cols = self.df.select_dtypes(exclude=[np.number, 'datetime']).columns
-            for col in categorical_cols[:3]:  # 限制最多3个分类变量
-                plt.figure(figsize=(10, 6))
-                sns.countplot(y=col, data=self.df, order=self.df[col].value_counts().index[:10])
-                plt.title(f'{col} 分布')
-                plt.xlabel('计数')
-                plt.ylabel(col)
-                img_data = fig_to_base64(plt)
-                plt.close()
-
-                self.visualizations.append({
-                    'type': 'categorical',
-                    'title': f'{col} 分布',
-                    'image': img_data
-                })
-
-            # 3. 相关性热力图
-            if len(numeric_cols) > 1:
-                plt.figure(figsize=(10, 8))
-                corr = self.df[numeric_cols].corr()
-                sns.heatmap(corr, annot=True, cmap='coolwarm', fmt=".2f")
-                plt.title('变量相关性热力图')
-                img_data = fig_to_base64(plt)
-                plt.close()
-
-                self.visualizations.append({
-                    'type': 'correlation',
-                    'title': '变量相关性',
-                    'image': img_data
-                })
-
-            # 4. 数值变量关系散点图
-            if len(numeric_cols) > 1:
-                plt.figure(figsize=(10, 8))
-                sns.pairplot(self.df[numeric_cols[:4]], diag_kind='kde')  # 限制最多4个变量
-                plt.suptitle('数值变量关系', y=1.02)
-                img_data = fig_to_base64(plt)
-                plt.close()
-
-                self.visualizations.append({
-                    'type': 'pairplot',
-                    'title': '数值变量关系',
-                    'image': img_data
-                })
-
-            # 5. 时间序列分析 (如果有日期列)
-            datetime_cols = self.df.select_dtypes(include='datetime').columns
-            if datetime_cols.size > 0 and numeric_cols.size > 0:
-                date_col = datetime_cols[0]
-                numeric_col = numeric_cols[0]
-
-                # 按时间聚合
-                time_df = self.df.set_index(date_col)[numeric_col].resample('M').mean()
-
-                plt.figure(figsize=(12, 6))
-                time_df.plot()
-                plt.title(f'{numeric_col} 随时间变化')
-                plt.xlabel('日期')
-                plt.ylabel(numeric_col)
-                plt.grid(True)
-                img_data = fig_to_base64(plt)
-                plt.close()
-
-                self.visualizations.append({
-                    'type': 'timeseries',
-                    'title': f'{numeric_col} 随时间变化',
-                    'image': img_data
-                })
-
-            print(f"创建了 {len(self.visualizations)} 个可视化图表")
-
-        except Exception as e:
-            self.issues.append(f"可视化过程中出错: {str(e)}")
-            print(f"可视化错误: {str(e)}")
\ No newline at end of file
+#可视化模块
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import matplotlib
+import numpy as np
+from matplotlib.figure import Figure
+from .utils import fig_to_base64, save_figure, set_chinese_font, IMAGE_MIME_TYPES
+from .profile import DataProfile
+from .profiling import Profiler
+from .plotdata import distribution_data, pair_data
+from .timeseries import LEVEL_NAMES
+from .correlation import HEATMAP_ANNOT_MAX_COLUMNS
+
+# 图表数量少于该值时直接在当前进程绘制，避免进程池的启动开销
+PARALLEL_MIN_CHARTS = 8
+# image_format='auto' 时以矢量图保存的简单图表；热力图和散点矩阵元素多，仍使用 PNG
+SVG_CHART_TYPES = ('distribution', 'categorical', 'timeseries')
+# 时间序列图：最多绘制的日期列数、每个日期列的数值列数，以及选择汇总粒度时的周期数上限
+TIMESERIES_MAX_DATE_COLS = 2
+TIMESERIES_MAX_COLUMNS = 4
+TIMESERIES_MAX_POINTS = 400
+
+
+def _init_worker():
+    """绘图子进程初始化：使用无界面的 Agg 后端并设置中文字体"""
+    matplotlib.use('Agg')
+    set_chinese_font()
+
+
+def render_chart(spec, image_dir=None, image_format='png'):
+    """
+    绘制单个图表，返回 {'image': base64图像, 'src': 图片文件名, 'mime': MIME类型}。
+    指定 image_dir 时图片直接写入该目录（'image' 为 None），否则以 base64 内嵌（'src' 为 None）。
+    spec 只包含该图表预聚合后的数据（分箱计数、KDE曲线、计数结果、相关系数矩阵等），大小与数据行数无关，
+    可以低成本地发送到子进程；绘图使用面向对象的 Figure API，不依赖 pyplot 的全局状态。
+    """
+    start, cpu_start = time.perf_counter(), time.process_time()
+    kind = spec['type']
+    if image_format == 'auto':
+        image_format = 'svg' if kind in SVG_CHART_TYPES else 'png'
+
+    if kind == 'pairplot':
+        fig = _render_pairs(spec)
+    elif kind == 'timeseries':
+        fig = _render_timeseries(spec)
+    else:
+        fig = _render_figure(spec)
+
+    if image_dir:
+        result = {'image': None, 'src': save_figure(fig, image_dir, image_format)}
+    else:
+        result = {'image': fig_to_base64(fig, image_format), 'src': None}
+    result['mime'] = IMAGE_MIME_TYPES[image_format]
+    # 子进程中绘制时由主进程据此记录每个图表的耗时
+    result['timing'] = {'start': start, 'wall': time.perf_counter() - start, 'cpu': time.process_time() - cpu_start,
+                        'pid': os.getpid(), 'tid': threading.get_native_id()}
+    return result
+
+
+def _render_figure(spec):
+    import seaborn as sns   # seaborn 导入较慢，只在绘制需要它的图表时导入
+
+    kind = spec['type']
+    fig = Figure(figsize=spec['figsize'])
+    ax = fig.subplots()
+
+    if kind == 'distribution':
+        edges = spec['edges']
+        ax.bar(edges[:-1], spec['counts'], width=np.diff(edges), align='edge',
+               color='C0', alpha=0.6, edgecolor='white', linewidth=0.5)
+        if spec['kde'] is not None:
+            ax.plot(*spec['kde'], color='C0')
+        ax.set_title(spec['title'])
+        ax.set_xlabel(spec['column'])
+        ax.set_ylabel('频数')
+    elif kind == 'categorical':
+        sns.barplot(x=spec['counts'], y=spec['labels'], orient='h', ax=ax)
+        ax.set_title(spec['title'])
+        ax.set_xlabel('计数')
+        ax.set_ylabel(spec['column'])
+    elif kind == 'correlation':
+        sns.heatmap(spec['corr'], annot=spec['annot'], cmap='coolwarm', fmt=".2f", vmin=-1, vmax=1, ax=ax)
+        ax.set_title(spec['heading'])
+
+    return fig
+
+
+def _render_timeseries(spec):
+    """每个数值列一个子图：按周期的均值折线，阴影为最小值到最大值的范围"""
+    columns = spec['columns']
+    fig = Figure(figsize=(12, 3 * len(columns) + 1))
+    axes = fig.subplots(len(columns), 1, sharex=True, squeeze=False)[:, 0]
+    periods = spec['periods']
+    for ax, col in zip(axes, columns):
+        ax.fill_between(periods, spec['min'][col], spec['max'][col], color='C0', alpha=0.2, linewidth=0)
+        ax.plot(periods, spec['mean'][col], color='C0', marker='o' if len(periods) <= 60 else None, markersize=3)
+        ax.set_ylabel(col)
+        ax.grid(True)
+    axes[-1].set_xlabel(spec['date_col'])
+    fig.suptitle(spec['title'])
+    return fig
+
+
+def _render_pairs(spec):
+    """散点矩阵：对角线为 KDE 曲线，非对角线为散点或二维直方图密度"""
+    pairs = spec['pairs']
+    columns = pairs['columns']
+    size = len(columns)
+    fig = Figure(figsize=(2.5 * size, 2.5 * size))
+    axes = fig.subplots(size, size, squeeze=False)
+
+    for i, y_col in enumerate(columns):
+        for j, x_col in enumerate(columns):
+            ax = axes[i][j]
+            if i == j:
+                if pairs['diagonal'][x_col] is not None:
+                    ax.plot(*pairs['diagonal'][x_col], color='C0')
+            elif pairs['dense']:
+                cell = pairs['cells'][(x_col, y_col)]
+                ax.pcolormesh(cell['x_edges'], cell['y_edges'], cell['counts'].T, cmap='Blues')
+            else:
+                cell = pairs['cells'][(x_col, y_col)]
+                ax.scatter(cell['x'], cell['y'], s=5, alpha=0.6, color='C0')
+            if i == size - 1:
+                ax.set_xlabel(x_col)
+            if j == 0:
+                ax.set_ylabel(y_col)
+
+    fig.suptitle(spec['title'], y=1.02)
+    return fig
+
+
+class DataVisualizer:
+    def __init__(self, df, profile=None, jobs=None, image_dir=None, image_format='png', profiler=None, rollups=None,
+                 correlation=None):
+        self.df = df
+        self.profile = profile or DataProfile(df)     #与清洗、分析阶段共享的列统计缓存
+        self.rollups = rollups                        #分析阶段的时间序列汇总（流式模式下覆盖全部数据）；None 时由 profile 计算
+        self.correlation = correlation                #分析阶段的 Correlation；None 时由 profile 计算
+        self.jobs = jobs                              #绘图进程数；None 表示按图表数量和CPU核数自动决定，1 表示不并行
+        self.image_dir = image_dir                    #图片输出目录（应位于报告所在目录下）；None 表示以base64内嵌到报告
+        self.image_format = image_format              #'png'、'webp'、'svg'，或 'auto'（简单图表用SVG，其余用PNG）
+        self.profiler = profiler or Profiler()        #记录准备绘图数据和每个图表的耗时
+        self.visualizations = []
+        self.issues = []
+        set_chinese_font()  # 确保中文字体设置
+
+    def create_visualizations(self):
+        if self.df is None or self.df.empty:
+            self.issues.append("可视化失败: 数据未加载或为空")
+            return
+
+        try:
+            with self.profiler.stage("准备绘图数据", 'chart'):
+                specs = self._chart_specs()
+            jobs = self._resolve_jobs(len(specs))
+            if self.image_dir:
+                os.makedirs(self.image_dir, exist_ok=True)
+            render = partial(render_chart, image_dir=self.image_dir, image_format=self.image_format)
+
+            # executor.map 按提交顺序返回结果，图表顺序与串行绘制一致
+            if jobs > 1:
+                with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+                    images = list(executor.map(render, specs))
+                for spec, image in zip(specs, images):
+                    self.profiler.add(spec['title'], 'chart', **image['timing'])
+            else:
+                images = []
+                for spec in specs:
+                    with self.profiler.stage(spec['title'], 'chart'):
+                        images.append(render(spec))
+
+            for spec, image in zip(specs, images):
+                src = image['src']
+                self.visualizations.append({
+                    'type': spec['type'],
+                    'title': spec['title'],
+                    'image': image['image'],
+                    # 报告中以相对路径引用图片文件
+                    'src': f"{os.path.basename(os.path.normpath(self.image_dir))}/{src}" if src else None,
+                    'mime': image['mime']
+                })
+
+            print(f"创建了 {len(self.visualizations)} 个可视化图表")
+
+        except Exception as e:
+            self.issues.append(f"可视化过程中出错: {str(e)}")
+            print(f"可视化错误: {str(e)}")
+
+    def _resolve_jobs(self, chart_count):
+        if self.jobs is not None:
+            return max(min(self.jobs, chart_count), 1)
+        if chart_count < PARALLEL_MIN_CHARTS:
+            return 1
+        return min(os.cpu_count() or 1, chart_count)
+
+    def _chart_specs(self):
+        """按最终的图表顺序准备每个图表所需的数据"""
+        specs = []
+
+        # 1. 数值变量分布（分箱计数 + 抽样拟合的 KDE）
+        numeric_cols = self.profile.numeric_cols
+        for col in numeric_cols:
+            specs.append({
+                'type': 'distribution',
+                'title': f'{col} 分布',
+                'figsize': (10, 6),
+                'column': col,
+                **distribution_data(self.df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+            })
+
+        # 2. 分类变量计数（使用已缓存的计数结果，不再重新扫描整列）
+        categorical_cols = self.profile.categorical_cols
+        for col in categorical_cols[:3]:  # 限制最多3个分类变量
+            counts = self.profile.value_counts(col).head(10)
+            specs.append({
+                'type': 'categorical',
+                'title': f'{col} 分布',
+                'figsize': (10, 6),
+                'column': col,
+                'labels': [str(value) for value in counts.index],
+                'counts': counts.to_numpy()
+            })
+
+        # 3. 相关性热力图：列多时只保留相关性最强的列并按聚类排序，列少时标注系数
+        correlation = self.correlation
+        if correlation is None and len(numeric_cols) > 1:
+            correlation = self.profile.corr()
+        if correlation is not None:
+            corr = correlation.heatmap()
+            size = len(corr)
+            heading = '变量相关性热力图'
+            if size < len(correlation.columns):
+                heading += f'（相关性最强的 {size} 列，共 {len(correlation.columns)} 列）'
+            specs.append({
+                'type': 'correlation',
+                'title': '变量相关性',
+                'heading': heading,
+                'figsize': (max(10, 0.4 * size + 4), max(8, 0.4 * size + 2)),
+                'corr': corr,
+                'annot': size <= HEATMAP_ANNOT_MAX_COLUMNS
+            })
+
+        # 4. 数值变量关系散点图（数据量大时改为二维直方图密度）
+        if len(numeric_cols) > 1:
+            specs.append({
+                'type': 'pairplot',
+                'title': '数值变量关系',
+                'pairs': pair_data(self.df[numeric_cols[:4]])  # 限制最多4个变量
+            })
+
+        # 5. 时间序列分析 (如果有日期列)：直接使用已汇总的 日/周/月 数组
+        rollups = self.rollups if self.rollups is not None else self.profile.time_rollups()
+        for date_col, rollup in list(rollups.items())[:TIMESERIES_MAX_DATE_COLS]:
+            if not len(rollup.days):
+                continue
+            level = rollup.choose_level(TIMESERIES_MAX_POINTS)
+            data = rollup.rollup(level)
+            columns = rollup.columns[:TIMESERIES_MAX_COLUMNS]
+            specs.append({
+                'type': 'timeseries',
+                'title': f'{date_col} 时间序列（按{LEVEL_NAMES[level]}）',
+                'date_col': date_col,
+                'columns': columns,
+                'periods': data['periods'],
+                **{stat: {col: data[stat][:, i] for i, col in enumerate(columns)} for stat in ('mean', 'min', 'max')}
+            })
+
+        return specs
@@ -0,0 +1,26 @@
+#批处理输入展开测试
+import os
+from data_assistant.batch import is_batch, expand_inputs
+
+
+def write(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("a,b\n1,2\n")
+    return str(path)
+
+
+def test_bracketed_filename_is_single_file(tmp_path):
+    path = write(tmp_path / 'data[1].csv')
+    assert not is_batch([path])
+    assert expand_inputs([path]) == [path]
+
+
+def test_glob_and_directory_inputs(tmp_path):
+    first = write(tmp_path / 'a.csv')
+    second = write(tmp_path / 'b.csv')
+    write(tmp_path / 'notes.txt')
+    pattern = os.path.join(str(tmp_path), '*.csv')
+    assert is_batch([pattern])
+    assert expand_inputs([pattern]) == [first, second]
+    assert is_batch([str(tmp_path)])
+    assert expand_inputs([str(tmp_path), first]) == [first, second]
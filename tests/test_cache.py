@@ -0,0 +1,96 @@
+#解析缓存测试：缓存键失效、命中/未命中路径与按最近使用淘汰
+import os
+import pandas as pd
+import pytest
+from data_assistant.cache import DataCache, file_fingerprint
+from data_assistant.loader import DataLoader
+
+pytest.importorskip('pyarrow')
+
+
+def write_csv(path, rows=200, offset=0):
+    pd.DataFrame({'id': range(offset, offset + rows), 'value': [i * 0.5 for i in range(rows)],
+                  'name': [f"n{i % 7}" for i in range(rows)]}).to_csv(path, index=False)
+
+
+def test_fingerprint_changes_with_file_and_options(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    write_csv(path)
+    key = file_fingerprint(path, {'fast': False})
+    assert file_fingerprint(path, {'fast': False}) == key
+    assert file_fingerprint(path, {'fast': True}) != key
+    assert file_fingerprint(path, {'fast': False, 'sheet': 'S1'}) != key
+
+    # 内容改变但大小和修改时间不变时也不能命中
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        content = f.read()
+    with open(path, 'wb') as f:
+        f.write(content.replace(b'n1', b'm1'))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(path).st_size == stat.st_size
+    assert file_fingerprint(path, {'fast': False}) != key
+
+
+def test_loader_hit_and_miss(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    write_csv(path)
+    cache = DataCache(str(tmp_path / 'cache'))
+
+    first = DataLoader(path, cache=cache)
+    assert first.load_data()
+    assert first.parser != 'cache'
+    assert len(os.listdir(cache.cache_dir)) == 1
+
+    hit = DataLoader(path, cache=cache)
+    assert hit.load_data()
+    assert hit.parser == 'cache'
+    pd.testing.assert_frame_equal(hit.df, first.df)
+
+    # 解析选项不同时不命中，另存一份
+    fast = DataLoader(path, cache=cache, fast=True)
+    assert fast.load_data()
+    assert fast.parser != 'cache'
+    assert len(os.listdir(cache.cache_dir)) == 2
+
+    # 文件修改后不命中，读到的是新内容
+    write_csv(path, rows=150, offset=1000)
+    changed = DataLoader(path, cache=cache)
+    assert changed.load_data()
+    assert changed.parser != 'cache'
+    assert changed.df['id'].tolist() == list(range(1000, 1150))
+
+
+def test_load_missing_and_corrupt(tmp_path):
+    cache = DataCache(str(tmp_path))
+    assert cache.load('0' * 32) is None
+    with open(cache._path('bad'), 'wb') as f:
+        f.write(b'not arrow')
+    assert cache.load('bad') is None
+    assert cache.issues
+
+
+def test_eviction_keeps_size_limit(tmp_path):
+    frame = pd.DataFrame({'x': range(5000), 'y': [float(i) for i in range(5000)]})
+    probe = DataCache(str(tmp_path / 'probe'))
+    probe.store('k', frame)
+    entry_size = os.path.getsize(probe._path('k'))
+
+    # 上限容纳三份缓存
+    cache = DataCache(str(tmp_path / 'cache'), max_size_mb=3.5 * entry_size / 1024 ** 2)
+    for i in range(3):
+        assert cache.store(f"k{i}", frame)
+        os.utime(cache._path(f"k{i}"), (1_000_000 + i, 1_000_000 + i))
+    # 读取 k0 使其成为最近使用
+    assert cache.load('k0') is not None
+
+    assert cache.store('k3', frame)
+    remaining = sorted(name[:-len('.arrow')] for name in os.listdir(cache.cache_dir))
+    assert remaining == ['k0', 'k2', 'k3']
+    assert sum(os.path.getsize(cache._path(k)) for k in remaining) <= cache.max_size
+
+    # 新写入的缓存即使单独超出上限也会保留
+    tiny = DataCache(str(tmp_path / 'tiny'), max_size_mb=entry_size / 2 / 1024 ** 2)
+    assert tiny.store('a', frame)
+    assert tiny.store('b', frame)
+    assert os.listdir(tiny.cache_dir) == ['b.arrow']
@@ -0,0 +1,65 @@
+#日期识别测试：候选格式、日/月顺序、时间戳单位，以及不应识别为日期的列
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant.datetimes import detect_datetime, parse_datetime, has_time_name
+
+AMBIGUOUS = ['01/02/2024', '03/04/2024', '05/06/2024', '11/12/2024'] * 60
+
+
+@pytest.mark.parametrize('values, name, expected', [
+    (['2024-01-31', '2023-12-01', None, '2022-06-15'] * 50, 'd', {'format': '%Y-%m-%d'}),
+    (['2024-01-31 08:30:00', '2023-12-01 23:59:59'] * 50, 'd', {'format': '%Y-%m-%d %H:%M:%S'}),
+    (['2024-01-31T08:30:00+08:00', '2023-12-01T23:59:59.123+00:00'] * 50, 'd', {'format': 'ISO8601'}),
+    (['2024/01/31', '2023/12/01'] * 50, 'd', {'format': '%Y/%m/%d'}),
+    # 日大于 12 的值决定顺序
+    (['25/12/2023', '01/02/2024'] * 50, 'd', {'format': '%d/%m/%Y'}),
+    (['12/25/2023', '01/02/2024'] * 50, 'd', {'format': '%m/%d/%Y'}),
+    # 决定顺序的值不在样本中时由整列取值决定
+    (AMBIGUOUS + ['13/04/2024'], 'd', {'format': '%d/%m/%Y'}),
+    (AMBIGUOUS + ['04/13/2024'], 'd', {'format': '%m/%d/%Y'}),
+    # 整列都无法确定时按日在前解析并标记歧义
+    (AMBIGUOUS, 'd', {'format': '%d/%m/%Y', 'ambiguous': True}),
+    (['2024年1月31日', '2023年12月1日'] * 50, 'd', {'format': '%Y年%m月%d日'}),
+    # 时间戳单位由取值范围确定；只有列名表示时间时才识别
+    (list(np.arange(1_600_000_000, 1_600_000_200)), 'created_ts', {'unit': 's'}),
+    (list(np.arange(1_600_000_000_000, 1_600_000_000_200)), 'event_time', {'unit': 'ms'}),
+    (list(range(20240101, 20240129)) * 5, 'order_date', {'format': '%Y%m%d'}),
+])
+def test_detected(values, name, expected):
+    assert detect_datetime(pd.Series(values), name) == expected
+
+
+@pytest.mark.parametrize('values, name', [
+    (['apple', 'banana', 'cherry'] * 50, 'fruit'),
+    (['A-1001', 'B-2002', 'C-3003'] * 50, 'code'),
+    (['2024', '2023', '2022'] * 50, 'year'),
+    (['1.5', '2.25', '3.75'] * 50, 'ratio'),
+    (['13/13/2024', '14/14/2024'] * 50, 'd'),
+    (list(np.arange(1_600_000_000, 1_600_000_200)), 'user_id'),
+    (list(np.arange(1_600_000_000, 1_600_000_200)), 'day'),
+    (list(np.arange(1_600_000_000, 1_600_000_200)), 'ts_count'),
+    (list(np.random.default_rng(0).random(200)), 'timestamp'),
+    ([True, False] * 50, 'is_date'),
+])
+def test_not_detected(values, name):
+    assert detect_datetime(pd.Series(values), name) is None
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('created_at', True), ('updated', True), ('created_ts', True), ('ts', True), ('birth_dt', True),
+    ('Order Date', True), ('ts_count', False), ('dt_flag', False), ('day', False), ('at_bat', False),
+    ('update_count', False),
+])
+def test_time_names(name, expected):
+    assert has_time_name(name) is expected
+
+
+def test_parse_applies_detected_spec():
+    series = pd.Series(['31/01/2024', None, 'bad', '01/02/2024'])
+    parsed = parse_datetime(series, detect_datetime(pd.Series(['31/01/2024', '01/02/2024'] * 50)))
+    assert parsed.tolist()[0] == pd.Timestamp('2024-01-31')
+    assert parsed.tolist()[3] == pd.Timestamp('2024-02-01')
+    assert parsed.isna().tolist() == [False, True, True, False]
+    epoch = parse_datetime(pd.Series([1_700_000_000_000, None]), {'unit': 'ms'})
+    assert epoch.iloc[0] == pd.Timestamp('2023-11-14 22:13:20')
@@ -0,0 +1,59 @@
+#去重测试：内存模式、流式内存集合与外部分区去重删除相同的行
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant.cleaner import DataCleaner
+from data_assistant.streaming import RowHashSet, PartitionedRowHashSet
+from data_assistant.loader import copy_on_write
+
+
+def make_frame(rows=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'id': rng.integers(0, 1500, rows), 'value': rng.integers(0, 3, rows).astype(float),
+                       'tag': rng.choice(['a', 'b'], rows).astype(object)})
+    df.loc[rng.random(rows) < 0.05, 'value'] = np.nan
+    return df
+
+
+def chunked(df, size=300):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size].copy()
+
+
+def cleaned_rows(store):
+    try:
+        return pd.concat(list(store)).reset_index(drop=True)
+    finally:
+        store.cleanup()
+
+
+@pytest.mark.parametrize('dedup_keys', [None, ['id']])
+def test_dedup_modes_remove_same_rows(dedup_keys):
+    df = make_frame()
+    with copy_on_write():
+        in_memory = DataCleaner(df.copy(), dedup_keys=dedup_keys).clean_data().reset_index(drop=True)
+        memory = cleaned_rows(DataCleaner(dedup_keys=dedup_keys).clean_chunks(chunked(df)))
+        external = cleaned_rows(DataCleaner(dedup_keys=dedup_keys, external_dedup=True).clean_chunks(chunked(df)))
+    expected = len(df.drop_duplicates(subset=dedup_keys))
+    assert len(in_memory) == len(memory) == len(external) == expected
+    pd.testing.assert_frame_equal(memory, external)
+    pd.testing.assert_frame_equal(memory, in_memory, check_dtype=False, check_categorical=False)
+
+
+def test_hash_sets_match_pandas():
+    df = make_frame(seed=1)
+    expected = ~df.duplicated().to_numpy()
+    seen = RowHashSet()
+    mask = np.concatenate([seen.first_occurrence_mask(chunk) for chunk in chunked(df)])
+    np.testing.assert_array_equal(mask, expected)
+    assert len(seen) == expected.sum()
+
+    partitioned = PartitionedRowHashSet(partitions=8)
+    try:
+        for chunk in chunked(df):
+            partitioned.add(chunk)
+        partitioned.finalize()
+        mask = np.concatenate([partitioned.first_occurrence_mask(chunk) for chunk in chunked(df)])
+    finally:
+        partitioned.cleanup()
+    np.testing.assert_array_equal(mask, expected)
@@ -0,0 +1,90 @@
+#增量分析测试：追加后的增量结果与完整分析一致，没有新数据、截断或改写时的处理
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant.main import build_parser
+from data_assistant.incremental import run_incremental
+
+
+def make_rows(rows, seed):
+    """均匀分布的数值列（没有 IQR 异常值，填充值与边界不随追加变化）和分类列"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'a': rng.random(rows).round(4), 'b': rng.integers(0, 9, rows),
+                         'c': rng.choice(['x', 'y', 'z'], rows)})
+
+
+def run(path, state_dir):
+    options = build_parser().parse_args([path, '--incremental', '--chunksize', '500', '--state-dir', state_dir])
+    result = run_incremental(path, options)
+    assert result is not None
+    return result
+
+
+def summary(result):
+    loader, cleaner, analyzer = result
+    stats = {col: {key: analyzer.analysis['summary'][col][key] for key in ('count', 'mean', 'min', 'max')}
+             for col in ('a', 'b')}
+    return loader.file_info['original_shape'], cleaner.state['final_count'], stats
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = str(tmp_path / 'log.csv')
+    make_rows(2000, 0).to_csv(path, index=False)
+    return path
+
+
+def append(path, df):
+    df.to_csv(path, mode='a', header=False, index=False)
+
+
+def test_append_matches_full_run(data_file, tmp_path):
+    state_dir = str(tmp_path / 'state')
+    first = run(data_file, state_dir)
+    assert first[0].file_info['incremental']['mode'] == 'full'
+
+    base = pd.read_csv(data_file)
+    appended = pd.concat([make_rows(700, 1), base.iloc[:30]], ignore_index=True)
+    append(data_file, appended)
+    incremental = run(data_file, state_dir)
+    info = incremental[0].file_info['incremental']
+    assert info['mode'] == 'append'
+    assert info['new_rows'] == len(appended)
+
+    full = run(data_file, str(tmp_path / 'fresh'))
+    assert full[0].file_info['incremental']['mode'] == 'full'
+    assert summary(incremental) == summary(full)
+    # 追加部分中与此前的行重复的行（包括复制的 30 行）被删除
+    assert incremental[1].state['final_count'] == len(pd.read_csv(data_file).drop_duplicates())
+
+
+def test_no_new_bytes(data_file, tmp_path):
+    state_dir = str(tmp_path / 'state')
+    first = run(data_file, state_dir)
+    again = run(data_file, state_dir)
+    info = again[0].file_info['incremental']
+    assert info['mode'] == 'append'
+    assert info['start_offset'] == info['end_offset'] == os.path.getsize(data_file)
+    assert info['new_rows'] == 0
+    assert summary(again) == summary(first)
+
+
+@pytest.mark.parametrize('change, reason', [
+    ('truncate', '文件被截断'),
+    ('rewrite', '文件已被改写'),
+])
+def test_truncate_or_rewrite_runs_full(data_file, tmp_path, change, reason):
+    state_dir = str(tmp_path / 'state')
+    run(data_file, state_dir)
+    if change == 'truncate':
+        make_rows(1500, 0).to_csv(data_file, index=False)
+    else:
+        # 大小不变、内容不同
+        with open(data_file, 'r+b') as f:
+            f.seek(len('a,b,c\n'))
+            f.write(b'9')
+    result = run(data_file, state_dir)
+    info = result[0].file_info['incremental']
+    assert (info['mode'], info['reason'], info['start_offset']) == ('full', reason, 0)
+    assert summary(result) == summary(run(data_file, str(tmp_path / 'fresh')))
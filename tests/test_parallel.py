@@ -0,0 +1,73 @@
+#列并行测试：进程池共享内存解析、行哈希与串行结果一致
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant import parallel
+from data_assistant.parallel import ColumnExecutor, _share_text, _parse_into_shared
+from data_assistant.datetimes import parse_datetime
+from data_assistant.streaming import row_hashes
+
+pytest.importorskip('pyarrow')
+SPEC = {'format': '%Y-%m-%d %H:%M:%S'}
+
+
+def text_dates(rows, seed):
+    seconds = np.random.default_rng(seed).integers(0, 365 * 24 * 3600, rows)
+    values = pd.Series(pd.Timestamp('2020-01-01') + pd.to_timedelta(seconds, unit='s')).dt.strftime('%Y-%m-%d %H:%M:%S')
+    values = values.astype(object)
+    values.iloc[::17] = None
+    values.iloc[5] = 'not a date'
+    return values
+
+
+def test_parse_into_shared_writes_buffer():
+    values = text_dates(1000, 0)
+    text = _share_text(values)
+    out = shared_memory.SharedMemory(create=True, size=len(values) * 8)
+    try:
+        dtype = _parse_into_shared((text.name, len(values)), SPEC, out.name)
+        assert isinstance(dtype, str)
+        result = np.ndarray(len(values), dtype=np.int64, buffer=out.buf).copy().view(dtype)
+    finally:
+        for buffer in (text, out):
+            buffer.close()
+            buffer.unlink()
+    expected = parse_datetime(values, SPEC)
+    assert dtype == str(expected.dtype)
+    pd.testing.assert_series_equal(pd.Series(result), expected.reset_index(drop=True))
+
+
+def test_share_text_rejects_mixed_values():
+    assert _share_text(pd.Series([1, 'a'], dtype=object)) is None
+
+
+def test_process_pool_matches_serial(monkeypatch):
+    df = pd.DataFrame({'a': text_dates(3000, 1), 'b': text_dates(3000, 2),
+                       'c': pd.Series(np.arange(3000) + 1_600_000_000)})
+    specs = {'a': SPEC, 'b': SPEC, 'c': {'unit': 's'}}
+    serial = ColumnExecutor(1).parse_datetimes(df, specs)
+    monkeypatch.setattr(parallel, 'PROCESS_MIN_ROWS', 0)
+    executor = ColumnExecutor(2)
+    try:
+        pooled = executor.parse_datetimes(df, specs)
+        assert executor._processes is not None
+    finally:
+        executor.close()
+    for col in specs:
+        pd.testing.assert_series_equal(pooled[col], serial[col], check_names=False)
+
+
+def test_row_hashes_parallel_matches_serial():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'x': rng.integers(0, 5, 1000), 'y': rng.choice(['p', 'q'], 1000),
+                       'z': rng.random(1000)})
+    executor = ColumnExecutor(2)
+    try:
+        np.testing.assert_array_equal(row_hashes(df, executor), row_hashes(df))
+    finally:
+        executor.close()
+    # 同样的取值出现在不同的列上时行哈希不同；重复行判断与 DataFrame.duplicated 一致
+    swapped = pd.DataFrame({'x': [1, 2], 'y': [2, 1]})
+    assert row_hashes(swapped)[0] != row_hashes(swapped)[1]
+    np.testing.assert_array_equal(pd.Series(row_hashes(df)).duplicated().to_numpy(), df.duplicated().to_numpy())
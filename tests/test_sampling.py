@@ -0,0 +1,76 @@
+#快速抽样测试：固定种子的数据文件上，估计总数与均值的置信区间覆盖完整数据上的真实值
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant import sampling
+from data_assistant.loader import DataLoader
+
+ROWS = 60000
+
+
+@pytest.fixture(scope='module')
+def data_file(tmp_path_factory):
+    """含缓慢漂移（相邻行相关）和缺失值的数值列、一个分类列"""
+    rng = np.random.default_rng(7)
+    drift = np.linspace(0, 5, ROWS)
+    df = pd.DataFrame({
+        'a': rng.normal(10, 2, ROWS) + drift,
+        'b': rng.exponential(3, ROWS),
+        'c': rng.integers(0, 100, ROWS).astype(float),
+        'label': rng.choice(['x', 'y', 'z'], ROWS)
+    })
+    df.loc[rng.random(ROWS) < 0.05, 'a'] = np.nan
+    df.loc[rng.random(ROWS) < 0.2 * drift / 5, 'b'] = np.nan
+    path = tmp_path_factory.mktemp('quick') / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+def load(path, rows):
+    loader = DataLoader(path)
+    assert loader.load_sample(rows=rows, seconds=60)
+    return loader.df, loader.sample
+
+
+def covers(interval, truth):
+    estimate, lower, upper = interval
+    return lower <= truth <= upper
+
+
+def test_byte_ranges_intervals_cover_truth(data_file, monkeypatch):
+    path, full = data_file
+    monkeypatch.setattr(sampling, 'QUICK_SCAN_BYTES', 0)
+    monkeypatch.setattr(sampling, 'QUICK_BLOCK_BYTES', 4096)
+    df, sample = load(path, rows=8000)
+    assert sample.method == 'byte_ranges'
+    assert 8000 <= len(df) < ROWS
+
+    totals = sample.totals(np.arange(len(df)), df.columns)
+    assert covers(totals['rows'], ROWS)
+    for col in ('a', 'b'):
+        assert covers(totals['missing'][col], full[col].isna().sum())
+
+    estimates = sample.statistics(df, ['a', 'b', 'c'])
+    for col in ('a', 'b', 'c'):
+        assert covers(estimates[col]['mean'], full[col].mean())
+        assert covers(estimates[col]['50%'], full[col].median())
+
+
+def test_reservoir_exact_rows(data_file):
+    path, full = data_file
+    df, sample = load(path, rows=5000)
+    assert sample.method == 'reservoir'
+    assert len(df) == 5000
+    totals = sample.totals(np.arange(len(df)), df.columns)
+    assert totals['rows'] == [float(ROWS)] * 3
+    estimates = sample.statistics(df, ['a', 'b', 'c'])
+    for col in ('a', 'b', 'c'):
+        assert covers(estimates[col]['mean'], full[col].mean())
+
+
+def test_reservoir_time_budget():
+    chunks = (pd.DataFrame({'a': range(i, i + 10)}) for i in range(0, 100, 10))
+    assert sampling.reservoir_sample(chunks, 5, seconds=0.0, progress=lambda: 0.1) is None
+    chunks = (pd.DataFrame({'a': range(i, i + 10)}) for i in range(0, 100, 10))
+    sample, plan = sampling.reservoir_sample(chunks, 5, seconds=60.0, progress=lambda: 0.5)
+    assert len(sample) == 5 and plan.rows_total == 100
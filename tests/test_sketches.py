@@ -0,0 +1,137 @@
+#统计草图测试：分块合并与一次累计一致、序列化往返不变、近似误差不超过给出的误差界
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant.sketches import Moments, CoMoments, KLLSketch, HyperLogLog, SpaceSaving
+
+
+def split(values, parts=4):
+    return np.array_split(values, parts)
+
+
+def roundtrip(sketch):
+    """经 JSON 序列化后重建"""
+    return type(sketch).from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_moments_merge(rng):
+    values = rng.normal(10, 3, 50000)
+    values[::97] = np.nan
+    single = Moments()
+    single.update(values)
+    merged = Moments()
+    for part in split(values):
+        batch = Moments()
+        batch.update(part)
+        merged.merge(batch)
+    assert merged.count == single.count == np.count_nonzero(~np.isnan(values))
+    assert merged.mean == pytest.approx(np.nanmean(values), rel=1e-12)
+    assert merged.std == pytest.approx(single.std, rel=1e-12)
+    assert merged.std == pytest.approx(np.nanstd(values, ddof=1), rel=1e-12)
+    assert (merged.min, merged.max) == (np.nanmin(values), np.nanmax(values))
+    assert roundtrip(merged).to_dict() == merged.to_dict()
+
+
+def test_comoments_merge(rng):
+    x = rng.normal(size=(30000, 4))
+    x[:, 1] += x[:, 0]
+    x[::53, 2] = np.nan
+    single = CoMoments(4)
+    single.update(x)
+    merged = CoMoments(4)
+    for part in split(x):
+        batch = CoMoments(4)
+        batch.update(part)
+        merged.merge(batch)
+    expected = pd.DataFrame(x).dropna().corr().to_numpy()
+    assert merged.count == single.count
+    np.testing.assert_allclose(merged.corr(), single.corr(), rtol=1e-12)
+    np.testing.assert_allclose(merged.corr(), expected, rtol=1e-10)
+    restored = roundtrip(merged)
+    assert restored.to_dict() == merged.to_dict()
+    np.testing.assert_array_equal(restored.corr(), merged.corr())
+
+
+def test_kll_exact_without_compaction(rng):
+    values = rng.normal(size=150)
+    single = KLLSketch()
+    single.update(values)
+    merged = KLLSketch()
+    for part in split(values):
+        batch = KLLSketch()
+        batch.update(part)
+        merged.merge(batch)
+    qs = [0.1, 0.25, 0.5, 0.75, 0.9]
+    np.testing.assert_array_equal(single.quantiles(qs), np.quantile(values, qs))
+    np.testing.assert_array_equal(merged.quantiles(qs), np.quantile(values, qs))
+    assert merged.rank_error == 0.0
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_kll_rank_error_within_bound(seed):
+    values = np.random.default_rng(seed).lognormal(size=200000)
+    single = KLLSketch(seed=seed)
+    merged = KLLSketch(seed=seed)
+    for part in split(values, 20):
+        single.update(part)
+        batch = KLLSketch(seed=seed + 100)
+        batch.update(part)
+        merged.merge(batch)
+    ordered = np.sort(values)
+    qs = np.linspace(0.01, 0.99, 99)
+    for sketch in (single, merged):
+        assert sketch.n == len(values)
+        ranks = np.searchsorted(ordered, sketch.quantiles(qs), side='right') / len(values)
+        assert np.abs(ranks - qs).max() <= sketch.rank_error + 1 / len(values)
+        restored = roundtrip(sketch)
+        assert restored.to_dict() == sketch.to_dict()
+        np.testing.assert_array_equal(restored.quantiles(qs), sketch.quantiles(qs))
+
+
+@pytest.mark.parametrize('distinct', [500, 20000, 300000])
+def test_hll_merge_and_error_bound(distinct):
+    values = pd.Series(np.random.default_rng(distinct).integers(0, distinct, distinct * 2))
+    truth = values.nunique()
+    single = HyperLogLog()
+    single.update(values)
+    merged = HyperLogLog()
+    for part in np.array_split(np.arange(len(values)), 4):
+        batch = HyperLogLog()
+        batch.update(values.iloc[part])
+        merged.merge(batch)
+    np.testing.assert_array_equal(merged.registers, single.registers)
+    assert abs(merged.count() - truth) <= merged.relative_error * truth
+    restored = roundtrip(merged)
+    np.testing.assert_array_equal(restored.registers, merged.registers)
+    assert restored.count() == merged.count()
+
+
+def test_space_saving_merge(rng):
+    values = pd.Series(rng.zipf(1.5, 100000) % 5000).astype(str)
+    truth = values.value_counts()
+
+    # 不同值不超过容量时计数精确，分块合并与一次计数相同
+    single = SpaceSaving(capacity=10000)
+    single.update(values)
+    merged = SpaceSaving(capacity=10000)
+    for part in np.array_split(np.arange(len(values)), 4):
+        merged.update(values.iloc[part])
+    pd.testing.assert_series_equal(merged.counts.sort_index(), single.counts.sort_index())
+    pd.testing.assert_series_equal(merged.counts.sort_index(), truth.sort_index(), check_names=False)
+    assert merged.max_error() == 0
+
+    # 容量不足时每个计数是上界，高估量不超过 error
+    small = SpaceSaving(capacity=100)
+    for part in np.array_split(np.arange(len(values)), 10):
+        small.update(values.iloc[part])
+    for key, count in small.top(10).items():
+        assert count - small.errors[key] <= truth[key] <= count
+    assert list(small.top(5).index) == list(truth.head(5).index)
+    restored = roundtrip(small)
+    assert restored.to_dict() == small.to_dict()
@@ -0,0 +1,99 @@
+#流式处理测试：分块清洗与分析的结果与内存模式一致，外存分位数与 NumPy 一致
+import numpy as np
+import pandas as pd
+import pytest
+from data_assistant import streaming
+from data_assistant.streaming import ColumnSpill
+from data_assistant.cleaner import DataCleaner
+from data_assistant.analyzer import DataAnalyzer
+from data_assistant.loader import copy_on_write
+
+
+def make_frame(rows=3000, seed=0):
+    """含缺失值、异常值、重复行、空行、文本日期列和分类列"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Value A': rng.normal(50, 10, rows),
+        'value-b': rng.exponential(5, rows),
+        'count': rng.integers(0, 20, rows).astype(float),
+        'Category': rng.choice(['x', 'y', 'z'], rows).astype(object),
+        'order date': pd.Series(pd.Timestamp('2023-01-01')
+                                + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')).dt.strftime('%Y-%m-%d')
+    })
+    df.loc[rng.random(rows) < 0.05, 'Value A'] = np.nan
+    df.loc[rng.random(rows) < 0.02, 'value-b'] = 300.0
+    df.loc[rng.random(rows) < 0.03, 'Category'] = None
+    df.iloc[100:110] = df.iloc[0:10].to_numpy()
+    df.iloc[200] = np.nan
+    return df
+
+
+def chunked(df, size):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size].copy()
+
+
+@pytest.fixture(autouse=True)
+def cow():
+    with copy_on_write():
+        yield
+
+
+@pytest.mark.parametrize('chunksize', [250, 1000])
+def test_chunked_cleaning_matches_in_memory(chunksize):
+    df = make_frame()
+    cleaner = DataCleaner(df.copy())
+    cleaned = cleaner.clean_data()
+    analyzer = DataAnalyzer(cleaned, profile=cleaner.profile)
+    analyzer.analyze_data()
+
+    chunk_cleaner = DataCleaner()
+    store = chunk_cleaner.clean_chunks(chunked(df, chunksize))
+    try:
+        chunk_analyzer = DataAnalyzer()
+        chunk_analyzer.analyze_chunks(store)
+    finally:
+        store.cleanup()
+
+    assert chunk_cleaner.issues == cleaner.issues == []
+    assert chunk_cleaner.cleaning['steps'] == cleaner.cleaning['steps']
+    assert chunk_cleaner.cleaning['missing_report'] == cleaner.cleaning['missing_report']
+    expected = cleaner.cleaning['outlier_report']
+    actual = chunk_cleaner.cleaning['outlier_report']
+    assert actual.keys() == expected.keys()
+    for col in expected:
+        assert actual[col]['outliers_count'] == expected[col]['outliers_count']
+        assert actual[col]['lower_bound'] == pytest.approx(expected[col]['lower_bound'])
+        assert actual[col]['upper_bound'] == pytest.approx(expected[col]['upper_bound'])
+
+    summary, chunk_summary = analyzer.analysis['summary'], chunk_analyzer.analysis['summary']
+    for col in ('value_a', 'value_b', 'count'):
+        for stat in ('count', 'min', '25%', '50%', '75%', 'max'):
+            assert chunk_summary[col][stat] == pytest.approx(summary[col][stat]), (col, stat)
+        assert chunk_summary[col]['mean'] == pytest.approx(summary[col]['mean'], abs=0.01)
+    for stat in ('min', '25%', '50%', '75%', 'max'):
+        assert chunk_summary['order_date'][stat] == summary['order_date'][stat]
+
+
+@pytest.mark.parametrize('block', [1 << 20, 64, 7])
+def test_spill_select_matches_numpy(block, monkeypatch):
+    monkeypatch.setattr(streaming, 'SPILL_BLOCK_VALUES', block)
+    rng = np.random.default_rng(block)
+    probs = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]
+    cases = [rng.normal(size=5000) * 1e3, rng.integers(-5, 5, 3000).astype(float), np.array([2.5]),
+             rng.integers(-10 ** 18, 10 ** 18, 2000, dtype=np.int64)]
+    for values in cases:
+        spill = ColumnSpill()
+        try:
+            for part in np.array_split(values, 3):
+                spill.append('c', part, dtype=values.dtype)
+            ranks = rng.integers(0, len(values), 10)
+            assert spill.select('c', list(ranks)) == list(np.sort(values)[ranks])
+            assert spill.quantiles('c', probs) == list(np.quantile(values, probs))
+            if values.dtype.kind == 'f':
+                assert spill.median('c') == np.median(values)
+                fill = (float(np.median(values)), 400)
+                full = np.concatenate([values, np.full(fill[1], fill[0])])
+                assert spill.quantiles('c', probs, fill) == list(np.quantile(full, probs))
+        finally:
+            spill.cleanup()